@@ -7,25 +7,30 @@ import json
 import logging
 import asyncio # For async operations
 import datetime # For timedelta conversion in formatting
+import time
 import pytz # --- NEW: For timezone-aware date/time ---
-from flask import Flask, request, render_template, jsonify
+from flask import Flask, Response, request, render_template, jsonify
 from twilio.twiml.messaging_response import MessagingResponse
 
 # Import custom modules
 import database
+import async_database # Awaitable wrappers around database.get_*
 import gemini_client
-
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import intent_router # Local fast path in front of get_query_intent
+import twilio_replies # Background WhatsApp replies via the Twilio REST API
+import conversation_store # Bounded, expiring per-user DialogueManager storage
+import tracing # Per-message stage timings and trace ids
+import metrics # Counters/histograms for /metrics
+import logging_setup # Queue-based, leveled log output
+import request_scope # Per-message memo of database.get_* results
+import query_audit # EXPLAIN audit of the database.py queries
+
+# Configure logging (LOG_LEVEL, LOG_FORMAT=text|json)
+logging_setup.configure_logging()
 
 # --- Flask App Initialization ---
 app = Flask(__name__, template_folder='static', static_folder='static')
 
-# --- Conversation Memory (Simple Dictionary) ---
-# --- MODIFIED: This will now hold our 'DialogueManager' instances ---
-conversation_memory = {}
-
-
 # --- NEW: Static answers for common questions ---
 PLACEMENT_START_INFO = (
     "Placements generally start from the 5th semester onwards. "
@@ -172,6 +177,31 @@ def is_negative_reply(query):
         'nah', 'negative', 'naa', 'na'
     ]
 
+ORDINAL_CHOICES = {'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'fifth': 5, 'sixth': 6}
+
+def pick_listed_faculty(query, candidates):
+    """
+    Picks a name from the numbered list shown for 'clarify_faculty_name'.
+    Accepts "2", "#2", "option 2", "the second one", "last" or part of a listed name.
+    Returns the chosen name, or None.
+    """
+    if not candidates:
+        return None
+    query_lower = query.lower().strip().rstrip('.')
+    words = query_lower.replace('#', ' ').split()
+    for word in words:
+        digits = word.rstrip('stndrh.)') # "2nd", "2.", "2)"
+        number = int(digits) if digits.isdigit() else ORDINAL_CHOICES.get(word)
+        if word == 'last':
+            number = len(candidates)
+        if number and 1 <= number <= len(candidates):
+            return candidates[number - 1]
+    typed = database.normalize_name(query) if len(query_lower) >= 3 else ''
+    if not typed:
+        return None
+    matches = [name for name in candidates if typed in database.normalize_name(name)]
+    return matches[0] if len(matches) == 1 else None
+
 def is_similar_faculty_name(name_from_user, name_from_db):
     """
     Simple check to see if the user's query is *different* from the DB result.
@@ -280,6 +310,102 @@ class DialogueManager:
     """
     Manages the conversation state for a single user using slot-filling.
     """
+    # Instances are kept for every user with an open conversation (see
+    # conversation_store.py), so they carry no per-instance __dict__ and share
+    # the forms below instead of each building a copy.
+    __slots__ = (
+        'user_id', 'current_intent', 'required_slots', 'filled_slots', 'questions',
+        'intent_family', 'pending_action', 'action_context',
+    )
+
+    # This map defines the "forms" for each intent (shared, read-only)
+    intent_forms = {
+        "get_timetable": {
+            "all_slots": ["day", "branch", "section", "year", "faculty_name", "course_name", "course_code"],
+            "required_slots": ["day"], # We'll ask for day first
+            "questions": {
+                "day": "Sure, which day of the week?",
+                "branch": "Which branch?",
+                "section": "Which section?",
+                "year": "Which year?"
+            }
+        },
+        # --- NEW: For listing classes ---
+        "get_faculty_schedule": {
+            "all_slots": ["faculty_name", "day"],
+            "required_slots": ["faculty_name", "day"],
+            "questions": {
+                "faculty_name": "Which faculty member's schedule are you asking about?",
+                "day": "Sure, which day of the week?"
+            },
+            "stay_open": True,
+            "family": "faculty_availability"
+        },
+        # --- MODIFIED: For listing free slots ---
+        "get_faculty_availability": {
+            "all_slots": ["faculty_name", "day", "time_of_day"],
+            "required_slots": ["faculty_name", "day"],
+            "questions": {
+                "faculty_name": "Which faculty member are you asking about?",
+                "day": "Sure, which day of the week?"
+            },
+            "stay_open": True,
+            "family": "faculty_availability"
+        },
+        # --- NEW: For dynamic location ---
+        "get_faculty_location_on_day": {
+            "all_slots": ["faculty_name", "day"],
+            "required_slots": ["faculty_name", "day"],
+            "questions": {
+                "faculty_name": "Which faculty member are you looking for?",
+                "day": "For which day?"
+            },
+            "stay_open": True,
+            "family": "faculty_availability" # Add to same family
+        },
+        # --- NEW: For campus availability ---
+        "get_faculty_campus_availability": {
+            "all_slots": ["faculty_name", "location_name","day"],
+            "required_slots": ["faculty_name"],
+            "questions": {
+                "faculty_name": "Which faculty member's availability are you asking about?"
+            },
+            "stay_open": True,
+            "family": "faculty_availability"
+        },
+        "get_course_instructors": {
+            "all_slots": ["course_name", "course_code", "branch", "section"],
+            "required_slots": ["course_name"], # Will be adapted if code is given
+            "questions": {
+                "course_name": "What is the course name?",
+                "branch": "Which branch?",
+                "section": "Which section?"
+            },
+            "stay_open": True,
+            "family": "course_info" # --- NEW ---
+        },
+        "get_placement_companies_by_ctc": {
+            "all_slots": ["ctc_operator", "ctc_amount"],
+            "required_slots": ["ctc_operator", "ctc_amount"],
+            "questions": {
+                "ctc_operator": "Are you looking for packages 'more than' or 'less than' a certain amount?",
+                "ctc_amount": "What is the CTC amount (in LPA)?"
+            },
+            "stay_open": True,
+            "family": "placement_ctc" # --- NEW ---
+        },
+        "get_placement_count_by_ctc": {
+            "all_slots": ["ctc_operator", "ctc_amount"],
+            "required_slots": ["ctc_operator", "ctc_amount"],
+            "questions": {
+                "ctc_operator": "Are you looking for packages 'more than' or 'less than' a certain amount?",
+                "ctc_amount": "What is the CTC amount (in LPA)?"
+            },
+            "stay_open": True,
+            "family": "placement_ctc" # --- NEW ---
+        }
+    }
+
     def __init__(self, user_id):
         self.user_id = user_id
         self.current_intent = None
@@ -292,104 +418,6 @@ class DialogueManager:
         self.pending_action = None 
         self.action_context = {}
 
-        # This map defines the "forms" for each intent
-        self.intent_forms = {
-            "get_timetable": {
-                "all_slots": ["day", "branch", "section", "year", "faculty_name", "course_name", "course_code"],
-                "required_slots": ["day"], # We'll ask for day first
-                "questions": {
-                    "day": "Sure, which day of the week?",
-                    "branch": "Which branch?",
-                    "section": "Which section?",
-                    "year": "Which year?"
-                }
-            },
-            # --- NEW: For listing classes ---
-            "get_faculty_schedule": {
-                "all_slots": ["faculty_name", "day"],
-                "required_slots": ["faculty_name", "day"],
-                "questions": {
-                    "faculty_name": "Which faculty member's schedule are you asking about?",
-                    "day": "Sure, which day of the week?"
-                },
-                "stay_open": True,
-                "family": "faculty_availability"
-            },# --- NEW: For listing classes ---
-            "get_faculty_schedule": {
-                "all_slots": ["faculty_name", "day"],
-                "required_slots": ["faculty_name", "day"],
-                "questions": {
-                    "faculty_name": "Which faculty member's schedule are you asking about?",
-                    "day": "Sure, which day of the week?"
-                },
-                "stay_open": True,
-                "family": "faculty_availability"
-            },
-            # --- MODIFIED: For listing free slots ---
-            "get_faculty_availability": {
-                "all_slots": ["faculty_name", "day", "time_of_day"],
-                "required_slots": ["faculty_name", "day"],
-                "questions": {
-                    "faculty_name": "Which faculty member are you asking about?",
-                    "day": "Sure, which day of the week?"
-                },
-                "stay_open": True,
-                "family": "faculty_availability"
-            },
-            # --- NEW: For dynamic location ---
-            "get_faculty_location_on_day": {
-                "all_slots": ["faculty_name", "day"],
-                "required_slots": ["faculty_name", "day"],
-                "questions": {
-                    "faculty_name": "Which faculty member are you looking for?",
-                    "day": "For which day?"
-                },
-                "stay_open": True,
-                "family": "faculty_availability" # Add to same family
-            },
-            # --- NEW: For campus availability ---
-            "get_faculty_campus_availability": {
-                "all_slots": ["faculty_name", "location_name","day"],
-                "required_slots": ["faculty_name"],
-                "questions": {
-                    "faculty_name": "Which faculty member's availability are you asking about?"
-                },
-                "stay_open": True,
-                "family": "faculty_availability"
-            },
-            "get_course_instructors": {
-                "all_slots": ["course_name", "course_code", "branch", "section"],
-                "required_slots": ["course_name"], # Will be adapted if code is given
-                "questions": {
-                    "course_name": "What is the course name?",
-                    "branch": "Which branch?",
-                    "section": "Which section?"
-                },
-                "stay_open": True,
-                "family": "course_info" # --- NEW ---
-            },
-            "get_placement_companies_by_ctc": {
-                "all_slots": ["ctc_operator", "ctc_amount"],
-                "required_slots": ["ctc_operator", "ctc_amount"],
-                "questions": {
-                    "ctc_operator": "Are you looking for packages 'more than' or 'less than' a certain amount?",
-                    "ctc_amount": "What is the CTC amount (in LPA)?"
-                },
-                "stay_open": True,
-                "family": "placement_ctc" # --- NEW ---
-            },
-            "get_placement_count_by_ctc": {
-                "all_slots": ["ctc_operator", "ctc_amount"],
-                "required_slots": ["ctc_operator", "ctc_amount"],
-                "questions": {
-                    "ctc_operator": "Are you looking for packages 'more than' or 'less than' a certain amount?",
-                    "ctc_amount": "What is the CTC amount (in LPA)?"
-                },
-                "stay_open": True,
-                "family": "placement_ctc" # --- NEW ---
-            }
-        }
-
     def is_in_conversation(self):
         """Is the bot currently waiting for a slot to be filled?"""
         return self.current_intent is not None
@@ -477,8 +505,91 @@ class DialogueManager:
         self.pending_action = None
         self.action_context = {}
 
+    def is_idle(self):
+        """True when there is nothing to remember (a fresh manager would behave the same)."""
+        return self.current_intent is None and self.pending_action is None
+
+    def to_state(self):
+        """JSON-serializable state for conversation stores that live outside the process."""
+        return {
+            'current_intent': self.current_intent,
+            'required_slots': self.required_slots,
+            'filled_slots': self.filled_slots,
+            'intent_family': self.intent_family,
+            'pending_action': self.pending_action,
+            'action_context': self.action_context,
+        }
+
+    @classmethod
+    def from_state(cls, user_id, state):
+        manager = cls(user_id)
+        manager.current_intent = state['current_intent']
+        manager.required_slots = state['required_slots']
+        manager.filled_slots = state['filled_slots']
+        manager.intent_family = state['intent_family']
+        manager.pending_action = state['pending_action']
+        manager.action_context = state['action_context']
+        if manager.current_intent:
+            manager.questions = cls.intent_forms.get(manager.current_intent, {}).get("questions", {})
+        return manager
+
 # --- END NEW Dialogue Manager Class ---
 
+# --- Conversation Memory (see conversation_store.py) ---
+# Holds a DialogueManager for every user with an open conversation, bounded by
+# CONVERSATION_TTL / CONVERSATION_MAX_USERS.
+conversation_memory = conversation_store.create_store(DialogueManager)
+
+
+# --- NEW: Local resolution of replies to the bot's own questions ---
+PLACEHOLDER_INTENT = {'intent': 'general_chat', 'entities': {}} # Step 1.5 overrides it from action_context
+OFFER_KEYWORDS = ('free', 'schedule', 'class', 'where', 'find', 'location')
+
+def resolve_dialogue_reply(manager, user_query):
+    """
+    Answers "what does this reply mean?" without Gemini when the bot is waiting for
+    something specific: a yes/no, a department, a pick from a numbered list, or a
+    missing slot ("tuesday", "cse b", "3rd year"). Returns intent data in the
+    get_query_intent() shape, or None when the reply needs a real classification.
+    """
+    action = manager.pending_action
+    if action == 'confirm_faculty_name':
+        if is_positive_reply(user_query) or is_negative_reply(user_query):
+            return dict(PLACEHOLDER_INTENT, source='dialogue')
+        return None
+
+    if action == 'offer_faculty_details':
+        query_lower = user_query.lower()
+        if is_positive_reply(user_query) or is_negative_reply(user_query):
+            return dict(PLACEHOLDER_INTENT, source='dialogue')
+        # Short replies only: a full question might be about someone else
+        if len(query_lower.split()) <= 4 and any(k in query_lower for k in OFFER_KEYWORDS):
+            return dict(PLACEHOLDER_INTENT, source='dialogue')
+        return None
+
+    if action == 'clarify_hod_department':
+        branch = intent_router.parse_department(user_query)
+        if branch:
+            return {'intent': 'unknown', 'entities': {'branch': branch}, 'source': 'dialogue'}
+        return None
+
+    if action == 'clarify_faculty_name':
+        chosen = pick_listed_faculty(user_query, manager.action_context.get('candidates'))
+        if chosen:
+            return {'intent': 'unknown', 'entities': {'faculty_name': chosen, 'faculty_name_confirmed': True}, 'source': 'dialogue'}
+        return None
+
+    if manager.is_in_conversation() and not action:
+        form = manager.intent_forms.get(manager.current_intent, {})
+        missing = [slot for slot in manager.required_slots if slot not in manager.filled_slots]
+        all_slots = form.get('all_slots', manager.required_slots)
+        # A completed form that stays open takes follow-ups for any of its slots
+        entities = intent_router.parse_slot_reply(user_query, missing or all_slots, all_slots)
+        if entities:
+            return {'intent': 'unknown', 'entities': entities, 'source': 'dialogue'}
+    return None
+# --- END NEW ---
+
 
 def format_faculty_courses(results, faculty_name):
     """Formats the list of courses taught by a faculty member."""
@@ -819,38 +930,39 @@ def format_placement_companies_by_ctc(results, operator, amount):
         
     return "\n".join(response_lines)
 
-def format_faculty_availability(db_results, entities, day, faculty_name_from_db):
-    """Formats the faculty's free/busy schedule."""
+def format_faculty_availability(db_results, entities, day, faculty_name_from_db, availability=None):
+    """
+    Formats the faculty's free/busy schedule.
+    Pass `availability` (a timetable_engine.DayAvailability) to answer from the
+    precomputed bitmap; db_results (busy slots) is only used without it.
+    """
     
     faculty_name = faculty_name_from_db or entities.get('faculty_name', 'This faculty member')
     time_str = entities.get('time_of_day')
     
     # 1. Check for "No classes"
-    if not db_results:
+    if not (availability.has_classes if availability is not None else db_results):
         # --- This is the line you wanted changed back ---
         return f"**{faculty_name}** has no classes scheduled on {day.capitalize()}. They are likely not on campus."
 
-    # 2. Calculate free slots
-    free_slots = calculate_free_slots(db_results)
-
-    # 3. Check for a specific time
+    # 2. Check for a specific time
     if time_str:
         user_time = parse_time(time_str)
         if not user_time:
             return f"I'm sorry, I couldn't understand the time '{time_str}'. Please try a format like '3pm' or '15:00'."
         
-        is_free = False
-        for start, end in free_slots:
-            if start <= user_time < end:
-                is_free = True
-                break
+        if availability is not None:
+            is_free = availability.is_free(user_time) # One bit test
+        else:
+            is_free = any(start <= user_time < end for start, end in calculate_free_slots(db_results))
         
         if is_free:
             return f"**Yes**, **{faculty_name}** appears to be **free** at {time_str} on {day.capitalize()}."
         else:
             return f"**No**, **{faculty_name}** appears to be **busy** at {time_str} on {day.capitalize()}."
 
-    # 4. List all free slots
+    # 3. List all free slots
+    free_slots = availability.free_slots() if availability is not None else calculate_free_slots(db_results)
     if not free_slots:
         return f"**{faculty_name}** appears to be busy for the entire day on {day.capitalize()}."
 
@@ -865,7 +977,7 @@ def format_faculty_availability(db_results, entities, day, faculty_name_from_db)
 
 # --- NEW: Location Formatter ---
 def format_specific_location(entities):
-    print(f"--- DEBUG: Entities received: {entities} ---")
+    logging.debug(f"Location entities received: {entities}")
     """
     Handles all the custom logic for specific location questions.
     Returns a dictionary {'text': '...', 'media_url': '...'}
@@ -909,31 +1021,31 @@ def format_specific_location(entities):
     # --- THIS IS THE BLOCK YOU MUST FIX ---
     elif lab_name:
         lab_upper = lab_name.upper()
-        print(f"--- DEBUG: Lab name is {lab_upper} ---")  # <-- DEBUG
+        logging.debug(f"Lab name is {lab_upper}")
 
     # Strict match for ISE / IS (avoid triggering for 'CHEMISTRY')
         if lab_upper in ['ISE', 'IS']:
-            print("--- DEBUG: EXECUTING ISE BLOCK ---")
+            logging.debug("Using the ise lab block.")
             response_text = "All **ISE (IS)** Labs are located on the **3rd Floor** of the **Shankaracharya Block**."
 
     # Strict match for CSE / CS (avoid triggering for 'PHYSICS')
         elif lab_upper in ['CSE', 'CS']:
-            print("--- DEBUG: EXECUTING CSE BLOCK ---")
+            logging.debug("Using the cse lab block.")
             response_text = "All **CSE (CS)** Labs are located on the **2nd Floor** of the **Shankaracharya Block**."
 
     # Physics Lab
         elif 'PHYSICS' in lab_upper:
-            print("--- DEBUG: EXECUTING PHYSICS BLOCK ---")
+            logging.debug("Using the physics lab block.")
             response_text = "The **Physics Lab** is located on the **1st Floor** of the **Ramanujacharya Block**."
 
     # Chemistry Lab
         elif 'CHEMISTRY' in lab_upper:
-            print("--- DEBUG: EXECUTING CHEMISTRY BLOCK ---")
+            logging.debug("Using the chemistry lab block.")
             response_text = "The **Chemistry Lab** is located in the **Basement** of the **Ramanujacharya Block**."
 
     # Default fallback (optional)
         else:
-            print("--- DEBUG: EXECUTING DEFAULT BLOCK ---")
+            logging.debug("Using the default lab block.")
             response_text = "Sorry, I couldn't find the lab you're asking for. Please check the name."
     # --- END OF THE BLOCK TO FIX ---
 
@@ -1046,6 +1158,195 @@ def format_faculty_campus_availability(results, faculty_name):
         f"\nOn other weekdays, they are likely available in the South Campus."
     )
 
+# --- NEW: Reference-Table Formatters ---
+# These used to go through gemini_client.generate_final_response(), which spent a
+# second Gemini round trip just to paraphrase the rows. They are rendered locally
+# now; Gemini is only used for 'general_chat' and 'unknown'.
+
+def _contact_lines(row, prefix=""):
+    """Phone/email/link lines shared by the contact-style tables."""
+    lines = []
+    if row.get('contact_phone'):
+        lines.append(f"{prefix}**Phone:** {row['contact_phone']}")
+    if row.get('contact_email') or row.get('mail_id'):
+        lines.append(f"{prefix}**Email:** {row.get('contact_email') or row.get('mail_id')}")
+    return lines
+
+def format_club_info(results, entities):
+    """Formats one club in full, or a short list of all clubs."""
+    if len(results) == 1:
+        club = results[0]
+        response_lines = [f"**{club.get('name', 'N/A')}**"]
+        if club.get('description'):
+            response_lines.append(club['description'])
+        if club.get('contact_person') or club.get('contact_phone'):
+            response_lines.append(f"\n**Contact:** {club.get('contact_person') or 'Club Coordinator'}")
+            response_lines.extend(_contact_lines(club))
+        return "\n".join(response_lines)
+
+    response_lines = [f"Here are the {len(results)} student clubs at NIE:"]
+    for club in results:
+        description = club.get('description') or ""
+        if len(description) > 90:
+            description = description[:87].rstrip() + "..."
+        response_lines.append(f"\n• **{club.get('name', 'N/A')}**" + (f": {description}" if description else ""))
+    response_lines.append("\nAsk me about any club by name for its full details and contact.")
+    return "\n".join(response_lines)
+
+def format_dress_code(results, entities):
+    """Formats the dress code grouped by category, leading with rows that mention what was asked about."""
+    response_lines = []
+    asked_about = (entities.get('category') or "").strip()
+    if asked_about:
+        matches = [row for row in results if asked_about.lower() in (row.get('items') or "").lower()]
+        if matches:
+            response_lines.append(f"Here's what the dress code says about **{asked_about}**:")
+            for row in matches:
+                response_lines.append(f"• **{row.get('category')} - {row.get('type')}:** {row.get('items')}")
+            response_lines.append("\nThe full dress code:")
+
+    if not response_lines:
+        response_lines.append("**NIE Dress Code**")
+    by_category = {}
+    for row in results:
+        by_category.setdefault(row.get('category') or 'General', []).append(row)
+    for category, rows in by_category.items():
+        response_lines.append(f"\n**{category}**")
+        for row in rows:
+            response_lines.append(f"• *{row.get('type')}:* {row.get('items')}")
+    return "\n".join(response_lines)
+
+def _format_office_contact(results, title, person_key, link_key=None, link_label=None):
+    """Shared layout for the single-row contact tables (admissions, fees, placements)."""
+    response_lines = [title]
+    for row in results:
+        response_lines.append(f"\n**Contact:** {row.get(person_key) or 'N/A'}")
+        response_lines.extend(_contact_lines(row))
+        if link_key and row.get(link_key):
+            response_lines.append(f"**{link_label}:** {row[link_key]}")
+        if row.get('description'):
+            response_lines.append(row['description'])
+    return "\n".join(response_lines)
+
+def format_admissions_info(results, entities):
+    return _format_office_contact(results, "For admissions, you can reach the **Admissions Office**:", 'contact_person', 'website_link', "Website")
+
+def format_fees_info(results, entities):
+    return _format_office_contact(results, "For fee payments and queries, contact the **Accounts Section**:", 'contact_person', 'payment_link', "Pay online")
+
+def format_placements_info(results, entities):
+    return _format_office_contact(results, "Here are the contact details for the **Placement Office**:", 'officer_name')
+
+def format_anti_ragging_info(results, entities):
+    """Formats the anti-ragging squad as a contact list."""
+    response_lines = ["**Anti-Ragging Squad**", "If you face or witness ragging, contact any of these members:"]
+    for member in results:
+        details = ", ".join(part for part in (member.get('role'), member.get('department')) if part)
+        line = f"\n• **{member.get('name', 'N/A')}**" + (f" ({details})" if details else "")
+        if member.get('contact_phone'):
+            line += f"\n   Phone: {member['contact_phone']}"
+        response_lines.append(line)
+    return "\n".join(response_lines)
+
+def format_hostel_info(results, entities):
+    """Formats hostel rows: campus, gender, facilities and warden contact."""
+    response_lines = ["Here are the hostel details:"]
+    for hostel in results:
+        response_lines.append(f"\n**{hostel.get('name', 'N/A')}** ({hostel.get('campus', 'N/A')} Campus, {hostel.get('gender', 'N/A')})")
+        if hostel.get('facilities'):
+            response_lines.append(f"**Facilities:** {hostel['facilities']}")
+        if hostel.get('warden_name'):
+            response_lines.append(f"**Warden:** {hostel['warden_name']}")
+        response_lines.extend(_contact_lines(hostel))
+    return "\n".join(response_lines)
+
+def format_transport_info(results, entities):
+    """Formats bus routes and the transport contact."""
+    response_lines = ["Here is the college transport information:"]
+    for route in results:
+        response_lines.append(f"\n**{route.get('route_name', 'N/A')}**")
+        if route.get('description'):
+            response_lines.append(route['description'])
+        if route.get('contact_person') or route.get('contact_phone'):
+            contact = route.get('contact_person') or 'Transport Officer'
+            phone = f" ({route['contact_phone']})" if route.get('contact_phone') else ""
+            response_lines.append(f"**Contact:** {contact}{phone}")
+    return "\n".join(response_lines)
+
+def format_scholarship_info(results, entities):
+    """Formats scholarship section location and email."""
+    response_lines = ["For scholarships, you can contact:"]
+    for row in results:
+        response_lines.append(f"\n**{row.get('name', 'Scholarship Section')}**")
+        if row.get('location'):
+            response_lines.append(f"**Location:** {row['location']}")
+        response_lines.extend(_contact_lines(row))
+    return "\n".join(response_lines)
+
+def format_event_info(results, entities):
+    """Formats events, newest first (the query already orders them)."""
+    response_lines = ["Here are the college events:"]
+    for event in results:
+        date = f" - {event['event_date']}" if event.get('event_date') else ""
+        response_lines.append(f"\n**{event.get('title', 'N/A')}**{date}")
+        if event.get('description'):
+            response_lines.append(event['description'])
+    return "\n".join(response_lines)
+
+def format_notice_info(results, entities):
+    """Formats the latest notices."""
+    response_lines = ["Here are the latest notices:"]
+    for notice in results:
+        date = f"*{notice['posted_on']}*: " if notice.get('posted_on') else ""
+        response_lines.append(f"\n• {date}{notice.get('notice_text', '')}")
+    return "\n".join(response_lines)
+
+def format_generic_rows(results, entities):
+    """Fallback for intents without a dedicated formatter: one block of 'Field: value' lines per row."""
+    response_lines = ["Here's what I found:"]
+    for row in results:
+        response_lines.append("")
+        for key, value in row.items():
+            if value is None or key == 'id':
+                continue
+            response_lines.append(f"**{key.replace('_', ' ').title()}:** {value}")
+    return "\n".join(response_lines)
+
+def format_no_results():
+    """Local stand-in for the Gemini suggestion prompt when a recognized intent finds no rows."""
+    if gemini_client.SUGGESTION_FORM_URL:
+        return (
+            "I'm sorry, I couldn't find that information in my database right now.\n\n"
+            "We are always looking to improve our knowledge base! You can suggest this missing information "
+            f"by filling out our brief suggestion form here: {gemini_client.SUGGESTION_FORM_URL}"
+        )
+    return (
+        "I'm sorry, I couldn't find that information in my database right now.\n\n"
+        "Would you like to suggest that this data be added to our knowledge base? "
+        "That helps us improve for future students!"
+    )
+
+# Intent -> formatter(db_results, entities), used when db_results is not empty
+RESPONSE_FORMATTERS = {
+    "get_club_info": format_club_info,
+    "get_dress_code": format_dress_code,
+    "get_admissions_info": format_admissions_info,
+    "get_fees_info": format_fees_info,
+    "get_placements_info": format_placements_info,
+    "get_anti_ragging_info": format_anti_ragging_info,
+    "get_hostel_info": format_hostel_info,
+    "get_transport_info": format_transport_info,
+    "get_scholarship_info": format_scholarship_info,
+    "get_event_info": format_event_info,
+    "get_notice_info": format_notice_info,
+}
+
+# The intent prompt names two intents differently from the handlers below
+INTENT_ALIASES = {
+    "get_events_info": "get_event_info",
+    "get_notices": "get_notice_info",
+}
+
 # --- END NEW Formatters ---
 
 
@@ -1054,7 +1355,20 @@ def format_faculty_campus_availability(results, faculty_name):
 async def process_message(user_query, user_id):
     """
     Processes the user's message using the new Dialogue Manager.
+    Loads the user's conversation from conversation_memory and saves it back afterwards.
     """
+    with tracing.trace('message') as active_trace, request_scope.scope():
+        manager = await conversation_memory.get_async(user_id) or DialogueManager(user_id)
+        try:
+            bot_response_dict = await _process_with_manager(user_query, user_id, manager)
+        finally:
+            await conversation_memory.save_async(manager)
+        # For per-intent request metrics (see handle_chat_message)
+        bot_response_dict.setdefault('intent', active_trace.tags.get('intent', 'none') if active_trace else 'none')
+        return bot_response_dict
+
+
+async def _process_with_manager(user_query, user_id, manager):
     logging.info(f"Processing message from {user_id}: '{user_query}'")
     intent = None
     entities = {}
@@ -1065,13 +1379,9 @@ async def process_message(user_query, user_id):
     }
     bot_response_text = None
 
-    # --- NEW: Get the user's DialogueManager from memory ---
-    if user_id not in conversation_memory:
-        conversation_memory[user_id] = DialogueManager(user_id)
-    manager = conversation_memory[user_id]
-
     try:
         # --- Pre-Filter (This is a good cost-saving measure to keep) ---
+        tracing.stage('pre_filter')
         query_lower = user_query.lower().strip()
         simple_greetings = [
             'hi', 'hello', 'hey', 'heyy', 'hii', 'helo', 'hie', 'yo', 
@@ -1101,9 +1411,21 @@ async def process_message(user_query, user_id):
         # --- END PRE-FILTER ---
         
         
-        # --- Step 1: Get Intent and Entities from Gemini ---
-        logging.info("Calling get_query_intent...")
-        intent_data = await gemini_client.get_query_intent(user_query)
+        # --- Step 1: Get Intent and Entities (pending reply, local router, then Gemini) ---
+        tracing.stage('intent')
+        intent_data = resolve_dialogue_reply(manager, user_query)
+        if intent_data:
+            logging.info(f"Resolved reply locally for '{manager.pending_action or manager.current_intent}': {intent_data['entities']}. Skipping Gemini.")
+        else:
+            intent_data = intent_router.route(user_query)
+        if intent_data:
+            if intent_data['source'] != 'dialogue':
+                logging.info(f"Local router matched '{intent_data['intent']}' ({intent_data['source']}, confidence {intent_data['confidence']}). Skipping Gemini.")
+        else:
+            logging.info("Calling get_query_intent...")
+            intent_data = await gemini_client.get_query_intent(user_query)
+            intent_router.record_label(user_query, intent_data)
+        tracing.tag(intent_source=(intent_data or {}).get('source', 'gemini'))
 
         if not intent_data:
             logging.error("Failed to get intent from Gemini.")
@@ -1111,11 +1433,13 @@ async def process_message(user_query, user_id):
             return bot_response_dict
 
         intent = intent_data.get('intent', 'unknown')
+        intent = INTENT_ALIASES.get(intent, intent)
         entities = intent_data.get('entities', {})
         
         # --- NEW: Step 1.1 - Normalize Entities (Handles 'today'/'tomorrow') ---
         entities = _normalize_entities(entities)
         logging.info(f"Got Intent: {intent}, Normalized Entities: {entities}")
+        tracing.tag(intent=intent)
         # --- END NEW ---
         # --- BUG 1 FIX: Intent Override ---
         # If Gemini classifies "is [faculty] available" as a location query,
@@ -1127,6 +1451,7 @@ async def process_message(user_query, user_id):
         # --- END BUG 1 FIX ---
 
         # --- Step 1.5: Handle Special Actions (like Faculty Spell-Check) ---
+        tracing.stage('dialogue')
         # This runs *before* the dialogue manager
         
         if manager.pending_action == 'confirm_faculty_name':
@@ -1196,7 +1521,8 @@ async def process_message(user_query, user_id):
         # --- NEW: Handler for clarifying HOD department ---
         elif manager.pending_action == 'clarify_hod_department':
             context = manager.action_context
-            branch_from_user = user_query.strip().upper()
+            # Parsed by resolve_dialogue_reply when the reply names a known department
+            branch_from_user = entities.get('branch') or user_query.strip().upper()
             
             # Check for common branch synonyms
             if branch_from_user == 'CS': branch_from_user = 'CSE'
@@ -1225,7 +1551,8 @@ async def process_message(user_query, user_id):
             if entities.get('faculty_name'):
                 logging.info("Using 'clarify_faculty_name' memory.")
                 intent = manager.action_context['intent'] # Restore original intent
-                # The new 'entities' (with the user's typed name) will be used
+                # Keep the original day/time, with the user's pick (or typed name) on top
+                entities = {**manager.action_context['entities'], **entities}
                 manager.reset()
             else:
                 manager.reset() # Unrelated query
@@ -1296,6 +1623,7 @@ async def process_message(user_query, user_id):
  
         
         # --- Step 1.8: Faculty HOD Resolution & Spellcheck ---
+        tracing.stage('spellcheck')
         faculty_intents_requiring_check = [
             'get_faculty_info', 'get_faculty_location', 'get_faculty_availability', 
             'get_faculty_courses', 'get_faculty_schedule', 'get_faculty_location_on_day',
@@ -1316,7 +1644,7 @@ async def process_message(user_query, user_id):
                 if branch:
                     # User said "CSE HOD", find the name
                     logging.info(f"HOD detected with branch: {branch}. Looking up name.")
-                    hod_name = database.get_hod_name_by_branch(branch)
+                    hod_name = await async_database.get_hod_name_by_branch(branch)
                     
                     if hod_name:
                         logging.info(f"Found HOD name: {hod_name}. Proceeding.")
@@ -1337,7 +1665,7 @@ async def process_message(user_query, user_id):
 
             # --- REGULAR SPELLCHECK (Runs after HOD is resolved) ---
             logging.info(f"Performing faculty spellcheck for: '{faculty_name_from_user}'")
-            check_results = database.get_faculty_location(faculty_name_from_user)
+            check_results = await async_database.get_faculty_location(faculty_name_from_user)
             
             if not check_results:
                 logging.warning("Faculty check: No results found.")
@@ -1351,7 +1679,11 @@ async def process_message(user_query, user_id):
             if len(check_results) > 1:
                 logging.info(f"Faculty check: Ambiguous results found ({len(check_results)} matches).")
                 manager.pending_action = 'clarify_faculty_name'
-                manager.action_context = {'intent': intent, 'entities': entities} # Save original entities
+                manager.action_context = {
+                    'intent': intent,
+                    'entities': entities, # Save original entities
+                    'candidates': [faculty.get('name') for faculty in check_results], # For "2" / "the second one"
+                }
                 
                 response_lines = [f"I found {len(check_results)} potential matches for '{faculty_name_from_user}':"]
                 for i, faculty in enumerate(check_results):
@@ -1363,7 +1695,7 @@ async def process_message(user_query, user_id):
                 return bot_response_dict
                 
             if match_type == 'fuzzy':
-                logging.info(f"Faculty check: Prompting for confirmation. User='{faculty_name_from_user}', DB='{suggested_name}'")
+                logging.info(f"Faculty check: Prompting for confirmation. User='{faculty_name_from_user}', DB='{suggested_name}', Score={closest_match.get('score')}")
                 manager.pending_action = 'confirm_faculty_name'
                 manager.action_context = {
                     'intent': intent,
@@ -1376,6 +1708,9 @@ async def process_message(user_query, user_id):
             logging.info(f"Faculty check: Name '{suggested_name}' (Exact Match) confirmed. Proceeding.")
             entities['faculty_name'] = suggested_name
             entities['faculty_name_confirmed'] = True
+            # A single exact match is also what the confirmed name looks up to, so the
+            # handlers' get_faculty_location(suggested_name) reuses these rows
+            request_scope.remember('get_faculty_location', (suggested_name,), {}, check_results)
             
         # --- End Faculty HOD Resolution & Spellcheck ---
 
@@ -1398,6 +1733,7 @@ async def process_message(user_query, user_id):
 
 
         # --- Step 3: Fetch Data from Database based on Intent ---
+        tracing.stage('data')
         db_results = []
         
         # Reset memory for any simple, non-form intent
@@ -1419,14 +1755,14 @@ async def process_message(user_query, user_id):
             return bot_response_dict
         
         elif intent == "get_placement_summary":
-            db_results = database.get_placement_summary_data()
+            db_results = await async_database.get_placement_summary_data()
             
         elif intent == "get_company_stats":
             company_name = entities.get('company_name')
             if not company_name:
                  bot_response_text = "Which company's stats are you looking for?"
             else:
-                 db_results = database.get_company_stats_data(company_name)
+                 db_results = await async_database.get_company_stats_data(company_name)
 
         elif intent == "get_placement_start_info":
             bot_response_dict['text'] = PLACEMENT_START_INFO
@@ -1480,7 +1816,7 @@ async def process_message(user_query, user_id):
                 bot_response_dict['text'] = "I'm sorry, I missed who or which day. Please ask again."
                 return bot_response_dict
             
-            db_results = database.get_faculty_class_schedule(faculty_name, day)
+            db_results = await async_database.get_faculty_class_schedule(faculty_name, day)
             bot_response_text = format_faculty_class_schedule(db_results, faculty_name, day)
             bot_response_dict['text'] = bot_response_text
             
@@ -1493,10 +1829,14 @@ async def process_message(user_query, user_id):
                  bot_response_dict['text'] = "I'm sorry, I missed who or which day. Please ask again."
                  return bot_response_dict
                  
-            # Note: This DB call gets *busy* slots for the calculation
-            db_results = database.get_faculty_busy_slots(faculty_name, day)
+            # Precomputed free/busy bitmap from the timetable engine; without it,
+            # get the *busy* slots for calculate_free_slots
+            availability = await async_database.get_faculty_availability(faculty_name, day)
+            db_results = None
+            if availability is None:
+                db_results = await async_database.get_faculty_busy_slots(faculty_name, day)
             # We pass faculty_name from entities, as it might be a new follow-up
-            bot_response_text = format_faculty_availability(db_results, entities, day, entities.get('faculty_name'))
+            bot_response_text = format_faculty_availability(db_results, entities, day, entities.get('faculty_name'), availability)
             bot_response_dict['text'] = bot_response_text
             # We will let the manager reset (or not) at the end
             
@@ -1508,19 +1848,26 @@ async def process_message(user_query, user_id):
                 bot_response_dict['text'] = "I'm sorry, I missed who or which day. Please ask again."
                 return bot_response_dict
             
-            # Step 1: Check if they are on campus at all
-            active_days_results = database.get_faculty_active_days(faculty_name)
+            # Are they on campus at all, and their STATIC location (as requested by user).
+            # The two lookups are independent, so they run concurrently.
+            active_days_results, static_location_results = await async_database.gather(
+                async_database.get_faculty_active_days(faculty_name),
+                async_database.get_faculty_location(faculty_name),
+            )
+            if active_days_results is None:
+                bot_response_dict['text'] = "I'm sorry, I couldn't check their schedule right now. Please try again in a moment."
+                return bot_response_dict
             is_on_campus = any(row['day_of_week'].lower() == day.lower() for row in active_days_results)
             
             if is_on_campus:
-                # Step 2: Get their STATIC location (as requested by user)
-                static_location_results = database.get_faculty_location(faculty_name)
-                
                 if static_location_results:
                     # Use the formatter for static location
                     bot_response_text = format_faculty_location(static_location_results)
                     # Add a note
                     bot_response_text += f"\n\nThey have classes on campus on {day.capitalize()}, so you can likely find them in or around their office."
+                elif static_location_results is None:
+                    # The office lookup failed or timed out; the schedule answer still stands
+                    bot_response_text = f"**{faculty_name}** is on campus on {day.capitalize()}, but I couldn't look up their office location just now."
                 else:
                     # On campus, but no static office info
                     bot_response_text = f"**{faculty_name}** is on campus on {day.capitalize()}, but I'm sorry, their static office location is not in my records."
@@ -1537,7 +1884,7 @@ async def process_message(user_query, user_id):
                 bot_response_dict['text'] = "I'm sorry, I missed which faculty member. Please ask again."
                 return bot_response_dict
                 
-            db_results = database.get_faculty_active_days(faculty_name)
+            db_results = await async_database.get_faculty_active_days(faculty_name)
             
             # Check if user asked for a *specific* day
             day = entities.get('day')
@@ -1574,7 +1921,7 @@ async def process_message(user_query, user_id):
             if not ctc_type:
                  bot_response_text = "Which CTC type are you asking about (e.g., Dream, Core)?"
             else:
-                 db_results = database.get_placement_count_by_type_data(ctc_type)
+                 db_results = await async_database.get_placement_count_by_type_data(ctc_type)
             
         elif intent == "get_placement_count_by_ctc":
             operator = entities.get('ctc_operator')
@@ -1582,7 +1929,7 @@ async def process_message(user_query, user_id):
             if not operator or not amount:
                  bot_response_text = "I'm not sure which CTC range you're asking about."
             else:
-                db_results = database.get_placement_count_by_ctc_data(operator, amount)
+                db_results = await async_database.get_placement_count_by_ctc_data(operator, amount)
             
         elif intent == "get_placement_companies_by_ctc":
             operator = entities.get('ctc_operator')
@@ -1590,14 +1937,14 @@ async def process_message(user_query, user_id):
             if not operator or not amount:
                 bot_response_text = "I'm not sure which CTC range you're asking about."
             else:
-                db_results = database.get_placement_companies_by_ctc_data(operator, amount)
+                db_results = await async_database.get_placement_companies_by_ctc_data(operator, amount)
             
         elif intent == "get_faculty_courses":
             faculty_name = entities.get('faculty_name')
             if not faculty_name:
                  bot_response_text = "Which faculty's courses are you looking for?"
             else:
-                db_results = database.get_courses_for_faculty(faculty_name)
+                db_results = await async_database.get_courses_for_faculty(faculty_name)
             
         elif intent == "get_student_portal_info":
             portal_data = database.get_student_portal_data()
@@ -1611,7 +1958,7 @@ async def process_message(user_query, user_id):
             if not search_term:
                  bot_response_text = "Whose office location are you looking for?"
             else:
-                db_results = database.get_faculty_location(search_term)
+                db_results = await async_database.get_faculty_location(search_term)
             
         elif intent == "get_course_instructors":
             course_name = entities.get('course_name')
@@ -1622,7 +1969,7 @@ async def process_message(user_query, user_id):
             if not course_name and not course_code:
                  bot_response_text = "Which course are you asking about?"
             else:
-                db_results = database.get_course_instructors(course_name, course_code, branch, section)
+                db_results = await async_database.get_course_instructors(course_name, course_code, branch, section)
 
         elif intent == "get_faculty_info":
              name = entities.get('faculty_name')
@@ -1631,7 +1978,7 @@ async def process_message(user_query, user_id):
              if not name and not dept:
                   bot_response_text = "Which faculty member are you asking about?"
              else:
-                db_results = database.get_faculty_info(name, dept, info)
+                db_results = await async_database.get_faculty_info(name, dept, info)
              
         elif intent == "get_timetable":
              branch = entities.get('branch')
@@ -1646,39 +1993,40 @@ async def process_message(user_query, user_id):
                  bot_response_text = "I'm sorry, I missed what you wanted the timetable for."
              else:
                  # --- MODIFIED: Pass all entities to the formatter ---
-                 db_results = database.get_timetable(branch, section, year, day, faculty_name, course_name, course_code)
+                 db_results = await async_database.get_timetable(branch, section, year, day, faculty_name, course_name, course_code)
         
         # --- Other intents ---
         elif intent == "get_club_info":
-             db_results = database.get_club_info(entities.get('club_name'))
+             db_results = await async_database.get_club_info(entities.get('club_name'))
         elif intent == "get_dress_code":
      # ALWAYS fetch the entire dress code.
      # The final_response AI is smart enough to find the answer.
-            db_results = database.get_dress_code(None)
+            db_results = await async_database.get_dress_code(None)
         elif intent == "get_admissions_info":
-             db_results = database.get_admissions_info()
+             db_results = await async_database.get_admissions_info()
         elif intent == "get_placements_info":
-             db_results = database.get_placements_info()
+             db_results = await async_database.get_placements_info()
         elif intent == "get_fees_info":
-             db_results = database.get_fees_info()
+             db_results = await async_database.get_fees_info()
         elif intent == "get_anti_ragging_info":
-             db_results = database.get_anti_ragging_info()
+             db_results = await async_database.get_anti_ragging_info()
         elif intent == "get_hostel_info":
-             db_results = database.get_hostel_info(entities.get('hostel_name'), entities.get('gender'), entities.get('campus'))
+             db_results = await async_database.get_hostel_info(entities.get('hostel_name'), entities.get('gender'), entities.get('campus'))
         elif intent == "get_transport_info":
-             db_results = database.get_transport_info(entities.get('route_name'))
+             db_results = await async_database.get_transport_info(entities.get('route_name'))
         elif intent == "get_event_info":
-             db_results = database.get_event_info(entities.get('event_title'))
+             db_results = await async_database.get_event_info(entities.get('event_title'))
         elif intent == "get_notice_info":
-             db_results = database.get_notice_info()
+             db_results = await async_database.get_notice_info()
         elif intent == "get_scholarship_info":
-             db_results = database.get_scholarship_info(
+             db_results = await async_database.get_scholarship_info(
                  entities.get('scholarship_name'), 
                  entities.get('branch'), 
                  entities.get('year')
              )
 
         # --- Step 4: Generate Final Response ---
+        tracing.stage('response')
         
         # If bot_response_text was set above, use it
         if bot_response_text:
@@ -1733,13 +2081,17 @@ async def process_message(user_query, user_id):
             logging.info("Formatting faculty COURSES response.")
             bot_response_text = format_faculty_courses(db_results, entities.get('faculty_name'))
              
+        elif db_results and intent in RESPONSE_FORMATTERS:
+            logging.info(f"Formatting '{intent}' response locally.")
+            bot_response_text = RESPONSE_FORMATTERS[intent](db_results, entities)
+
         elif db_results:
-            logging.info(f"Generating final response via Gemini with DB results: {db_results[:1]}...") 
-            bot_response_text = await gemini_client.generate_final_response(user_query, db_results)
+            logging.info(f"No dedicated formatter for '{intent}'. Using the generic row formatter.")
+            bot_response_text = format_generic_rows(db_results, entities)
         
         else: # No db_results and no formatter text
-            logging.info("Intent recognized, but no DB results found. Generating suggestion response.")
-            bot_response_text = await gemini_client.generate_suggestion_response(user_query)
+            logging.info("Intent recognized, but no DB results found. Sending the suggestion response.")
+            bot_response_text = format_no_results()
             
         # --- Paranoid Check (Unchanged) ---
         if bot_response_text is None or bot_response_text.strip() == "":
@@ -1763,27 +2115,44 @@ async def process_message(user_query, user_id):
     return bot_response_dict
 
 
-# --- Flask Routes ---
-# (Routes are all unchanged)
-@app.route('/')
-def index():
-    """Serves the simple HTML test page."""
-    try:
-        return render_template('index.html')
-    except Exception as e:
-        logging.exception("Error rendering index.html")
-        return f"Error loading page: {e}", 500
+# --- Startup / Shutdown (shared by `python app.py` and asgi.py) ---
+def startup():
+    """Configures Gemini and opens the HTTP and database pools. Call once per process."""
+    gemini_client.configure_gemini()
+    gemini_client.start_http_client()
+    gemini_client.load_intent_cache()
+    database.connect()
+    logging.info("Database connection initialized successfully.")
+    if query_audit.QUERY_AUDIT_ON_STARTUP:
+        query_audit.log_findings(query_audit.run_audit())
+    if twilio_replies.TWILIO_ASYNC_REPLIES:
+        if twilio_replies.is_configured():
+            twilio_reply_pool.start()
+        else:
+            logging.warning("TWILIO_ASYNC_REPLIES is on but TWILIO_ACCOUNT_SID/TWILIO_AUTH_TOKEN are not set. Replying inline.")
 
 
-@app.route('/chat', methods=['POST'])
-async def chat():
-    """Handles chat messages from the web interface."""
-    user_message = request.json.get('message')
+def shutdown():
+    """Sends queued replies, persists the intent cache and closes the pools and stores opened at startup."""
+    twilio_reply_pool.stop()
+    gemini_client.save_intent_cache()
+    gemini_client.close_http_client()
+    conversation_memory.close()
+    database.disconnect()
+
+
+# --- Route Handlers (shared by the Flask routes below and asgi.py) ---
+def _record_request(route, intent, started):
+    metrics.REQUESTS.inc(route, intent or 'none')
+    metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, route, intent or 'none')
+
+
+async def handle_chat_message(user_message, user_id="web_user"):
+    """Runs a web chat message through process_message. Returns (json_payload, status)."""
     if not user_message:
-        return jsonify({"error": "No message provided"}), 400
+        return {"error": "No message provided"}, 400
 
-    user_id = "web_user"
-    
+    started = time.perf_counter()
     bot_response_dict = await process_message(user_message, user_id)
     bot_response_text = bot_response_dict.get('text') 
 
@@ -1791,53 +2160,132 @@ async def chat():
         logging.error(f"CRITICAL: Empty response generated by process_message for web query '{user_message}'")
         bot_response_text = "I'm sorry, I couldn't generate a response. Please try again."
 
-    return jsonify({"response": bot_response_text})
+    _record_request('chat', bot_response_dict.get('intent'), started)
+    return {"response": bot_response_text}, 200
 
 
-@app.route('/twilio', methods=['POST'])
-async def twilio_webhook():
-    """Handles incoming WhatsApp messages via Twilio."""
-    incoming_msg = request.values.get('Body', '').strip()
-    from_number = request.values.get('From', '') 
+async def _build_twilio_reply(incoming_msg, from_number):
+    """Runs a WhatsApp message through process_message. Returns (text, media_url, intent)."""
+    try:
+        bot_response_dict = await process_message(incoming_msg, from_number)
+        bot_response_text = bot_response_dict.get('text')
+        bot_response_media = bot_response_dict.get('media_url')
+
+        if bot_response_text is None or bot_response_text.strip() == "":
+             logging.error(f"CRITICAL: Empty response generated by process_message for Twilio query '{incoming_msg}' from {from_number}")
+             bot_response_text = "I'm sorry, I couldn't generate a response. Please try again."
+        return bot_response_text, bot_response_media, bot_response_dict.get('intent')
+
+    except Exception as e:
+        logging.exception(f"Error in /twilio webhook: {e}") 
+        return f"I'm sorry, a critical error occurred while processing your request: {e}", None, 'error'
+
+
+async def deliver_twilio_reply(job):
+    """Reply worker job (see twilio_replies.py): answers one message through the REST API."""
+    incoming_msg, from_number, bot_number = job
+    started = time.perf_counter()
+    bot_response_text, bot_response_media, intent = await _build_twilio_reply(incoming_msg, from_number)
+    sent = await twilio_replies.send_message(from_number, bot_number, bot_response_text, bot_response_media)
+    if not sent:
+        logging.error(f"Could not deliver reply to {from_number}.")
+    _record_request('twilio_reply', intent if sent else 'undelivered', started)
 
+
+twilio_reply_pool = twilio_replies.ReplyWorkerPool(deliver_twilio_reply)
+
+
+async def handle_twilio_message(incoming_msg, from_number, to_number=None):
+    """
+    Handles one WhatsApp message and returns the TwiML for the webhook response.
+    With TWILIO_ASYNC_REPLIES on, that TwiML is empty and the answer follows via the REST API.
+    """
     logging.info(f"Twilio Message From: {from_number}, Body: {incoming_msg}")
 
     resp = MessagingResponse()
-    msg = resp.message()
+    started = time.perf_counter()
 
     if not incoming_msg:
-        msg.body("Please send a message.")
+        resp.message().body("Please send a message.")
+        _record_request('twilio', 'empty', started)
         return str(resp)
 
-    try:
-        bot_response_dict = await process_message(incoming_msg, from_number)
-        bot_response_text = bot_response_dict.get('text')
-        bot_response_media = bot_response_dict.get('media_url')
+    bot_number = twilio_replies.TWILIO_WHATSAPP_NUMBER or to_number
+    if twilio_replies.TWILIO_ASYNC_REPLIES and bot_number:
+        if await twilio_reply_pool.submit(from_number, (incoming_msg, from_number, bot_number)):
+            _record_request('twilio', 'queued', started)
+            return str(resp) # Acknowledge now; a reply worker sends the answer
+        logging.warning("Twilio reply pool unavailable or full. Answering inline.")
 
-        if bot_response_text is None or bot_response_text.strip() == "":
-             logging.error(f"CRITICAL: Empty response generated by process_message for Twilio query '{incoming_msg}' from {from_number}")
-             bot_response_text = "I'm sorry, I couldn't generate a response. Please try again."
+    bot_response_text, bot_response_media, intent = await _build_twilio_reply(incoming_msg, from_number)
+    _record_request('twilio', intent, started)
+    msg = resp.message()
+    msg.body(bot_response_text)
+
+    if bot_response_media:
+        logging.info(f"Attaching media to response: {bot_response_media}")
+        msg.media(bot_response_media)
+
+    return str(resp)
 
-        msg.body(bot_response_text)
 
-        if bot_response_media:
-            logging.info(f"Attaching media to response: {bot_response_media}")
-            msg.media(bot_response_media)
+# --- Metrics read at scrape time (see metrics.py) ---
+def _cache_gauge(stats_by_name, key):
+    return {(name,): stats[key] for name, stats in stats_by_name().items()}
 
+def _cache_stats():
+    stats = {'intent': gemini_client.get_intent_cache_stats()}
+    stats.update({f"reference.{table}": table_stats for table, table_stats in database.get_reference_cache_stats().items()})
+    return stats
+
+metrics.register_gauge("chatbot_conversations", "Users with an open conversation", lambda: len(conversation_memory))
+metrics.register_gauge("chatbot_cache_entries", "Entries per cache", lambda: _cache_gauge(_cache_stats, 'size'), ("cache",))
+metrics.register_gauge("chatbot_cache_hit_ratio", "Hit ratio per cache since start", lambda: _cache_gauge(_cache_stats, 'hit_ratio'), ("cache",))
+metrics.register_gauge(
+    "chatbot_twilio_reply_jobs", "Async Twilio reply jobs by outcome",
+    lambda: {(outcome,): value for outcome, value in twilio_reply_pool.stats.items()}, ("outcome",),
+)
+
+
+# --- Flask Routes ---
+@app.route('/')
+def index():
+    """Serves the simple HTML test page."""
+    try:
+        return render_template('index.html')
     except Exception as e:
-        logging.exception(f"Error in /twilio webhook: {e}") 
-        msg.body(f"I'm sorry, a critical error occurred while processing your request: {e}")
+        logging.exception("Error rendering index.html")
+        return f"Error loading page: {e}", 500
 
-    return str(resp)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Handles chat messages from the web interface."""
+    payload, status = await handle_chat_message(request.json.get('message'))
+    return jsonify(payload), status
+
+
+@app.route('/twilio', methods=['POST'])
+async def twilio_webhook():
+    """Handles incoming WhatsApp messages via Twilio."""
+    incoming_msg = request.values.get('Body', '').strip()
+    from_number = request.values.get('From', '') 
+    to_number = request.values.get('To', '')
+    return await handle_twilio_message(incoming_msg, from_number, to_number)
 
 # --- Main Execution ---
-# (This part is unchanged)
+# Development server: Flask[async] runs every request on a throwaway event loop.
+# For production use the ASGI entry point instead (see asgi.py).
 if __name__ == '__main__':
     logging.info("Starting Flask application...")
     try:
-        gemini_client.configure_gemini()
-        database.connect()
-        logging.info("Database connection initialized successfully.")
+        startup()
 
         print("==================================================")
         print(f"🚀 Flask App is running on http://127.0.0.1:5000")
@@ -1858,4 +2306,5 @@ if __name__ == '__main__':
     except Exception as startup_error:
         logging.critical(f"CRITICAL STARTUP ERROR: {startup_error}", exc_info=True)
     finally:
+        shutdown()
         logging.info("Flask application stopped.")
\ No newline at end of file
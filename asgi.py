@@ -0,0 +1,153 @@
+"""
+ASGI entry point: serves the bot from one long-lived event loop.
+
+`python app.py` runs Flask[async] on Werkzeug, where every /chat and /twilio
+request gets a throwaway event loop on a worker thread, so nothing bound to a
+loop survives between requests. Here uvicorn owns a single loop for the whole
+process (uvloop when it is installed):
+
+- /chat, /twilio and /metrics are served natively on that loop through the same
+  handlers the Flask routes use (app.handle_chat_message / handle_twilio_message).
+- Startup and shutdown run once per process through the ASGI lifespan protocol
+  (app.startup / app.shutdown: Gemini config, HTTP pool, intent cache, MySQL pool).
+- Everything else (the test page, static files) is passed through to the Flask
+  app via asgiref's WsgiToAsgi.
+
+Conversation state lives in process memory, so run a single worker per bot:
+    python asgi.py
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+    gunicorn -k uvicorn.workers.UvicornWorker -w 1 asgi:application
+"""
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+import app as chatbot
+import metrics
+
+ASGI_HOST = os.getenv("ASGI_HOST", "127.0.0.1")
+ASGI_PORT = int(os.getenv("ASGI_PORT", "5000"))
+ASGI_LOOP = os.getenv("ASGI_LOOP", "auto") # uvicorn's "auto" picks uvloop when it is installed
+MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY_BYTES", str(64 * 1024)))
+
+flask_fallback = WsgiToAsgi(chatbot.app)
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise BodyTooLarge()
+        if not message.get('more_body'):
+            break
+    return bytes(body)
+
+
+async def _respond(send, status, body, content_type):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type),
+            (b'content-length', str(len(body)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _respond_json(send, status, payload):
+    await _respond(send, status, json.dumps(payload).encode('utf-8'), b'application/json')
+
+
+async def chat(scope, receive, send):
+    """POST /chat: {"message": "..."} -> {"response": "..."}"""
+    try:
+        data = json.loads(await _read_body(receive) or b'null')
+    except BodyTooLarge:
+        return await _respond_json(send, 413, {"error": "Message too large"})
+    except ValueError:
+        return await _respond_json(send, 400, {"error": "Invalid JSON"})
+
+    message = data.get('message') if isinstance(data, dict) else None
+    payload, status = await chatbot.handle_chat_message(message)
+    await _respond_json(send, status, payload)
+
+
+async def twilio_webhook(scope, receive, send):
+    """POST /twilio: Twilio's form-encoded webhook -> TwiML"""
+    try:
+        body = await _read_body(receive)
+    except BodyTooLarge:
+        return await _respond(send, 413, b'', b'text/plain')
+
+    # Same lookup order as Flask's request.values: query string, then form
+    values = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    for key, items in parse_qs(body.decode('utf-8', errors='replace')).items():
+        values.setdefault(key, items)
+    incoming_msg = values.get('Body', [''])[0].strip()
+    from_number = values.get('From', [''])[0]
+    to_number = values.get('To', [''])[0]
+
+    twiml = await chatbot.handle_twilio_message(incoming_msg, from_number, to_number)
+    await _respond(send, 200, twiml.encode('utf-8'), b'text/xml; charset=utf-8')
+
+
+async def metrics_endpoint(scope, receive, send):
+    """GET /metrics: Prometheus text format"""
+    await _respond(send, 200, metrics.render().encode('utf-8'), metrics.CONTENT_TYPE.encode())
+
+
+ROUTES = {
+    ('POST', '/chat'): chat,
+    ('POST', '/twilio'): twilio_webhook,
+    ('GET', '/metrics'): metrics_endpoint,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                # Blocking work (MySQL pool, index warm-up), done before the first request
+                await asyncio.to_thread(chatbot.startup)
+            except Exception as startup_error:
+                logging.critical(f"CRITICAL STARTUP ERROR: {startup_error}", exc_info=True)
+                await send({'type': 'lifespan.startup.failed', 'message': str(startup_error)})
+                return
+            logging.info("ASGI application started.")
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await asyncio.to_thread(chatbot.shutdown)
+            logging.info("ASGI application stopped.")
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http':
+        handler = ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            return await handler(scope, receive, send)
+    return await flask_fallback(scope, receive, send)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logging.info(f"Starting ASGI application on http://{ASGI_HOST}:{ASGI_PORT} (loop={ASGI_LOOP})...")
+    uvicorn.run(application, host=ASGI_HOST, port=ASGI_PORT, loop=ASGI_LOOP, lifespan="on")
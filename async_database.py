@@ -0,0 +1,136 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import time
+
+import database
+import metrics
+import request_scope
+
+logger = logging.getLogger(__name__)
+
+# --- Async Data-Access Layer ---
+# process_message() is async, but mysql-connector is a blocking driver. Calling
+# database.get_* directly from a coroutine freezes the event loop for the whole
+# round trip, so every other webhook waits behind one slow query.
+#
+# Each function here runs the matching database.get_* on database.db_executor,
+# a thread pool with one worker per executor connection in the MySQL pool (the
+# pool keeps DB_POOL_RESERVED more for background callers). Excess calls queue
+# inside the executor instead of exhausting the pool, and the loop keeps
+# serving other users meanwhile.
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """Runs a blocking database function on the bounded DB executor and awaits it."""
+    if database.db_executor is None:
+        raise Exception("Database executor is not initialized. Call database.connect() first.")
+    loop = asyncio.get_running_loop()
+    # run_in_executor doesn't carry contextvars over; copy them so the worker's
+    # execute_query spans land in the caller's trace (see tracing.py)
+    context = contextvars.copy_context()
+    submitted = time.perf_counter()
+
+    def run():
+        metrics.DB_EXECUTOR_WAIT_SECONDS.observe(time.perf_counter() - submitted)
+        return context.run(func, *args, **kwargs)
+
+    return await loop.run_in_executor(database.db_executor, run)
+
+
+# --- NEW: Concurrent fan-out of independent lookups ---
+# A timed-out call keeps its worker thread until the query finishes; only the
+# awaiting handler stops waiting for it.
+DB_CALL_TIMEOUT = float(os.getenv("DB_CALL_TIMEOUT", "5")) # Seconds per fanned-out call
+
+async def _guarded(awaitable, timeout):
+    name = getattr(awaitable, '__qualname__', 'db_call')
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{name} timed out after {timeout:.1f} s in a fan-out. Continuing without it.")
+        metrics.DB_FANOUT_FAILURES.inc(name, 'timeout')
+    except asyncio.CancelledError:
+        # Only a cancel aimed at this task (the handler going away) may end the
+        # whole fan-out; one leaking out of the call counts as a failed lookup
+        task = asyncio.current_task()
+        if task is None or getattr(task, 'cancelling', lambda: 1)():
+            raise
+        logger.warning(f"{name} was cancelled in a fan-out. Continuing without it.")
+        metrics.DB_FANOUT_FAILURES.inc(name, 'cancelled')
+    except Exception as e:
+        logger.error(f"{name} failed in a fan-out: {e}. Continuing without it.")
+        metrics.DB_FANOUT_FAILURES.inc(name, 'error')
+    return None
+
+async def gather(*awaitables, timeout=DB_CALL_TIMEOUT):
+    """
+    Awaits independent lookups concurrently and returns their results in order,
+    so the wait is the slowest call rather than the sum. Each call has its own
+    timeout. A call that times out or raises yields None, the same as a SQL
+    error from execute_query, and the other results are still returned.
+    """
+    return await asyncio.gather(*(_guarded(awaitable, timeout) for awaitable in awaitables))
+
+
+def _awaitable(func_name):
+    """Builds an awaitable wrapper around database.<func_name>."""
+    sync_func = getattr(database, func_name)
+
+    async def call(args, kwargs):
+        # Look the function up at call time so patched/reloaded versions are used
+        func = getattr(database, func_name)
+        # Reference-table lookups (see database.cached_reference) answer cache hits
+        # inline instead of queueing behind slow queries on the executor
+        peek = getattr(func, 'peek', None)
+        if peek is not None:
+            rows = peek(*args, **kwargs)
+            if rows is not database.MISSING:
+                return rows
+        return await run_in_db_thread(func, *args, **kwargs)
+
+    @functools.wraps(sync_func)
+    async def wrapper(*args, **kwargs):
+        # Timetable getters answered from the engine snapshot (see
+        # database.answered_from_snapshot) are in-memory lookups built fresh per
+        # call: answer them right here, without the memo or the executor queue
+        inline = getattr(getattr(database, func_name), 'inline', None)
+        if inline is not None:
+            result = inline(*args, **kwargs)
+            if result is not database.MISSING:
+                return result
+        # Identical calls within one message run once (see request_scope.py)
+        return await request_scope.memoized(func_name, args, kwargs, lambda: call(args, kwargs))
+
+    return wrapper
+
+
+# --- Awaitable versions of every SQL-backed database.get_* function ---
+get_faculty_info = _awaitable("get_faculty_info")
+get_faculty_location = _awaitable("get_faculty_location")
+get_timetable = _awaitable("get_timetable")
+get_course_instructors = _awaitable("get_course_instructors")
+get_club_info = _awaitable("get_club_info")
+get_dress_code = _awaitable("get_dress_code")
+get_admissions_info = _awaitable("get_admissions_info")
+get_placements_info = _awaitable("get_placements_info")
+get_fees_info = _awaitable("get_fees_info")
+get_anti_ragging_info = _awaitable("get_anti_ragging_info")
+get_hostel_info = _awaitable("get_hostel_info")
+get_transport_info = _awaitable("get_transport_info")
+get_scholarship_info = _awaitable("get_scholarship_info")
+get_event_info = _awaitable("get_event_info")
+get_notice_info = _awaitable("get_notice_info")
+get_placement_summary_data = _awaitable("get_placement_summary_data")
+get_company_stats_data = _awaitable("get_company_stats_data")
+get_placement_count_by_type_data = _awaitable("get_placement_count_by_type_data")
+get_placement_count_by_ctc_data = _awaitable("get_placement_count_by_ctc_data")
+get_placement_companies_by_ctc_data = _awaitable("get_placement_companies_by_ctc_data")
+get_faculty_busy_slots = _awaitable("get_faculty_busy_slots")
+get_faculty_availability = _awaitable("get_faculty_availability")
+get_courses_for_faculty = _awaitable("get_courses_for_faculty")
+get_faculty_class_schedule = _awaitable("get_faculty_class_schedule")
+get_faculty_active_days = _awaitable("get_faculty_active_days")
+get_hod_name_by_branch = _awaitable("get_hod_name_by_branch")
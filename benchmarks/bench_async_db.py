@@ -0,0 +1,102 @@
+"""
+Concurrent-webhook throughput: blocking database.get_* vs async_database.get_*.
+
+Simulates N users whose messages arrive at the same time. Each message awaits a
+fake Gemini call and then runs two database lookups. The MySQL pool is replaced
+by an in-process stand-in whose queries take --query-ms, so no server is needed.
+
+Usage (from the repo root):
+    python benchmarks/bench_async_db.py --users 50 --query-ms 20 --gemini-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import async_database
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _SlowCursor:
+    def __init__(self, query_seconds):
+        self.query_seconds = query_seconds
+
+    def execute(self, query, params):
+        time.sleep(self.query_seconds) # Network + server time of a real query
+
+    def fetchall(self):
+        return [{'day_of_week': 'Monday', 'start_time': None, 'end_time': None}]
+
+    def close(self):
+        pass
+
+
+class _SlowConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, dictionary=True):
+        return _SlowCursor(self.pool.query_seconds)
+
+    def close(self):
+        self.pool.slots.release()
+
+
+class FakePool:
+    """Behaves like MySQLConnectionPool: fails instead of waiting when exhausted."""
+    def __init__(self, size, query_seconds):
+        self.slots = threading.BoundedSemaphore(size)
+        self.query_seconds = query_seconds
+
+    def get_connection(self):
+        if not self.slots.acquire(blocking=False):
+            raise database.mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+        return _SlowConnection(self)
+
+
+async def handle_message_blocking(gemini_seconds):
+    await asyncio.sleep(gemini_seconds)
+    database.get_faculty_active_days("Dr. Anitha R")
+    database.get_faculty_busy_slots("Dr. Anitha R", "Monday")
+
+
+async def handle_message_async(gemini_seconds):
+    await asyncio.sleep(gemini_seconds)
+    await async_database.get_faculty_active_days("Dr. Anitha R")
+    await async_database.get_faculty_busy_slots("Dr. Anitha R", "Monday")
+
+
+async def run(handler, users, gemini_seconds):
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(gemini_seconds) for _ in range(users)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    parser.add_argument("--gemini-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    database.db_pool = FakePool(database.DB_POOL_SIZE, args.query_ms / 1000)
+    database.db_executor = ThreadPoolExecutor(max_workers=database.DB_POOL_SIZE, thread_name_prefix="db_worker")
+
+    blocking = asyncio.run(run(handle_message_blocking, args.users, args.gemini_ms / 1000))
+    non_blocking = asyncio.run(run(handle_message_async, args.users, args.gemini_ms / 1000))
+
+    database.disconnect()
+
+    print(f"{args.users} concurrent messages, 2 queries x {args.query_ms:.0f} ms, Gemini {args.gemini_ms:.0f} ms, pool size {database.DB_POOL_SIZE}")
+    print(f"  blocking get_*   : {blocking:7.3f} s  ({args.users / blocking:7.1f} msg/s)")
+    print(f"  async_database   : {non_blocking:7.3f} s  ({args.users / non_blocking:7.1f} msg/s)")
+    print(f"  speed-up         : {blocking / non_blocking:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Memory held per idle user: the old conversation dict vs conversation_store.
+
+"Before" rebuilds what app.py used to keep for every user who ever wrote in: a
+DialogueManager with an instance __dict__ and its own copy of intent_forms,
+in a plain dict that never shrank. "After" uses the real DialogueManager and
+stores:
+  - idle users      (conversation finished): nothing is stored
+  - open forms      (e.g. a timetable form left open with slots filled): one
+                    slotted manager each, in the TTL/LRU memory store
+  - sqlite          same open forms as JSON rows (file size, and get/save time)
+
+Usage (from the repo root):
+    python benchmarks/bench_conversation_memory.py --users 10000
+"""
+import argparse
+import copy
+import gc
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+import conversation_store
+
+
+class LegacyDialogueManager:
+    """The pre-store DialogueManager layout: per-instance __dict__ and intent_forms."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.current_intent = None
+        self.required_slots = []
+        self.filled_slots = {}
+        self.questions = {}
+        self.intent_family = None
+        self.pending_action = None
+        self.action_context = {}
+        self.intent_forms = copy.deepcopy(app.DialogueManager.intent_forms)
+
+
+def user_ids(count):
+    return [f"whatsapp:+91{9000000000 + n}" for n in range(count)]
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, kept
+
+
+def open_form(manager):
+    manager.start_conversation('get_timetable', {'branch': 'CSE', 'section': 'A', 'year': 3, 'day': 'Monday'})
+    return manager
+
+
+def report(label, used, users):
+    print(f"  {label:<34}: {used / 1024 / 1024:8.2f} MiB total, {used / users:8.0f} bytes/user")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    ids = user_ids(args.users)
+    print(f"{args.users} users")
+
+    used, _ = measure(lambda: {user_id: LegacyDialogueManager(user_id) for user_id in ids})
+    report("before: dict of managers", used, args.users)
+
+    def idle_store():
+        store = conversation_store.MemoryConversationStore(app.DialogueManager, max_users=args.users)
+        for user_id in ids:
+            store.save(app.DialogueManager(user_id))
+        return store
+
+    used, store = measure(idle_store)
+    report(f"after: idle users ({len(store)} stored)", used, args.users)
+
+    def open_store():
+        store = conversation_store.MemoryConversationStore(app.DialogueManager, max_users=args.users)
+        for user_id in ids:
+            store.save(open_form(app.DialogueManager(user_id)))
+        return store
+
+    used, store = measure(open_store)
+    report(f"after: open forms ({len(store)} stored)", used, args.users)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "conversations.sqlite3")
+        store = conversation_store.SQLiteConversationStore(app.DialogueManager, path=path, max_users=args.users)
+        start = time.perf_counter()
+        for user_id in ids:
+            store.save(open_form(app.DialogueManager(user_id)))
+        save_us = (time.perf_counter() - start) / args.users * 1e6
+        start = time.perf_counter()
+        for user_id in ids:
+            store.get(user_id)
+        get_us = (time.perf_counter() - start) / args.users * 1e6
+        store.close()
+        size = os.path.getsize(path) + (os.path.getsize(path + "-wal") if os.path.exists(path + "-wal") else 0)
+        print(f"  {'sqlite: open forms (on disk)':<34}: {size / 1024 / 1024:8.2f} MiB file,  {size / args.users:8.0f} bytes/user"
+              f"   save {save_us:.0f} us, get {get_us:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
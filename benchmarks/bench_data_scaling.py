@@ -0,0 +1,131 @@
+"""
+How the database.get_* functions scale with data size.
+
+For every --scales entry the bench database is rebuilt from schema4.sql,
+grown with generate_campus_data.py to that many campuses, and each get_*
+function is timed against it through the real execute_query() and pool.
+Calls use the seeded names ("CSE", "Sandhya M K", ...). The synthetic campuses
+share the canonical branch and section names, so class-group lookups such as
+get_timetable("CSE", "A", ...) match every campus and their row counts grow
+with the scale; faculty lookups stay on the one seeded person.
+
+The timetable engine and the reference-table cache are switched off, so every
+call reaches MySQL. Pass --engine to time the engine-backed paths instead.
+
+Needs a MySQL server (DB_HOST / DB_USER / DB_PASS). The bench database
+(default campus_bot_bench) is dropped and recreated for every scale.
+
+Usage (from the repo root):
+    python benchmarks/bench_data_scaling.py --scales 1 10 100 --calls 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import generate_campus_data
+import seed_database
+
+CASES = [
+    ("get_timetable(branch, section, day)", "get_timetable", ("CSE", "A", None, "Monday", None, None, None)),
+    ("get_timetable(branch, section, year)", "get_timetable", ("CSE", "B", 1, None, None, None, None)),
+    ("get_timetable(faculty, day)", "get_timetable", (None, None, None, "Monday", "Sandhya M K", None, None)),
+    ("get_timetable(course_name)", "get_timetable", (None, None, None, None, None, "Mathematics", None)),
+    ("get_course_instructors(name, branch, section)", "get_course_instructors", ("Mathematics", None, "CSE", "A")),
+    ("get_course_instructors(code)", "get_course_instructors", (None, "1BPOPL107", None, None)),
+    ("get_faculty_info(name)", "get_faculty_info", ("Rashmi", None, None)),
+    ("get_faculty_location(name)", "get_faculty_location", ("Sandhya M K",)),
+    ("get_faculty_busy_slots", "get_faculty_busy_slots", ("Sandhya M K", "Monday")),
+    ("get_faculty_class_schedule", "get_faculty_class_schedule", ("Sandhya M K", "Monday")),
+    ("get_faculty_active_days", "get_faculty_active_days", ("Sandhya M K",)),
+    ("get_courses_for_faculty", "get_courses_for_faculty", ("Sandhya M K",)),
+    ("get_hod_name_by_branch", "get_hod_name_by_branch", ("CSE",)),
+    ("get_event_info(all)", "get_event_info", (None,)),
+    ("get_event_info(title)", "get_event_info", ("Hackathon",)),
+    ("get_notice_info", "get_notice_info", ()),
+    ("get_placement_companies_by_ctc_data", "get_placement_companies_by_ctc_data", ("gt", 10)),
+    ("get_placement_count_by_ctc_data", "get_placement_count_by_ctc_data", ("gt", 10)),
+    ("get_placement_count_by_type_data", "get_placement_count_by_type_data", ("Dream",)),
+    ("get_company_stats_data", "get_company_stats_data", ("VISA",)),
+]
+
+
+def time_call(func, args, calls):
+    """Median and max milliseconds over `calls` calls (after one warm-up call), and the row count."""
+    rows = func(*args)
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings), len(rows or [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Campus counts to test")
+    parser.add_argument("--calls", type=int, default=20, help="Timed calls per function and scale")
+    parser.add_argument("--database", default=seed_database.DEFAULT_DATABASE)
+    parser.add_argument("--engine", action="store_true", help="Keep the in-memory timetable engine on")
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(seed_database.REPO_ROOT, ".env")) # DB credentials; DB_NAME is overridden below
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.update({
+        "DB_NAME": args.database,
+        "TIMETABLE_ENGINE_ENABLED": "1" if args.engine else "0",
+        "REFERENCE_CACHE_ENABLED": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    import logging_setup
+    logging_setup.configure_logging(level="WARNING")
+    import database
+
+    report = {} # case -> {scale: (median, max, rows)}
+    counts = {}
+    for scale in args.scales:
+        try:
+            seed_database.seed(args.database, migrations=True)
+        except mysql.connector.Error as err:
+            raise SystemExit(f"Could not seed {args.database}: {err}. Set DB_HOST/DB_USER/DB_PASS for a MySQL server.")
+        conn = seed_database.connect_server(args.database)
+        try:
+            start = time.perf_counter()
+            generate_campus_data.generate(conn, scale)
+            load_seconds = time.perf_counter() - start
+            counts[scale] = generate_campus_data.table_counts(conn)
+        finally:
+            conn.close()
+        print(f"scale {scale}: {counts[scale]['timetable_slots']} slots, {counts[scale]['classes']} classes, "
+              f"{counts[scale]['faculty']} faculty (generated in {load_seconds:.1f} s)")
+
+        database.connect() # Loads the engine snapshot too when it is on
+        try:
+            for name, function_name, call_args in CASES:
+                report.setdefault(name, {})[scale] = time_call(getattr(database, function_name), call_args, args.calls)
+        finally:
+            database.disconnect()
+
+    header = "".join(f"{f'x{scale} ms (rows)':>22}" for scale in args.scales)
+    print(f"\n{'function':<46}{header}")
+    for name, by_scale in report.items():
+        cells = "".join(f"{f'{by_scale[s][0]:.2f} ({by_scale[s][2]})':>22}" for s in args.scales)
+        print(f"{name:<46}{cells}")
+    first, last = args.scales[0], args.scales[-1]
+    if last != first:
+        print(f"\nslowdown x{first} -> x{last} (median):")
+        slowest = sorted(report.items(), key=lambda item: item[1][last][0] / max(item[1][first][0], 1e-6), reverse=True)
+        for name, by_scale in slowest[:8]:
+            print(f"  {name:<46} {by_scale[last][0] / max(by_scale[first][0], 1e-6):6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
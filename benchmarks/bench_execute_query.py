@@ -0,0 +1,147 @@
+"""
+Per-call overhead of database.execute_query(): the old print() logging vs the
+leveled, queue-based logging from logging_setup.py.
+
+MySQL is replaced by an in-memory pool that hands back canned rows (with TIME
+columns, so the timedelta conversion still runs), which leaves only the Python
+side of execute_query: logging, metrics, tracing and row conversion.
+
+Modes:
+  print     the four print() lines execute_query used to emit per call
+  info      LOG_LEVEL=INFO (the default): no per-query output
+  slow-log  every query counts as slow (SLOW_QUERY_MS=0): one WARNING each
+  debug     LOG_LEVEL=DEBUG: full SQL and params per query
+
+Output goes to a line-buffered file, like a terminal or a container log pipe.
+
+Usage (from the repo root):
+    python benchmarks/bench_execute_query.py --calls 20000
+"""
+import argparse
+import datetime
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import logging_setup
+
+QUERY = """
+    SELECT day_of_week, start_time, end_time, course_name, room
+    FROM timetable
+    WHERE branch = %s AND section = %s AND semester = %s
+    ORDER BY day_of_week, start_time
+"""
+PARAMS = ("CSE", "A", 5)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def execute(self, query, params):
+        pass
+
+    def fetchall(self):
+        return [dict(row) for row in self._rows]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def get_connection(self):
+        return FakeConnection(self._rows)
+
+
+def canned_rows(count):
+    return [
+        {
+            'day_of_week': 'Monday',
+            'start_time': datetime.timedelta(hours=9 + n % 7),
+            'end_time': datetime.timedelta(hours=10 + n % 7),
+            'course_name': f'Course {n}',
+            'room': f'{200 + n}',
+        }
+        for n in range(count)
+    ]
+
+
+def legacy_execute_query(query, params=None):
+    """execute_query() with the print() calls it had before leveled logging."""
+    print(f"Executing query on DB: {database.db_config.get('database', 'N/A')} @ Host: {database.db_config.get('host', 'N/A')}")
+    print(f"SQL Query: {query}")
+    print(f"SQL Params: {params}")
+    results = database.execute_query(query, params)
+    print(f"Query returned {len(results)} results.")
+    return results
+
+
+def measure(func, calls, repeats):
+    """Best-of-`repeats` mean time per call in microseconds."""
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func(QUERY, PARAMS)
+        runs.append((time.perf_counter() - start) / calls * 1e6)
+    return min(runs), statistics.median(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=6, help="Rows returned per query")
+    args = parser.parse_args()
+
+    database.db_pool = FakePool(canned_rows(args.rows))
+    database.db_config = {'database': 'college_db', 'host': 'localhost'}
+
+    sink = tempfile.TemporaryFile(mode='w', buffering=1) # Line-buffered, like a terminal
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = sink
+    try:
+        logging_setup.configure_logging(level='INFO')
+        results = {}
+        results['print'] = measure(legacy_execute_query, args.calls, args.repeats)
+        results['info'] = measure(database.execute_query, args.calls, args.repeats)
+
+        database.SLOW_QUERY_MS = 0
+        results['slow-log'] = measure(database.execute_query, args.calls, args.repeats)
+        database.SLOW_QUERY_MS = float('inf')
+
+        logging.getLogger().setLevel(logging.DEBUG)
+        results['debug'] = measure(database.execute_query, args.calls, args.repeats)
+        logging_setup.stop_logging()
+    finally:
+        sys.stdout, sys.stderr = real_stdout, real_stderr
+        sink.close()
+
+    print(f"execute_query overhead, {args.calls} calls x {args.repeats}, {args.rows} rows per query")
+    baseline = results['print'][0]
+    for mode, (best, median) in results.items():
+        print(f"  {mode:<9} {best:7.2f} us/call (median {median:7.2f})   {best / baseline:5.2f}x of print")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per-call latency of Gemini requests: new ClientSession per call vs the shared
+keep-alive client (http_client.SharedHttpClient).
+
+Starts a local aiohttp stub that answers like generateContent, over TLS by
+default (self-signed certificate made with the openssl CLI) so the handshake
+cost that keep-alive saves is part of the measurement. Every call runs in its
+own event loop, the way Flask[async] runs each webhook.
+
+Usage (from the repo root):
+    python benchmarks/bench_gemini_http.py --calls 200 --server-ms 0
+    python benchmarks/bench_gemini_http.py --no-tls
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp import web
+
+import http_client
+
+STUB_REPLY = {"candidates": [{"content": {"parts": [{"text": '{"intent": "general_chat", "entities": {}}'}]}}]}
+PAYLOAD = {"contents": [{"parts": [{"text": "hello"}]}], "generationConfig": {"temperature": 0.0}}
+
+
+def make_certificate(directory):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def start_stub(port, server_seconds, server_ssl):
+    """Runs the stub Gemini server on its own thread and returns once it is listening."""
+    started = threading.Event()
+
+    async def generate_content(request):
+        await request.read()
+        if server_seconds:
+            await asyncio.sleep(server_seconds)
+        return web.json_response(STUB_REPLY)
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{model}", generate_content)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port, ssl_context=server_ssl).start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="gemini_stub", daemon=True).start()
+    started.wait()
+
+
+async def call_with_new_session(url, client_ssl):
+    # What _call_gemini_with_retry used to do
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, json=PAYLOAD, ssl=client_ssl) as response:
+            return await response.json()
+
+
+async def call_with_shared_client(client, url, client_ssl):
+    response = await client.post(url, json=PAYLOAD, ssl=client_ssl)
+    return response.status
+
+
+def measure(calls, make_call):
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        asyncio.run(make_call()) # Fresh loop per call, like a Flask[async] request
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"  {label:<22}: mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--server-ms", type=float, default=0.0, help="Simulated model latency inside the stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-tls", action="store_true", help="Plain HTTP (no handshake to save)")
+    args = parser.parse_args()
+
+    server_ssl = client_ssl = None
+    scheme = "http"
+    if not args.no_tls:
+        with tempfile.TemporaryDirectory() as directory:
+            cert, key = make_certificate(directory)
+            server_ssl = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            server_ssl.load_cert_chain(cert, key)
+            client_ssl = ssl.create_default_context(cafile=cert)
+            client_ssl.check_hostname = False
+        scheme = "https"
+
+    start_stub(args.port, args.server_ms / 1000, server_ssl)
+    url = f"{scheme}://127.0.0.1:{args.port}/v1beta/models/stub:generateContent?key=bench"
+
+    client = http_client.SharedHttpClient("bench")
+    client.start()
+    try:
+        measure(5, lambda: call_with_shared_client(client, url, client_ssl)) # Warm-up
+        per_call = measure(args.calls, lambda: call_with_new_session(url, client_ssl))
+        shared = measure(args.calls, lambda: call_with_shared_client(client, url, client_ssl))
+    finally:
+        client.close()
+
+    print(f"{args.calls} sequential calls over {scheme.upper()}, stub latency {args.server_ms:.0f} ms")
+    summarize("session per call", per_call)
+    summarize("shared keep-alive", shared)
+    saved = statistics.mean(per_call) - statistics.mean(shared)
+    print(f"  saved per call        : {saved:7.2f} ms ({statistics.mean(per_call) / statistics.mean(shared):.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks for the pure-Python functions that run on every relevant
+message, with a stored baseline and a regression threshold.
+
+Inputs are synthetic and sized like a full campus: every branch, section and
+year for a whole week (--branches x 8 sections x 4 years x 6 days x 7 slots),
+so formatter and conversion costs show up at realistic and worst-case sizes.
+
+Each case is timed timeit-style: gc off, the loop count picked so one repeat
+takes at least --min-time, and the best of --repeats shown (with the spread of
+the median over it, so noisy runs are visible). Arguments for functions that change their input
+(_normalize_entities, _convert_row_types) are copied before the clock starts.
+
+Results are compared to the baseline as a cost relative to a fixed
+calibration loop, timed right before every repeat, so clock-speed drift
+during a run and a baseline saved on another machine matter much less. A case
+more than --threshold slower than its baseline is a regression and the script
+exits with status 1.
+
+Usage (from the repo root):
+    python benchmarks/bench_hot_functions.py                 # compare to the baseline
+    python benchmarks/bench_hot_functions.py --save-baseline # after an intended change
+    python benchmarks/bench_hot_functions.py --filter format_ --threshold 0.10
+"""
+import argparse
+import copy
+import datetime
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+import database
+import timetable_engine
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hot_functions_baseline.json")
+
+BRANCHES = ["CSE", "ISE", "ECE", "AI&ML", "ME", "CV", "EEE", "CSBS", "EIE", "MCA"]
+SECTIONS = "ABCDEFGH"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+SLOT_HOURS = [(9, 0, 10, 0), (10, 0, 11, 0), (11, 30, 12, 30), (12, 30, 13, 30), (14, 30, 15, 30), (15, 30, 16, 30), (14, 30, 16, 30)]
+COURSES = [("Mathematics", "BMA101"), ("Physics", "BPH102"), ("Programming in C", "BPOP107"),
+           ("Data Structures", "BCS302"), ("Operating Systems", "BCS303"), ("Machine Learning", "BAI601")]
+FACULTY = [f"Dr. Faculty {n} {SECTIONS[n % 8]}" for n in range(240)]
+
+
+# --- Synthetic inputs ---
+def timetable_rows(branches, as_timedelta):
+    """One row per slot for every branch/section/year/day, like get_timetable's SELECT."""
+    def clock(hour, minute):
+        return datetime.timedelta(hours=hour, minutes=minute) if as_timedelta else datetime.time(hour, minute)
+
+    rows = []
+    for b, branch in enumerate(BRANCHES[:branches]):
+        for s, section in enumerate(SECTIONS):
+            for year in range(1, 5):
+                for d, day in enumerate(DAYS):
+                    for n, (h1, m1, h2, m2) in enumerate(SLOT_HOURS):
+                        course_name, course_code = COURSES[(n + d) % len(COURSES)]
+                        is_lab = n == len(SLOT_HOURS) - 1
+                        rows.append({
+                            'day_of_week': day,
+                            'start_time': clock(h1, m1),
+                            'end_time': clock(h2, m2),
+                            'course_name': course_name,
+                            'course_code': course_code,
+                            'faculty_name': FACULTY[(b * 31 + s * 7 + n) % len(FACULTY)],
+                            'room_no': None if is_lab else f"{year}{s}{n}",
+                            'location': f"{branch} LAB-{n}" if is_lab else "Ramanujacharya Bhavan",
+                            'class_type': 'Lab' if is_lab else 'Lecture',
+                            'lab_batch': f"{section}{1 + d % 2}" if is_lab else None,
+                            'branch': branch,
+                            'section': section,
+                            'year': year,
+                        })
+    return rows
+
+
+def busy_slots(count):
+    """`count` non-overlapping classes spread over the college day, unsorted."""
+    slots = []
+    minutes = 9 * 60
+    for n in range(count):
+        length = 50 if count > 8 else 60
+        start = minutes + (n * (450 // max(count, 1)))
+        slots.append({'start_time': datetime.time(start // 60, start % 60),
+                      'end_time': datetime.time((start + length) // 60 % 24, (start + length) % 60)})
+    return list(reversed(slots))
+
+
+def day_availability(count):
+    """The DayAvailability the timetable engine builds for busy_slots(count)."""
+    rows = [dict(slot, slot_id=n, day_of_week='Monday', faculty_id=1, faculty_name_normalized='faculty')
+            for n, slot in enumerate(busy_slots(count))]
+    return timetable_engine.TimetableSnapshot(rows).get_faculty_availability('faculty', 'Monday')
+
+
+def build_cases(branches):
+    """Returns [(name, func, make_args, mutates)]."""
+    all_rows = timetable_rows(branches, as_timedelta=False)
+    class_week = [row for row in all_rows if row['branch'] == 'CSE' and row['section'] == 'A' and row['year'] == 2]
+    class_day = [row for row in class_week if row['day_of_week'] == 'Monday']
+    faculty_week = [row for row in all_rows if row['faculty_name'] == FACULTY[7]]
+    raw_rows = timetable_rows(branches, as_timedelta=True)
+    raw_class_week = [row for row in raw_rows if row['branch'] == 'CSE' and row['section'] == 'A' and row['year'] == 2]
+
+    course_rows = [
+        {'course_name': 'Data Structures', 'course_code': 'BCS302', 'faculty_name': row['faculty_name'],
+         'branch': row['branch'], 'section': row['section']}
+        for row in all_rows if row['course_code'] == 'BCS302' and row['day_of_week'] == 'Monday' and row['year'] == 2
+    ]
+    time_strings = ["3pm", "10am", "3:30pm", "11:45am", "15:00", "09:30", "2", "4", "noon", "12:30"]
+    entity_sets = [
+        {'branch': 'cs', 'section': 'A', 'day': 'Monday'},
+        {'branch': 'IS', 'lab_name': 'chem', 'course_code': '1 BCS-302'},
+        {'course_name': 'is', 'lab_name': 'Electronics', 'day': 'Friday'},
+        {'day': 'today', 'branch': 'ECE'},
+    ]
+    locations = [
+        {'room_number': '204'}, {'room_number': 'MB-3'}, {'room_number': '12'},
+        {'lab_name': 'CSE'}, {'lab_name': 'PHYSICS'}, {'lab_name': 'unknown lab'},
+        {'office_name': 'principal'}, {'location_name': 'canteen'},
+    ]
+    availability = day_availability(5)
+    times = [app.parse_time(text) for text in time_strings]
+    name_pairs = [(name.split()[-2].lower(), db_name) for name, db_name in zip(FACULTY, reversed(FACULTY))]
+
+    def each(func, inputs):
+        def run():
+            for item in inputs:
+                func(item)
+        return run
+
+    return [
+        ("parse_time[10 formats]", each(app.parse_time, time_strings), lambda: (), False),
+        ("calculate_free_slots[day, 5 classes]", app.calculate_free_slots, lambda: (busy_slots(5),), False),
+        ("calculate_free_slots[day, 20 classes]", app.calculate_free_slots, lambda: (busy_slots(20),), False),
+        ("DayAvailability.free_slots[day, 5 classes]", availability.free_slots, lambda: (), False),
+        ("DayAvailability.is_free[10 times]", each(availability.is_free, [t for t in times if t]), lambda: (), False),
+        ("_normalize_entities[4 sets]", lambda sets: [app._normalize_entities(e) for e in sets], lambda: (copy.deepcopy(entity_sets),), True),
+        ("is_similar_faculty_name[240 pairs]", lambda pairs: [app.is_similar_faculty_name(u, d) for u, d in pairs], lambda: (name_pairs,), False),
+        ("format_timetable_response[class day]", app.format_timetable_response, lambda: (class_day, {'branch': 'CSE', 'section': 'A', 'year': '2', 'day': 'Monday'}), False),
+        ("format_timetable_response[class week]", app.format_timetable_response, lambda: (class_week, {'branch': 'CSE', 'section': 'A', 'year': '2'}), False),
+        ("format_timetable_response[faculty week]", app.format_timetable_response, lambda: (faculty_week, {'faculty_name': FACULTY[7]}), False),
+        (f"format_timetable_response[campus week, {len(all_rows)} rows]", app.format_timetable_response, lambda: (all_rows, {'course_name': 'Mathematics'}), False),
+        ("format_course_instructors[all sections]", app.format_course_instructors, lambda: (course_rows, {'course_name': 'Data Structures'}), False),
+        ("format_course_instructors[one section]", app.format_course_instructors, lambda: (course_rows[:2], {'course_name': 'Data Structures', 'branch': 'CSE', 'section': 'A'}), False),
+        ("format_specific_location[8 queries]", each(app.format_specific_location, locations), lambda: (), False),
+        ("_convert_row_types[class week]", database._convert_row_types, lambda: ([dict(row) for row in raw_class_week],), True),
+        (f"_convert_row_types[campus week, {len(raw_rows)} rows]", database._convert_row_types, lambda: ([dict(row) for row in raw_rows],), True),
+    ]
+
+
+# --- Timing ---
+def calibration():
+    """Fixed pure-Python workload (dict lookups, string building) used to normalize results."""
+    table = {n: str(n) for n in range(256)}
+    parts = []
+    for n in range(2000):
+        parts.append(table[n & 255] + ":" + table[(n * 7) & 255])
+    return "".join(parts)
+
+
+def _loops_for(func, make_args, mutates, min_time):
+    """Loop count that makes one repeat take at least min_time (like timeit.autorange)."""
+    loops = 1
+    while True:
+        elapsed = _run(func, _batch(make_args, mutates, loops))
+        if elapsed >= min_time or loops >= 1 << 20:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def _batch(make_args, mutates, loops):
+    return [make_args() for _ in range(loops)] if mutates else [make_args()] * loops
+
+
+def time_case(func, make_args, mutates, min_time, repeats, calibration_loops):
+    """
+    Returns (best us per call, median us per call, relative cost). Every repeat
+    is paired with a calibration run right before it, and the relative cost is
+    the median of case/calibration over the pairs, which cancels out clock
+    speed changes during the run.
+    """
+    loops = _loops_for(func, make_args, mutates, min_time)
+    runs, ratios = [], []
+    for _ in range(repeats):
+        calibration_us = _run(calibration, [()] * calibration_loops) / calibration_loops * 1e6
+        us = _run(func, _batch(make_args, mutates, loops)) / loops * 1e6
+        runs.append(us)
+        ratios.append(us / calibration_us)
+    return min(runs), statistics.median(runs), statistics.median(ratios)
+
+
+def _run(func, batch):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for args in batch:
+            func(*args)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs the baseline (0.25 = 25%%)")
+    parser.add_argument("--filter", default="", help="Only cases whose name contains this")
+    parser.add_argument("--branches", type=int, default=len(BRANCHES), help="Campus size for the synthetic timetable")
+    parser.add_argument("--repeats", type=int, default=11)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Seconds per repeat")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    calibration_loops = _loops_for(calibration, lambda: (), False, args.min_time / 4)
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+
+    print(f"{'case':<58} {'best us':>11} {'spread':>7} {'baseline':>11} {'change':>8}")
+    results, regressions = {}, []
+    for name, func, make_args, mutates in build_cases(args.branches):
+        if args.filter not in name:
+            continue
+        best, median, relative = time_case(func, make_args, mutates, args.min_time, args.repeats, calibration_loops)
+        results[name] = {'us': round(best, 3), 'relative': round(relative, 5)}
+        line = f"{name:<58} {best:11.2f} {(median / best - 1) * 100:6.1f}%"
+        if baseline and name in baseline['results']:
+            base = baseline['results'][name]
+            change = relative / base['relative'] - 1
+            line += f" {base['us']:11.2f} {change * 100:+7.1f}%"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save_baseline:
+        existing = load_baseline(args.baseline)
+        if args.filter and existing:
+            results = {**existing['results'], **results} # Keep the cases that were not re-run
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    elif baseline is None:
+        print(f"No baseline at {args.baseline}. Run with --save-baseline to create one.")
+    elif regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Intent prompt size vs latency and accuracy: full prompt vs intent-family shards.
+
+Runs the labeled queries in benchmarks/intent_queries.jsonl through
+intent_prompts.select_families() and reports, for each mode, how many prompt
+characters would be sent and whether the expected intent is even defined in
+the prompt chosen (a shard that lacks it falls back to the full prompt after
+one wasted call).
+
+With --live (needs GEMINI_API_KEY) every query is also classified by Gemini
+with both modes, reporting latency and accuracy against the labels.
+
+Usage (from the repo root):
+    python benchmarks/bench_intent_prompts.py
+    python benchmarks/bench_intent_prompts.py --live
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intent_prompts
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_queries.jsonl")
+CHARS_PER_TOKEN = 4 # Rough English average, good enough to compare the two modes
+
+
+def load_queries(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def intents_in(families):
+    chosen = [f for f in intent_prompts.FAMILIES if not families or f in families or f == 'conversation']
+    return {intent for f in chosen for intent, _ in intent_prompts.INTENT_DEFINITIONS[f]}
+
+
+def offline_report(queries):
+    full_size = len(intent_prompts.FULL_PROMPT)
+    sizes, covered, fallbacks = [], 0, 0
+    start = time.perf_counter()
+    choices = [intent_prompts.select_families(q['query']) for q in queries]
+    route_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    for query, families in zip(queries, choices):
+        if families is None:
+            fallbacks += 1
+            sizes.append(full_size)
+            covered += 1
+        elif query['intent'] in intents_in(families):
+            sizes.append(len(intent_prompts.prompt_for(families)))
+            covered += 1
+        else:
+            # Wrong shard: one shard call, then the full prompt
+            sizes.append(len(intent_prompts.prompt_for(families)) + full_size)
+
+    print(f"{len(queries)} labeled queries, pre-router {route_us:.1f} us/query")
+    print(f"  full prompt      : {full_size:6d} chars (~{full_size // CHARS_PER_TOKEN} tokens) on every query")
+    print(f"  sharded (mean)   : {statistics.mean(sizes):6.0f} chars (~{statistics.mean(sizes) / CHARS_PER_TOKEN:.0f} tokens), "
+          f"median {statistics.median(sizes):.0f}")
+    print(f"  input saved      : {1 - statistics.mean(sizes) / full_size:6.1%}")
+    print(f"  shard had intent : {covered}/{len(queries)} ({fallbacks} sent straight to the full prompt)")
+    misses = [q['query'] for q, f in zip(queries, choices) if f and q['intent'] not in intents_in(f)]
+    for query in misses:
+        print(f"    wrong shard: {query!r} -> {intent_prompts.select_families(query)}")
+
+
+async def live_report(queries):
+    import gemini_client
+    gemini_client.INTENT_CACHE_ENABLED = False
+
+    async def run(sharded):
+        gemini_client.INTENT_PROMPT_SHARDS_ENABLED = sharded
+        latencies, correct = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            result = await gemini_client.get_query_intent(query['query'])
+            latencies.append((time.perf_counter() - start) * 1000)
+            correct += result.get('intent') == query['intent']
+        return latencies, correct
+
+    for label, sharded in (("full prompt", False), ("sharded", True)):
+        latencies, correct = await run(sharded)
+        print(f"  {label:<12}: p50 {statistics.median(latencies):7.0f} ms   mean {statistics.mean(latencies):7.0f} ms   "
+              f"accuracy {correct}/{len(queries)} ({correct / len(queries):.1%})")
+    gemini_client.close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--live", action="store_true", help="Also call Gemini (needs GEMINI_API_KEY)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    offline_report(queries)
+    if args.live:
+        if not os.environ.get('GEMINI_API_KEY'):
+            sys.exit("GEMINI_API_KEY is not set; run without --live for the offline report.")
+        print("Live Gemini run:")
+        asyncio.run(live_report(queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Webhook latency and reply throughput: inline TwiML replies vs async replies
+through the reply worker pool (TWILIO_ASYNC_REPLIES) and the Twilio REST API.
+
+Everything runs in-process against benchmarks/fake_twilio.py. The messages
+are ones the local intent router answers without MySQL or Gemini; --bot-ms adds
+a simulated upstream delay to every process_message() call so the effect of
+slow Gemini/SQL round trips on the webhook can be seen.
+
+Reported per mode:
+  webhook  - time until the webhook handler returned its TwiML (what Twilio waits on)
+  delivery - messages per second until the last reply reached the fake API
+
+Usage (from the repo root):
+    python benchmarks/bench_twilio_replies.py --messages 400 --concurrency 40 --bot-ms 800
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_twilio import FakeTwilio
+
+import app
+import twilio_replies
+
+MESSAGES = ["break timings", "how do i register for backlog exams", "college map", "i lost my id card"]
+BOT_NUMBER = "whatsapp:+14155238886"
+
+
+def summarize(label, timings, delivered, elapsed):
+    ordered = sorted(timings)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"  {label:<8} webhook: p50 {statistics.median(ordered):8.1f} ms   p99 {p99:8.1f} ms   "
+          f"delivery: {delivered / elapsed:7.1f} msg/s")
+
+
+async def fire(count, concurrency):
+    """Sends `count` webhooks from `concurrency` users. Returns per-webhook latencies (ms)."""
+    timings = []
+
+    async def user(user_id):
+        for n in range(user_id, count, concurrency):
+            start = time.perf_counter()
+            await app.handle_twilio_message(MESSAGES[n % len(MESSAGES)], f"whatsapp:+9100000{user_id:05d}", BOT_NUMBER)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=twilio_replies.TWILIO_REPLY_WORKERS)
+    parser.add_argument("--bot-ms", type=float, default=800.0, help="Simulated Gemini/SQL time per message")
+    parser.add_argument("--twilio-ms", type=float, default=100.0, help="Simulated Twilio API latency")
+    parser.add_argument("--port", type=int, default=8089)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    fake = FakeTwilio(latency_ms=args.twilio_ms).start(args.port)
+    twilio_replies.TWILIO_API_BASE_URL = f"http://127.0.0.1:{args.port}"
+    twilio_replies.TWILIO_ACCOUNT_SID, twilio_replies.TWILIO_AUTH_TOKEN = "ACbench", "bench"
+
+    process_message = app.process_message
+
+    async def slow_process_message(user_query, user_id):
+        await asyncio.sleep(args.bot_ms / 1000)
+        return await process_message(user_query, user_id)
+
+    app.process_message = slow_process_message
+    print(f"{args.messages} messages from {args.concurrency} users, bot {args.bot_ms:.0f} ms, Twilio API {args.twilio_ms:.0f} ms")
+
+    # Inline: the webhook carries the reply, so delivery ends when the last webhook returns
+    twilio_replies.TWILIO_ASYNC_REPLIES = False
+    start = time.perf_counter()
+    timings = asyncio.run(fire(args.messages, args.concurrency))
+    summarize("inline", timings, args.messages, time.perf_counter() - start)
+
+    # Async: empty TwiML at once, replies arrive at the fake API from the workers
+    twilio_replies.TWILIO_ASYNC_REPLIES = True
+    app.twilio_reply_pool = twilio_replies.ReplyWorkerPool(app.deliver_twilio_reply, workers=args.workers)
+    app.twilio_reply_pool.start()
+    try:
+        start = time.perf_counter()
+        timings = asyncio.run(fire(args.messages, args.concurrency))
+        delivered = fake.wait_for(args.messages, timeout=600)
+        summarize("async", timings, len(fake.messages), time.perf_counter() - start)
+        if not delivered:
+            print(f"  only {len(fake.messages)}/{args.messages} replies arrived before the timeout")
+        print(f"  pool stats: {app.twilio_reply_pool.stats} ({args.workers} workers)")
+    finally:
+        app.twilio_reply_pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Local stand-in for Gemini's generateContent endpoint, for load tests that must
+not spend API quota.
+
+Answers POST /v1beta/models/{model}:generateContent the way gemini_client reads
+it. Intent calls (generationConfig.responseMimeType = application/json) get the
+canned intent JSON for the user query from a corpus file (query, intent,
+entities per line; see student_queries.jsonl), or general_chat for queries not
+in it. Response calls get a short canned answer.
+
+Failure injection, per request:
+  --error-rate      answered with a 503 (gemini_client retries these)
+  --malformed-rate  answered 200 with a body that is not JSON
+
+GET /stats returns the request counts (GET /stats?clear=1 also resets them).
+
+Point the bot at it with:
+    GEMINI_API_BASE_URL=http://127.0.0.1:8090/v1beta/models/ GEMINI_API_KEY=fake
+
+Usage (from the repo root):
+    python benchmarks/fake_gemini.py --port 8090 --latency-ms 600 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+
+from aiohttp import web
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_queries.jsonl")
+UNKNOWN_INTENT = {"intent": "general_chat", "entities": {}}
+CANNED_ANSWER = "Sure! Here is what I found for you."
+QUERY_LINE = re.compile(r"^User query:\s*(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def load_corpus(path):
+    """Maps each query (lowercased) to its {"intent", "entities"} answer."""
+    answers = {}
+    if not path:
+        return answers
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                answers[item['query'].strip().lower()] = {"intent": item['intent'], "entities": item.get('entities', {})}
+    return answers
+
+
+def _user_query(payload):
+    for content in payload.get('contents', []):
+        for part in content.get('parts', []):
+            match = QUERY_LINE.match(part.get('text', ''))
+            if match:
+                return match.group(1).strip()
+    return ""
+
+
+def _reply(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP"}]}
+
+
+class FakeGemini:
+    """The stub server plus request counts. Run it with serve() or start() (own thread)."""
+
+    def __init__(self, latency_ms=0.0, error_rate=0.0, malformed_rate=0.0, corpus=DEFAULT_CORPUS):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.answers = load_corpus(corpus)
+        self.stats = {'intent': 0, 'response': 0, 'errors': 0, 'malformed': 0, 'unknown_queries': 0}
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{model}", self.generate_content)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    async def generate_content(self, request):
+        if not request.query.get("key"):
+            return web.json_response({"error": {"code": 403, "message": "API key missing", "status": "PERMISSION_DENIED"}}, status=403)
+        payload = await request.json()
+        is_intent = payload.get('generationConfig', {}).get('responseMimeType') == "application/json"
+        self.stats['intent' if is_intent else 'response'] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        roll = random.random()
+        if roll < self.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}, status=503)
+        if roll < self.error_rate + self.malformed_rate:
+            self.stats['malformed'] += 1
+            return web.Response(text='{"candidates": [{"content": ', content_type="application/json")
+
+        if not is_intent:
+            return web.json_response(_reply(CANNED_ANSWER))
+        answer = self.answers.get(_user_query(payload).lower())
+        if answer is None:
+            self.stats['unknown_queries'] += 1
+            answer = UNKNOWN_INTENT
+        return web.json_response(_reply(json.dumps(answer)))
+
+    async def get_stats(self, request):
+        stats = dict(self.stats)
+        if request.query.get("clear"):
+            self.clear()
+        return web.json_response(stats)
+
+    def clear(self):
+        for key in self.stats:
+            self.stats[key] = 0
+
+    def start(self, port, host="127.0.0.1"):
+        """Serves on a daemon thread and returns once the port is listening."""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.make_app(), access_log=None)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, host, port).start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="fake_gemini", daemon=True).start()
+        started.wait()
+        return self
+
+    def serve(self, port, host="127.0.0.1"):
+        web.run_app(self.make_app(), host=host, port=port, access_log=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with a 503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Share of calls answered with broken JSON")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL of query/intent/entities answers")
+    args = parser.parse_args()
+    FakeGemini(args.latency_ms, args.error_rate, args.malformed_rate, args.corpus).serve(args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Local stand-in for Twilio's Messages API, for testing async replies offline.
+
+Implements POST /2010-04-01/Accounts/{sid}/Messages.json the way the bot uses it
+(form fields To, From, Body, MediaUrl; HTTP basic auth) and answers 201 with a
+Twilio-shaped JSON body. Every accepted message is kept in memory and listed at
+GET /messages (GET /messages?clear=1 also empties the list).
+
+Point the bot at it with:
+    TWILIO_API_BASE_URL=http://127.0.0.1:8089 TWILIO_ACCOUNT_SID=ACfake TWILIO_AUTH_TOKEN=fake
+
+Usage (from the repo root):
+    python benchmarks/fake_twilio.py --port 8089 --latency-ms 120 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import threading
+import time
+
+from aiohttp import web
+
+
+class FakeTwilio:
+    """The stub server plus what it received. Run it with serve() or start() (own thread)."""
+
+    def __init__(self, latency_ms=0.0, error_rate=0.0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.messages = []
+        self._ids = itertools.count(1)
+        self._received = threading.Condition()
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_post("/2010-04-01/Accounts/{sid}/Messages.json", self.create_message)
+        app.router.add_get("/messages", self.list_messages)
+        return app
+
+    async def create_message(self, request):
+        if request.headers.get("Authorization", "").split(" ")[0] != "Basic":
+            return web.json_response({"code": 20003, "message": "Authenticate", "status": 401}, status=401)
+        form = await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return web.json_response({"code": 20500, "message": "Internal Server Error", "status": 500}, status=500)
+        if not form.get("To") or not form.get("From") or not form.get("Body"):
+            return web.json_response({"code": 21603, "message": "A 'To', 'From' and 'Body' are required", "status": 400}, status=400)
+
+        message = {
+            "sid": f"SM{next(self._ids):032x}",
+            "account_sid": request.match_info["sid"],
+            "to": form["To"],
+            "from": form["From"],
+            "body": form["Body"],
+            "media_url": form.getall("MediaUrl", []),
+            "status": "queued",
+            "received_at": time.time(),
+        }
+        with self._received:
+            self.messages.append(message)
+            self._received.notify_all()
+        return web.json_response(message, status=201)
+
+    async def list_messages(self, request):
+        messages = list(self.messages)
+        if request.query.get("clear"):
+            self.clear()
+        return web.json_response(messages)
+
+    def clear(self):
+        with self._received:
+            self.messages.clear()
+
+    def wait_for(self, count, timeout=60):
+        """Blocks until at least `count` messages arrived. Returns False on timeout."""
+        with self._received:
+            return self._received.wait_for(lambda: len(self.messages) >= count, timeout)
+
+    def start(self, port, host="127.0.0.1"):
+        """Serves on a daemon thread and returns once the port is listening."""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            runner = web.AppRunner(self.make_app(), access_log=None)
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, host, port).start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="fake_twilio", daemon=True).start()
+        started.wait()
+        return self
+
+    def serve(self, port, host="127.0.0.1"):
+        web.run_app(self.make_app(), host=host, port=port, access_log=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of sends answered with a 500")
+    args = parser.parse_args()
+    FakeTwilio(args.latency_ms, args.error_rate).serve(args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Synthetic campus data on top of schema4.sql, for scaling tests.
+
+Adds (--scale - 1) extra campuses to a bench database seeded by
+seed_database.py, so --scale 10 is roughly ten times the real data. Every
+campus gets its own faculty, courses, classes, timetable_slots,
+placement_companies and events, with consistent keys: classes point at that
+campus's courses and faculty, and slots point at its classes. Per campus:
+
+    faculty 120, courses 64, classes 768, timetable_slots 2048,
+    placement_companies 100, events 40
+
+Branches use the canonical names database.canonical_branch() produces ("CSE",
+"AI&ML", ...) with the seeded sections A-D, because the branch, section and day
+filters compare for equality: a "CSE" / "A" lookup matches that class group on
+every campus, so its result and the index range it reads grow with --scale.
+Campus-qualified names such as "CSE-C02" would never match an equality filter
+and would only add dead volume. The campus code stays in faculty names, course
+codes and locations, so campuses remain distinguishable.
+
+Rows go in with executemany() in --batch-size chunks. mysql.connector turns
+each chunk into one multi-row INSERT. Keys are assigned here, so foreign key
+checks are off during the load. The output is deterministic for a given --seed.
+
+Usage (from the repo root):
+    python benchmarks/seed_database.py --database campus_bot_bench
+    python benchmarks/generate_campus_data.py --database campus_bot_bench --scale 10
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import seed_database
+
+BRANCHES = ["CSE", "ISE", "ECE", "AI&ML", "ME", "CV", "EEE", "CSBS"]
+SECTIONS = "ABCD"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+LECTURE_SLOTS = [(9, 0, 10, 0), (10, 0, 11, 0), (11, 30, 12, 30), (12, 30, 13, 30), (14, 30, 15, 30), (15, 30, 16, 30)]
+LAB_SLOT = (14, 30, 16, 30)
+FACULTY_PER_CAMPUS = 120
+COURSES_PER_CAMPUS = 64
+COURSES_PER_CLASS_GROUP = 6 # Per branch/section/year
+COMPANIES_PER_CAMPUS = 100
+EVENTS_PER_CAMPUS = 40
+
+FIRST_NAMES = ["Anitha", "Bharath", "Chethan", "Deepa", "Girish", "Harsha", "Kavya", "Lakshmi", "Manjunath", "Nandini",
+               "Pavan", "Rashmi", "Sandeep", "Shruthi", "Suresh", "Vidya", "Vinay", "Yashas", "Pooja", "Ramesh"]
+SURNAMES = ["Rao", "Kumar", "Shetty", "Hegde", "Gowda", "Prasad", "Murthy", "Bhat", "Naik", "Iyer", "Reddy", "Acharya"]
+TITLES = ["Dr.", "Prof.", "Mrs.", "Mr.", "Ms."]
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Data Structures", "Operating Systems", "Computer Networks",
+            "Machine Learning", "Signals and Systems", "Thermodynamics", "Fluid Mechanics", "Control Systems",
+            "Database Systems", "Compiler Design", "Power Electronics", "Structural Analysis", "Digital Design"]
+CTC_TYPES = ["Dream", "Open Dream", "Mass", "Core", "Startup"]
+EVENT_KINDS = ["Hackathon", "Tech Fest", "Cultural Night", "Guest Lecture", "Workshop", "Sports Meet", "Alumni Talk"]
+
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _max_id(cursor, table, column):
+    cursor.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def build_campus(campus, rng, faculty_start, class_start):
+    """All rows for one synthetic campus, keyed from faculty_start / class_start."""
+    code = f"C{campus:02d}"
+    faculty = []
+    for n in range(FACULTY_PER_CAMPUS):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+        faculty_id = faculty_start + n
+        faculty.append((
+            faculty_id,
+            f"{rng.choice(TITLES)} {first} {last} {code}-{n:03d}",
+            f"{first.lower()}.{last.lower()}.{faculty_id}@{code.lower()}.campus.edu",
+            BRANCHES[n % len(BRANCHES)],
+            f"Block {n % 6 + 1}, Room {100 + n}",
+        ))
+
+    courses = [
+        (f"{code}{branch[:2]}{n:03d}", f"{SUBJECTS[n % len(SUBJECTS)]} {n // len(SUBJECTS) + 1}", branch)
+        for n in range(COURSES_PER_CAMPUS)
+        for branch in [BRANCHES[n % len(BRANCHES)]]
+    ]
+
+    classes, slots = [], []
+    class_id = class_start
+    for b, branch in enumerate(BRANCHES):
+        branch_courses = [course for n, course in enumerate(courses) if n % len(BRANCHES) == b] or courses
+        for section in SECTIONS:
+            for year in range(1, 5):
+                taken = set() # (day, slot) already used by this class group
+                for n in range(COURSES_PER_CLASS_GROUP):
+                    course_code = branch_courses[(year + n) % len(branch_courses)][0]
+                    is_lab = n == COURSES_PER_CLASS_GROUP - 1
+                    faculty_id = None if rng.random() < 0.02 else faculty[(b * 15 + n * 3 + year) % FACULTY_PER_CAMPUS][0]
+                    classes.append((class_id, course_code, faculty_id, year, branch, section,
+                                    "Lab" if is_lab else "Lecture", f"{section}1" if is_lab else None))
+                    for _ in range(1 if is_lab else 3):
+                        for _attempt in range(20):
+                            day = rng.choice(DAYS)
+                            hours = LAB_SLOT if is_lab else rng.choice(LECTURE_SLOTS)
+                            if (day, hours) not in taken:
+                                taken.add((day, hours))
+                                break
+                        start = datetime.time(hours[0], hours[1])
+                        end = datetime.time(hours[2], hours[3])
+                        room = None if is_lab else f"{year}{SECTIONS.index(section)}{b}"
+                        location = f"{branch} LAB-{year}, {code}" if is_lab else f"Block {b % 6 + 1}, {code}"
+                        slots.append((class_id, day, start, end, room, location))
+                    class_id += 1
+
+    companies = [
+        (f"{rng.choice(['Infy', 'Tata', 'Bosch', 'Cisco', 'Intuit', 'Wipro', 'Siemens', 'Oracle'])} {code} {n:03d}",
+         None if rng.random() < 0.05 else round(rng.uniform(3.0, 45.0), 2),
+         rng.randint(0, 15),
+         rng.choice(CTC_TYPES))
+        for n in range(COMPANIES_PER_CAMPUS)
+    ]
+
+    first_day = datetime.date(2025, 1, 1)
+    events = [
+        (f"{EVENT_KINDS[n % len(EVENT_KINDS)]} {code} #{n}",
+         first_day + datetime.timedelta(days=rng.randint(0, 700)),
+         f"{EVENT_KINDS[n % len(EVENT_KINDS)]} organised at campus {code}.")
+        for n in range(EVENTS_PER_CAMPUS)
+    ]
+    return {'faculty': faculty, 'courses': courses, 'classes': classes, 'timetable_slots': slots,
+            'placement_companies': companies, 'events': events}
+
+
+INSERTS = {
+    'faculty': "INSERT INTO faculty (id, name, email, department, office_location) VALUES (%s, %s, %s, %s, %s)",
+    'courses': "INSERT INTO courses (course_code, course_name, department) VALUES (%s, %s, %s)",
+    'classes': ("INSERT INTO classes (class_id, course_code, faculty_id, study_year, branch, section, class_type, lab_batch) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"),
+    'timetable_slots': ("INSERT INTO timetable_slots (class_id, day_of_week, start_time, end_time, room_no, location) "
+                        "VALUES (%s, %s, %s, %s, %s, %s)"),
+    'placement_companies': "INSERT INTO placement_companies (company_name, ctc, num_selects, ctc_type) VALUES (%s, %s, %s, %s)",
+    'events': "INSERT INTO events (title, event_date, description) VALUES (%s, %s, %s)",
+}
+
+
+def generate(conn, scale, seed=42, batch_size=1000):
+    """Adds scale - 1 campuses to the connected database. Returns rows inserted per table."""
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    inserted = {table: 0 for table in INSERTS}
+    cursor.execute("SET foreign_key_checks = 0")
+    try:
+        faculty_start = _max_id(cursor, "faculty", "id") + 1
+        class_start = _max_id(cursor, "classes", "class_id") + 1
+        for campus in range(2, scale + 1):
+            rows = build_campus(campus, rng, faculty_start, class_start)
+            faculty_start += len(rows['faculty'])
+            class_start += len(rows['classes'])
+            for table, statement in INSERTS.items(): # Parents before children
+                for chunk in _batches(rows[table], batch_size):
+                    cursor.executemany(statement, chunk)
+                inserted[table] += len(rows[table])
+            conn.commit()
+    finally:
+        cursor.execute("SET foreign_key_checks = 1")
+        cursor.close()
+    return inserted
+
+
+def table_counts(conn, tables=tuple(INSERTS)):
+    cursor = conn.cursor()
+    counts = {}
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    cursor.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=seed_database.DEFAULT_DATABASE)
+    parser.add_argument("--scale", type=int, default=10, help="Total campuses, the seeded one included")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reseed", action="store_true", help="Recreate the database from schema4.sql first")
+    args = parser.parse_args()
+
+    if args.reseed:
+        seed_database.seed(args.database, migrations=True)
+    conn = seed_database.connect_server(args.database)
+    try:
+        start = time.perf_counter()
+        inserted = generate(conn, args.scale, args.seed, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"Inserted {sum(inserted.values())} rows for {args.scale - 1} synthetic campuses in {elapsed:.1f} s "
+              f"({sum(inserted.values()) / max(elapsed, 1e-9):.0f} rows/s)")
+        for table, count in table_counts(conn).items():
+            print(f"  {table:<20} {count:>9} rows")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+HTTP load test for a running bot: requests per second and latency percentiles.
+
+Fires the labeled queries in benchmarks/intent_queries.jsonl at /chat (or, with
+--twilio, as form-encoded webhooks at /twilio, one sender per simulated user)
+from --concurrency parallel clients, and prints one line per target URL so the
+two server modes can be compared side by side:
+
+    python app.py                          # Flask[async] dev server on :5000
+    ASGI_PORT=5001 python asgi.py          # ASGI, one long-lived loop, on :5001
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --url http://127.0.0.1:5001
+
+Both servers call the real Gemini API and MySQL unless pointed elsewhere, so
+results mix server overhead with upstream latency; compare runs made back to back.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import time
+
+import aiohttp
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_queries.jsonl")
+
+
+def load_messages(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line)['query'] for line in f if line.strip()]
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_target(url, messages, total, concurrency, twilio, timeout):
+    counter = itertools.count()
+    latencies, errors = [], 0
+
+    async def client(client_id, session):
+        nonlocal errors
+        while True:
+            n = next(counter)
+            if n >= total:
+                return
+            message = messages[n % len(messages)]
+            start = time.perf_counter()
+            try:
+                if twilio:
+                    form = {'Body': message, 'From': f"whatsapp:+9100000{client_id:05d}"}
+                    response = await session.post(f"{url}/twilio", data=form)
+                else:
+                    response = await session.post(f"{url}/chat", json={'message': message})
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+                    continue
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i, session) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def report(url, latencies, errors, elapsed):
+    if not latencies:
+        print(f"  {url:<28}: no successful requests ({errors} errors)")
+        return
+    ordered = sorted(latencies)
+    print(
+        f"  {url:<28}: {len(latencies) / elapsed:7.1f} req/s   p50 {statistics.median(ordered):7.1f} ms   "
+        f"p95 {percentile(ordered, 0.95):7.1f} ms   p99 {percentile(ordered, 0.99):7.1f} ms   errors {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", required=True, help="Server base URL (repeat to compare)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--twilio", action="store_true", help="POST Twilio-style webhooks to /twilio instead of /chat")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    messages = load_messages(args.queries)
+    endpoint = "/twilio" if args.twilio else "/chat"
+    print(f"{args.requests} requests to {endpoint}, concurrency {args.concurrency}")
+    for url in args.url:
+        url = url.rstrip('/')
+        report(url, *asyncio.run(run_target(url, messages, args.requests, args.concurrency, args.twilio, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+End-to-end load test with no external services: the real app (asgi.py under
+uvicorn) against local stand-ins for everything it talks to.
+
+- Gemini: benchmarks/fake_gemini.py, canned intent JSON for the replayed
+  queries, with configurable latency, 503 rate and malformed-JSON rate.
+- MySQL: a bench database (default campus_bot_bench) recreated from
+  schema4.sql by benchmarks/seed_database.py. Needs a reachable MySQL server
+  (DB_HOST / DB_USER / DB_PASS); DB_NAME is ignored.
+- Twilio: benchmarks/fake_twilio.py for --twilio runs with async replies.
+
+The corpus (student_queries.jsonl by default) is replayed at --concurrency
+through load_test.run_target, then the run is reported as:
+  latency     req/s and p50/p95/p99 of the /chat or /twilio responses
+  per message Gemini calls (HTTP attempts, by kind), Gemini retries and SQL
+              queries, from the app's own counters in metrics.py
+
+The intent cache is off by default so every replayed message reaches the
+intent step again; the local intent router stays on, as in production.
+
+Usage (from the repo root):
+    python benchmarks/offline_load_test.py --requests 500 --concurrency 20 --gemini-ms 600
+    python benchmarks/offline_load_test.py --twilio --gemini-error-rate 0.05 --gemini-malformed-rate 0.01
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import mysql.connector
+from dotenv import load_dotenv
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import load_test
+import seed_database
+from fake_gemini import FakeGemini, DEFAULT_CORPUS
+from fake_twilio import FakeTwilio
+
+
+def configure_environment(args):
+    """Points the app at the stand-ins. Must run before app / asgi are imported."""
+    load_dotenv(os.path.join(seed_database.REPO_ROOT, ".env")) # DB credentials; the rest is overridden below
+    os.environ.setdefault("DB_HOST", "127.0.0.1")
+    os.environ.update({
+        "GEMINI_API_KEY": "offline",
+        "GEMINI_API_BASE_URL": f"http://127.0.0.1:{args.gemini_port}/v1beta/models/",
+        "DB_NAME": args.database,
+        "INTENT_CACHE_ENABLED": "true" if args.intent_cache else "false",
+        "INTENT_ROUTER_ENABLED": "false" if args.no_router else "true",
+        "CONVERSATION_STORE": "memory",
+        "LOG_LEVEL": args.log_level,
+    })
+    os.environ.pop("INTENT_CACHE_FILE", None)
+    if args.twilio:
+        os.environ.update({
+            "TWILIO_ASYNC_REPLIES": "true",
+            "TWILIO_API_BASE_URL": f"http://127.0.0.1:{args.twilio_port}",
+            "TWILIO_ACCOUNT_SID": "ACoffline",
+            "TWILIO_AUTH_TOKEN": "offline",
+        })
+
+
+def start_server(application, port):
+    """Runs uvicorn (lifespan on) on a background thread. Returns the server once it accepts requests."""
+    import uvicorn
+
+    config = uvicorn.Config(application, host="127.0.0.1", port=port, lifespan="on", log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise SystemExit("The app did not start. Is MySQL reachable with DB_HOST/DB_USER/DB_PASS?")
+        time.sleep(0.05)
+    server.thread = thread
+    return server
+
+
+def snapshot(metrics):
+    gemini = metrics.GEMINI_CALLS.collect()
+    return {
+        'gemini_intent': sum(count for (kind, _), count in gemini.items() if kind == 'intent'),
+        'gemini_response': sum(count for (kind, _), count in gemini.items() if kind == 'response'),
+        'gemini_retries': sum(metrics.GEMINI_RETRIES.collect().values()),
+        'db_queries': sum(metrics.DB_QUERIES.collect().values()),
+        'db_errors': metrics.DB_QUERIES.collect().get(('error',), 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--twilio", action="store_true", help="Replay as /twilio webhooks with async replies to the fake Twilio")
+    parser.add_argument("--queries", default=DEFAULT_CORPUS, help="Replayed corpus, also the fake Gemini's answers")
+    parser.add_argument("--gemini-ms", type=float, default=600.0, help="Fake Gemini latency per call")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Share of Gemini calls answered with a 503")
+    parser.add_argument("--gemini-malformed-rate", type=float, default=0.0, help="Share answered with broken JSON")
+    parser.add_argument("--twilio-ms", type=float, default=100.0, help="Fake Twilio API latency")
+    parser.add_argument("--database", default=seed_database.DEFAULT_DATABASE)
+    parser.add_argument("--no-seed", action="store_true", help="Reuse the bench database as it is")
+    parser.add_argument("--intent-cache", action="store_true", help="Keep the Gemini intent cache on")
+    parser.add_argument("--no-router", action="store_true", help="Send every message to Gemini for its intent")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--gemini-port", type=int, default=8090)
+    parser.add_argument("--twilio-port", type=int, default=8089)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    configure_environment(args)
+    if not args.no_seed:
+        try:
+            executed, _ = seed_database.seed(args.database, migrations=True)
+        except mysql.connector.Error as err:
+            raise SystemExit(f"Could not seed {args.database}: {err}. Set DB_HOST/DB_USER/DB_PASS for a MySQL server.")
+        print(f"Seeded {args.database} from schema4.sql ({executed} statements)")
+
+    gemini = FakeGemini(args.gemini_ms, args.gemini_error_rate, args.gemini_malformed_rate, args.queries).start(args.gemini_port)
+    twilio = FakeTwilio(latency_ms=args.twilio_ms).start(args.twilio_port) if args.twilio else None
+
+    import asgi
+    import metrics
+
+    server = start_server(asgi.application, args.port)
+    try:
+        messages = load_test.load_messages(args.queries)
+        endpoint = "/twilio" if args.twilio else "/chat"
+        print(f"{args.requests} requests to {endpoint}, concurrency {args.concurrency}, {len(messages)} distinct queries, "
+              f"Gemini {args.gemini_ms:.0f} ms ({args.gemini_error_rate:.0%} 503, {args.gemini_malformed_rate:.0%} malformed)")
+
+        before = snapshot(metrics)
+        url = f"http://127.0.0.1:{args.port}"
+        latencies, errors, elapsed = asyncio.run(
+            load_test.run_target(url, messages, args.requests, args.concurrency, args.twilio, args.timeout)
+        )
+        if twilio is not None and not twilio.wait_for(args.requests, timeout=args.timeout):
+            print(f"  only {len(twilio.messages)}/{args.requests} replies reached the fake Twilio API")
+        after = snapshot(metrics)
+    finally:
+        server.should_exit = True
+        server.thread.join(timeout=30)
+
+    load_test.report(url, latencies, errors, elapsed)
+    handled = args.requests
+    delta = {key: after[key] - before[key] for key in after}
+    print(
+        f"  per message: Gemini calls {(delta['gemini_intent'] + delta['gemini_response']) / handled:.2f} "
+        f"(intent {delta['gemini_intent'] / handled:.2f}, response {delta['gemini_response'] / handled:.2f}, "
+        f"retries {delta['gemini_retries'] / handled:.2f})   "
+        f"DB queries {delta['db_queries'] / handled:.2f} (errors {delta['db_errors']})"
+    )
+    print(f"  fake Gemini: {gemini.stats}")
+    if twilio is not None:
+        print(f"  fake Twilio: {len(twilio.messages)} replies delivered")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Creates a throwaway MySQL database for benchmarks and loads schema4.sql into it.
+
+schema4.sql is written for the production database (it switches to campus_bot4
+with USE), so the USE lines are skipped and every statement runs against the
+bench database instead. The files in migrations/ can be applied after it.
+
+Connection settings come from DB_HOST / DB_USER / DB_PASS like the app;
+the database name is --database (default campus_bot_bench), never DB_NAME, so
+the real data is not touched.
+
+Usage (from the repo root):
+    python benchmarks/seed_database.py --database campus_bot_bench --migrations
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+
+import mysql.connector
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from dotenv import load_dotenv
+
+SCHEMA_PATH = os.path.join(REPO_ROOT, "schema4.sql")
+MIGRATIONS_DIR = os.path.join(REPO_ROOT, "migrations")
+DEFAULT_DATABASE = "campus_bot_bench"
+USE_STATEMENT = re.compile(r"^\s*use\s+\w+\s*$", re.IGNORECASE)
+SAFE_NAME = re.compile(r"^\w+$")
+
+
+def split_statements(sql):
+    """Splits a SQL script on semicolons outside quotes and -- / # comments."""
+    statements, current = [], []
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            current.append(char)
+            if char == '\\' and i + 1 < len(sql):
+                current.append(sql[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            current.append(char)
+        elif sql.startswith('--', i) or char == '#':
+            end = sql.find('\n', i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def run_script(cursor, path):
+    """Runs every statement of a .sql file except USE. Returns the number executed."""
+    with open(path, 'r', encoding='utf-8') as f:
+        statements = split_statements(f.read())
+    executed = 0
+    for statement in statements:
+        if USE_STATEMENT.match(statement):
+            continue
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall() # The script's own verification SELECTs / EXPLAINs
+        executed += 1
+    return executed
+
+
+def connect_server(database=None):
+    load_dotenv(os.path.join(REPO_ROOT, ".env"))
+    return mysql.connector.connect(
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASS", ""),
+        port=3306, # Same as database.connect()
+        database=database,
+    )
+
+
+def seed(database=DEFAULT_DATABASE, migrations=False, schema_path=SCHEMA_PATH):
+    """Drops and recreates `database` from schema4.sql (and optionally migrations/*.sql)."""
+    if not SAFE_NAME.match(database):
+        raise ValueError(f"Invalid database name: {database!r}")
+    conn = connect_server()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cursor.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4")
+        cursor.execute(f"USE `{database}`")
+        executed = run_script(cursor, schema_path)
+        applied = []
+        if migrations:
+            for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+                try:
+                    run_script(cursor, path)
+                    applied.append(os.path.basename(path))
+                except mysql.connector.Error as err:
+                    # 001 and 002 add columns and indexes the current schema4.sql already has
+                    print(f"  skipped {os.path.basename(path)}: {err.msg}")
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return executed, applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=DEFAULT_DATABASE)
+    parser.add_argument("--schema", default=SCHEMA_PATH)
+    parser.add_argument("--migrations", action="store_true", help="Also apply migrations/*.sql in order")
+    args = parser.parse_args()
+    executed, applied = seed(args.database, args.migrations, args.schema)
+    print(f"Seeded {args.database}: {executed} statements from {os.path.basename(args.schema)}"
+          + (f", migrations {', '.join(applied)}" if applied else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Small thread-safe LRU cache with per-entry expiry.
+
+Used by database.py for the static reference tables. Counters are kept so hit
+ratios can be logged or exported.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object() # Returned by get() on a miss, since None can be a cached value
+
+
+class TTLCache:
+    """LRU cache bounded to `maxsize` entries, each expiring `ttl` seconds after it was set."""
+
+    def __init__(self, maxsize=256, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING, count_miss=True):
+        """
+        Returns the cached value, or `default` if the key is missing or expired.
+        Pass count_miss=False for a probe that is followed by a normal get() on a miss.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            if count_miss:
+                self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Stores a value, evicting the least recently used entry if the cache is full."""
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=MISSING):
+        """Drops one key, or every entry when called without a key."""
+        with self._lock:
+            if key is MISSING:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def items(self):
+        """Snapshot of the live (unexpired) entries, oldest first."""
+        now = self._clock()
+        with self._lock:
+            return [(key, value) for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
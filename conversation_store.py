@@ -0,0 +1,182 @@
+"""
+Where each user's DialogueManager lives between messages.
+
+app.py used to keep every manager in a module-level dict forever, one per
+WhatsApp number that ever wrote in. Stores here are bounded instead:
+
+- Idle managers (no open form, no pending action) are not stored at all; a
+  fresh DialogueManager behaves exactly the same.
+- Entries expire CONVERSATION_TTL seconds after the user's last message and the
+  least recently active ones are dropped past CONVERSATION_MAX_USERS.
+
+Backends (CONVERSATION_STORE):
+- memory: TTLCache of live manager objects, for a single process.
+- sqlite: JSON state in a local SQLite file (WAL mode), so several worker
+  processes on one machine share conversations. Stands in for a networked
+  store (Redis, MySQL) behind the same get()/save() interface.
+
+The manager class must provide user_id, is_idle(), to_state() and
+from_state(user_id, state).
+
+process_message() runs on the event loop, so it uses get_async()/save_async().
+The SQLite backend runs those on its own small thread pool, like the MySQL calls
+in async_database.py, so a slow disk or a locked WAL never stalls the loop.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_STORE = os.getenv("CONVERSATION_STORE", "memory") # memory | sqlite
+CONVERSATION_TTL = int(os.getenv("CONVERSATION_TTL", str(6 * 3600))) # Seconds since the last message
+CONVERSATION_MAX_USERS = int(os.getenv("CONVERSATION_MAX_USERS", "10000"))
+CONVERSATION_DB_PATH = os.getenv("CONVERSATION_DB_PATH", "conversations.sqlite3")
+SQLITE_PURGE_EVERY = 200 # Writes between sweeps of expired / over-cap rows
+CONVERSATION_STORE_THREADS = int(os.getenv("CONVERSATION_STORE_THREADS", "2")) # SQLite worker threads
+
+
+class MemoryConversationStore:
+    """Live manager objects in an LRU cache with expiry (one process only)."""
+
+    def __init__(self, manager_class, max_users=CONVERSATION_MAX_USERS, ttl=CONVERSATION_TTL):
+        self.manager_class = manager_class
+        self._cache = TTLCache(maxsize=max_users, ttl=ttl)
+
+    def get(self, user_id):
+        manager = self._cache.get(user_id)
+        return None if manager is MISSING else manager
+
+    def save(self, manager):
+        if manager.is_idle():
+            self._cache.invalidate(manager.user_id)
+        else:
+            self._cache.set(manager.user_id, manager) # Also restarts the TTL
+
+    async def get_async(self, user_id):
+        return self.get(user_id) # In-memory: nothing to offload
+
+    async def save_async(self, manager):
+        self.save(manager)
+
+    def delete(self, user_id):
+        self._cache.invalidate(user_id)
+
+    def stats(self):
+        return dict(self._cache.stats(), backend='memory')
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class SQLiteConversationStore:
+    """Manager state as JSON rows in SQLite, shared by every process that opens the file."""
+
+    def __init__(self, manager_class, path=CONVERSATION_DB_PATH, max_users=CONVERSATION_MAX_USERS,
+                 ttl=CONVERSATION_TTL, clock=time.time):
+        self.manager_class = manager_class
+        self.path = path
+        self.max_users = max_users
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local() # sqlite3 connections can't be shared across threads
+        self._writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=CONVERSATION_STORE_THREADS, thread_name_prefix="conversation_store")
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                " user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations (updated_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None) # Autocommit
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._connection().execute(
+            "SELECT state FROM conversations WHERE user_id = ? AND updated_at > ?",
+            (user_id, self._clock() - self.ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return self.manager_class.from_state(user_id, json.loads(row[0]))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Dropping unreadable conversation state for {user_id}: {e}")
+            self.delete(user_id)
+            return None
+
+    def save(self, manager):
+        conn = self._connection()
+        if manager.is_idle():
+            conn.execute("DELETE FROM conversations WHERE user_id = ?", (manager.user_id,))
+            return
+        conn.execute(
+            "INSERT INTO conversations (user_id, state, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+            (manager.user_id, json.dumps(manager.to_state(), default=str), self._clock()),
+        )
+        self._writes += 1
+        if self._writes % SQLITE_PURGE_EVERY == 0:
+            self.purge()
+
+    async def get_async(self, user_id):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.get, user_id)
+
+    async def save_async(self, manager):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.save, manager)
+
+    def delete(self, user_id):
+        self._connection().execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+
+    def purge(self):
+        """Deletes expired rows, then the least recently active ones beyond max_users."""
+        conn = self._connection()
+        expired = conn.execute("DELETE FROM conversations WHERE updated_at <= ?", (self._clock() - self.ttl,)).rowcount
+        over_cap = conn.execute(
+            "DELETE FROM conversations WHERE user_id IN ("
+            " SELECT user_id FROM conversations ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_users,),
+        ).rowcount
+        if expired or over_cap:
+            logger.info(f"Conversation store purged {expired} expired and {over_cap} least recent conversations.")
+
+    def stats(self):
+        size = self._connection().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        return {'backend': 'sqlite', 'size': size, 'maxsize': self.max_users, 'ttl': self.ttl, 'path': self.path}
+
+    def close(self):
+        self._executor.shutdown(wait=True) # Lets pending saves finish
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __len__(self):
+        return self.stats()['size']
+
+
+def create_store(manager_class, backend=CONVERSATION_STORE):
+    """Builds the store selected by CONVERSATION_STORE."""
+    if backend == 'sqlite':
+        logger.info(f"Conversation store: SQLite at {CONVERSATION_DB_PATH}.")
+        return SQLiteConversationStore(manager_class)
+    if backend != 'memory':
+        logger.warning(f"Unknown CONVERSATION_STORE '{backend}'. Using memory.")
+    return MemoryConversationStore(manager_class)
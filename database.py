@@ -3,14 +3,53 @@ import mysql.connector
 from mysql.connector import pooling
 import datetime # Added for timedelta conversion
 import logging # Added for logging
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor # For the async data-access layer
+
+import hashlib
+import random
+import re
+
+import faculty_index
+import metrics
+import request_scope
+import timetable_engine
+import tracing
+from cache import TTLCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# --- NEW: Slow-query log ---
+# Queries at or over SLOW_QUERY_MS are logged at WARNING with a fingerprint of the
+# SQL and a hash of the params, never the values. Full SQL only goes out at DEBUG.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0")) # Fraction of slow queries logged
+
+# --- NEW: Query capture for query_audit.py ---
+# While this is a list, execute_query() appends every (query, params) it runs to it.
+query_capture = None
 
 # Global connection pool
 db_pool = None
 db_config = {} # Store config for logging
 
+# --- NEW: Bounded executor for async callers (see async_database.py) ---
+# The pool holds one connection per executor worker plus DB_POOL_RESERVED for callers
+# that query outside the executor (timetable refresh thread, faculty-index rebuild,
+# query_audit), so a worker thread normally never waits on the pool. If it is empty
+# anyway, execute_query() waits up to DB_POOL_TIMEOUT seconds for a connection.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_RESERVED = int(os.getenv("DB_POOL_RESERVED", "2"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+MAX_POOL_CONNECTIONS = pooling.CNX_POOL_MAXSIZE # mysql.connector refuses bigger pools
+DB_POOL_CONNECTIONS = min(DB_POOL_SIZE + DB_POOL_RESERVED, MAX_POOL_CONNECTIONS)
+db_executor = None
+
 def connect():
     """Initializes the MySQL connection pool."""
-    global db_pool, db_config # Include db_config
+    global db_pool, db_config, db_executor # Include db_config
     try:
         # Store config details for logging
         db_config = {
@@ -23,7 +62,7 @@ def connect():
 
         db_pool = mysql.connector.pooling.MySQLConnectionPool(
             pool_name="chatbot_pool",
-            pool_size=5,
+            pool_size=DB_POOL_CONNECTIONS,
             pool_reset_session=True,
             host=db_config["host"],
             user=os.getenv("DB_USER"), # Fetch user directly here
@@ -31,68 +70,365 @@ def connect():
             database=db_config["database"],
             port=db_config["port"]
         )
-        print(f"Database connection pool created successfully for DB: {db_config['database']} on Host: {db_config['host']}") # Added more detail
+        logger.info(f"Database connection pool created successfully for DB: {db_config['database']} on Host: {db_config['host']}")
+
+        if db_executor is None:
+            db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db_worker")
+
+        # Warm the faculty name index so the first spell-check doesn't pay for the build
+        invalidate_faculty_index()
+        get_faculty_name_index()
+
+        if TIMETABLE_ENGINE_ENABLED:
+            timetable_store.start()
     except mysql.connector.Error as err:
-        print(f"Error creating connection pool: {err}")
+        logger.error(f"Error creating connection pool: {err}")
         raise
 
 def disconnect():
     """Closes all connections in the pool (not strictly necessary, but good practice)."""
     # In a real app, you'd just let the pool manage this.
-    print("Database connection pool shutting down.")
-    pass
+    global db_executor
+    logger.info("Database connection pool shutting down.")
+    timetable_store.stop()
+    if db_executor is not None:
+        db_executor.shutdown(wait=True)
+        db_executor = None
+
+_SQL_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+_SQL_IN_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+
+
+@functools.lru_cache(maxsize=512)
+def query_fingerprint(query):
+    """
+    Returns (fingerprint, shape) for a SQL string: literals become ?, IN lists
+    collapse to (...) and whitespace is squeezed, so every call of the same
+    query (whatever its values) shares one fingerprint.
+    """
+    shape = " ".join(query.split())
+    shape = _SQL_LITERALS.sub("?", shape)
+    shape = _SQL_IN_LISTS.sub("(...)", shape)
+    return hashlib.sha1(shape.encode()).hexdigest()[:12], shape
+
+
+def params_hash(params):
+    """Stable short hash of the bound values, so repeats can be spotted without logging them."""
+    return hashlib.sha1(repr(params).encode()).hexdigest()[:12] if params else "-"
+
+
+def _log_slow_query(query, params, duration_ms, rows):
+    if SLOW_QUERY_SAMPLE_RATE < 1.0 and random.random() >= SLOW_QUERY_SAMPLE_RATE:
+        return
+    fingerprint, shape = query_fingerprint(query)
+    logger.warning(
+        f"Slow query {fingerprint}: {duration_ms:.1f} ms",
+        extra={'fields': {
+            'fingerprint': fingerprint,
+            'params_hash': params_hash(params),
+            'duration_ms': round(duration_ms, 1),
+            'rows': rows,
+            'sql_shape': shape[:160],
+        }},
+    )
+
+
+def _convert_row_types(results):
+    """
+    Converts TIME columns, which mysql.connector returns as timedelta, to
+    datetime.time in place for the formatters. Returns the same list.
+    """
+    for row in results:
+        for key, value in row.items():
+            if isinstance(value, datetime.timedelta):
+                total_seconds = int(value.total_seconds())
+                # Ensure seconds are within a day for time object creation
+                if 0 <= total_seconds < 86400:
+                    hours, remainder = divmod(total_seconds, 3600)
+                    minutes, seconds = divmod(remainder, 60)
+                    try:
+                        row[key] = datetime.time(hours, minutes, seconds) # Keep as time object for formatter
+                    except ValueError:
+                        row[key] = f"Invalid Time ({total_seconds}s)"
+                else:
+                    # Handle durations >= 24 hours if necessary, maybe as string
+                    row[key] = f"Duration: {value}"
+    return results
+
+
+@tracing.traced('db.pool_wait') # Inside db.query: the checkout part of it
+def _get_connection():
+    """
+    Takes a connection from the pool. mysql.connector raises PoolError at once when
+    the pool is empty, so retry until one is returned or DB_POOL_TIMEOUT runs out.
+    """
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    delay = 0.005
+    while True:
+        try:
+            return db_pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                logger.error(f"No pooled connection free after {DB_POOL_TIMEOUT:.1f} s (pool size {DB_POOL_CONNECTIONS})")
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
 
+@tracing.traced('db.query')
 def execute_query(query, params=None):
     """Executes a SQL SELECT query using a connection from the pool."""
     if not db_pool:
         raise Exception("Database pool is not initialized. Call connect() first.")
+    if query_capture is not None:
+        query_capture.append((query, params))
 
-    # --- ADDED LOGGING ---
-    print(f"Executing query on DB: {db_config.get('database', 'N/A')} @ Host: {db_config.get('host', 'N/A')}")
-    print(f"SQL Query: {query}") # Log the query
-    print(f"SQL Params: {params}") # Log the parameters
-    # --- END LOGGING ---
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"SQL on {db_config.get('database', 'N/A')}: {' '.join(query.split())} params={params}")
 
     conn = None
     cursor = None
+    rows = None
+    started = time.perf_counter()
     try:
-        conn = db_pool.get_connection()
+        conn = _get_connection()
+        metrics.DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - started)
         cursor = conn.cursor(dictionary=True) # Returns results as dictionaries
 
+        request_scope.count_query()
         cursor.execute(query, params or ())
         results = cursor.fetchall()
-        print(f"Query returned {len(results)} results.") # Log result count
-
-        # --- Convert timedelta to time object ---
-        for row in results:
-            for key, value in row.items():
-                if isinstance(value, datetime.timedelta):
-                    total_seconds = int(value.total_seconds())
-                    # Ensure seconds are within a day for time object creation
-                    if 0 <= total_seconds < 86400:
-                         hours, remainder = divmod(total_seconds, 3600)
-                         minutes, seconds = divmod(remainder, 60)
-                         try:
-                             time_obj = datetime.time(hours, minutes, seconds)
-                             row[key] = time_obj # Keep as time object for formatter
-                         except ValueError:
-                              row[key] = f"Invalid Time ({total_seconds}s)"
-                    else:
-                         # Handle durations >= 24 hours if necessary, maybe as string
-                         row[key] = f"Duration: {value}"
-
-
-        return results
+        rows = len(results)
+        tracing.count('db.rows', rows)
+        metrics.DB_ROWS.observe(rows)
+        metrics.DB_QUERIES.inc('ok')
+        return _convert_row_types(results)
 
     except mysql.connector.Error as err:
-        print(f"SQL Error: {err}")
-        # Query and Params already logged above
+        fingerprint, _ = query_fingerprint(query)
+        logger.error(f"SQL error in query {fingerprint}: {err}", extra={'fields': {'params_hash': params_hash(params)}})
+        metrics.DB_QUERIES.inc('error')
         return None # Return None on error
     finally:
         if cursor:
             cursor.close()
         if conn:
             conn.close() # Returns the connection to the pool
+        elapsed = time.perf_counter() - started
+        metrics.DB_QUERY_SECONDS.observe(elapsed)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            _log_slow_query(query, params, elapsed * 1000, rows)
+
+
+# --- NEW: Python side of the faculty.name_normalized column ---
+def normalize_name(name):
+    """
+    Normalizes a person's name the same way the `name_normalized` generated column does
+    (lowercase, no spaces, no dots), so lookups are plain indexed equality checks.
+    """
+    return name.replace(' ', '').replace('.', '').lower()
+
+
+# --- NEW: Canonical branch / section / day values ---
+# classes.branch, classes.section and timetable_slots.day_of_week hold a small set
+# of fixed spellings ("CSE", "A", "Monday"). Mapping user input onto them lets the
+# queries use equality, which idx_classes_branch_section_year and
+# idx_slots_class_day_start can serve (LIKE '%x%' cannot use an index).
+BRANCH_ALIASES = {
+    'CS': 'CSE', 'COMPUTERSCIENCE': 'CSE', 'COMPUTERSCIENCEANDENGINEERING': 'CSE',
+    'IS': 'ISE', 'INFORMATIONSCIENCE': 'ISE', 'INFORMATIONSCIENCEANDENGINEERING': 'ISE',
+    'AI&ML': 'AI&ML', 'AIML': 'AI&ML', 'AIANDML': 'AI&ML', 'AI': 'AI&ML', 'ML': 'AI&ML',
+    'ARTIFICIALINTELLIGENCEANDMACHINELEARNING': 'AI&ML',
+}
+
+def canonical_branch(branch):
+    """'cse', 'CS', 'Computer Science' -> 'CSE'; 'ai ml' -> 'AI&ML'. Anything else is stripped and upper-cased."""
+    if not branch:
+        return branch
+    key = re.sub(r"[\s._-]", "", str(branch)).upper()
+    return BRANCH_ALIASES.get(key, str(branch).strip().upper())
+
+def canonical_section(section):
+    """'a', ' A ', 'Section A' -> 'A'."""
+    if not section:
+        return section
+    value = str(section).strip().upper()
+    if value.startswith('SECTION'):
+        value = value[len('SECTION'):].strip()
+    return value
+
+def canonical_day(day):
+    """'mon', 'MONDAY', 'thurs' -> 'Monday', 'Thursday'. Unrecognised values are just title-cased."""
+    if not day:
+        return day
+    value = str(day).strip().lower()
+    if len(value) >= 3:
+        for weekday in timetable_engine.WEEKDAYS:
+            if weekday.lower().startswith(value):
+                return weekday
+    return value.title()
+# --- END NEW ---
+
+
+# --- NEW: In-memory faculty name index (see faculty_index.py) ---
+FACULTY_INDEX_TTL = int(os.getenv("FACULTY_INDEX_TTL", "600")) # Seconds before the index is rebuilt
+_faculty_index = None
+_faculty_index_built_at = 0.0
+_faculty_index_lock = threading.Lock()
+
+def get_faculty_name_index():
+    """
+    Returns the FacultyNameIndex used by get_faculty_location(), building it on first use
+    and rebuilding it from the faculty table once it is older than FACULTY_INDEX_TTL.
+    Returns None if it has never been built successfully (callers fall back to SQL).
+    """
+    global _faculty_index, _faculty_index_built_at
+    if _faculty_index is not None and time.monotonic() - _faculty_index_built_at < FACULTY_INDEX_TTL:
+        return _faculty_index
+
+    # Only one thread rebuilds; the others keep serving from the current index meanwhile
+    if not _faculty_index_lock.acquire(blocking=_faculty_index is None):
+        return _faculty_index
+    try:
+        if _faculty_index is None or time.monotonic() - _faculty_index_built_at >= FACULTY_INDEX_TTL:
+            rows = execute_query("SELECT id, name, office_location FROM faculty")
+            if rows is not None:
+                _faculty_index = faculty_index.FacultyNameIndex(rows)
+                logger.info(f"Faculty name index built with {len(_faculty_index)} names.")
+            else:
+                logger.warning("Could not load faculty names for the index. Keeping the previous one.")
+            # Also on failure, so a DB outage doesn't turn every lookup into a rebuild attempt
+            _faculty_index_built_at = time.monotonic()
+    finally:
+        _faculty_index_lock.release()
+    return _faculty_index
+
+def invalidate_faculty_index():
+    """Marks the faculty name index stale. Call after inserting/renaming faculty."""
+    global _faculty_index_built_at
+    _faculty_index_built_at = 0.0
+
+
+# --- NEW: Read-through cache for static reference tables ---
+# These tables change about once a semester, so FAQ-style questions are served
+# from memory instead of competing for the small connection pool.
+REFERENCE_CACHE_TTLS = { # Seconds, per table
+    'admissions': 6 * 3600,
+    'placements': 6 * 3600,
+    'fees': 6 * 3600,
+    'anti_ragging_squad': 6 * 3600,
+    'dress_code': 24 * 3600,
+    'clubs': 3600,
+    'hostels': 6 * 3600,
+    'transport': 6 * 3600,
+    'scholarship_details': 6 * 3600,
+}
+REFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "128")) # Per table
+REFERENCE_CACHE_ENABLED = os.getenv("REFERENCE_CACHE_ENABLED", "1") != "0"
+
+reference_cache = {
+    table: TTLCache(maxsize=REFERENCE_CACHE_MAX_ENTRIES, ttl=ttl)
+    for table, ttl in REFERENCE_CACHE_TTLS.items()
+}
+
+def _cache_key_part(value):
+    # The LIKE filters are case-insensitive, so "Robotics" and "robotics " share an entry
+    return value.strip().lower() if isinstance(value, str) else value
+
+def cached_reference(table):
+    """Decorator: serves a get_* function for a static table through reference_cache[table]."""
+    def decorator(func):
+        def make_key(args, kwargs):
+            return (
+                func.__name__,
+                tuple(_cache_key_part(a) for a in args),
+                tuple(sorted((k, _cache_key_part(v)) for k, v in kwargs.items())),
+            )
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not REFERENCE_CACHE_ENABLED:
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            rows = reference_cache[table].get(key)
+            if rows is MISSING:
+                rows = func(*args, **kwargs)
+                if rows is None:
+                    return None # SQL error: don't cache it
+                reference_cache[table].set(key, rows)
+            # Hand out copies so a caller mutating a row can't corrupt the cache
+            return [dict(row) for row in rows]
+
+        def peek(*args, **kwargs):
+            """Cache-only lookup: the rows, or MISSING. Lets async callers skip the DB executor on a hit."""
+            if not REFERENCE_CACHE_ENABLED:
+                return MISSING
+            rows = reference_cache[table].get(make_key(args, kwargs), count_miss=False)
+            return rows if rows is MISSING else [dict(row) for row in rows]
+
+        wrapper.peek = peek
+        return wrapper
+    return decorator
+
+def invalidate_reference_cache(table=None):
+    """Drops cached rows for one table (e.g. 'clubs'), or for all of them. Call after editing the data."""
+    tables = [table] if table else list(reference_cache)
+    for name in tables:
+        reference_cache[name].invalidate()
+    logger.info(f"Reference cache invalidated for: {', '.join(tables)}")
+
+def get_reference_cache_stats():
+    """Hit/miss counters per cached table."""
+    return {table: cache.stats() for table, cache in reference_cache.items()}
+
+
+# --- NEW: In-memory timetable read model (see timetable_engine.py) ---
+TIMETABLE_ENGINE_ENABLED = os.getenv("TIMETABLE_ENGINE_ENABLED", "1") != "0"
+TIMETABLE_REFRESH_SECONDS = int(os.getenv("TIMETABLE_REFRESH_SECONDS", "300"))
+
+def _load_timetable_rows():
+    """One join over the four timetable tables; the engine builds its indexes from this."""
+    query = """
+        SELECT
+            t.slot_id, t.day_of_week, t.start_time, t.end_time, t.room_no, t.location,
+            c.class_id, c.branch, c.section, c.study_year, c.class_type, c.lab_batch,
+            c.course_code, co.course_code AS joined_course_code, co.course_name,
+            f.id AS faculty_id, f.name AS faculty_name, f.name_normalized AS faculty_name_normalized
+        FROM timetable_slots t
+        JOIN classes c ON t.class_id = c.class_id
+        LEFT JOIN courses co ON c.course_code = co.course_code
+        LEFT JOIN faculty f ON c.faculty_id = f.id
+    """
+    return execute_query(query)
+
+timetable_store = timetable_engine.TimetableEngine(_load_timetable_rows, refresh_interval=TIMETABLE_REFRESH_SECONDS)
+
+def _timetable_snapshot():
+    """The current timetable snapshot, or None if the engine is off or not loaded (use SQL)."""
+    return timetable_store.snapshot if TIMETABLE_ENGINE_ENABLED else None
+
+def answered_from_snapshot(answer):
+    """
+    Decorator: serves a timetable get_* from the engine snapshot when one is loaded,
+    via answer(snapshot, *args), and runs the decorated SQL version otherwise.
+    The attached inline() is the snapshot-only half (the answer, or MISSING), so
+    async callers answer on the event loop without queueing for the DB executor.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            snapshot = _timetable_snapshot()
+            if snapshot is not None:
+                return answer(snapshot, *args, **kwargs)
+            return func(*args, **kwargs)
+
+        def inline(*args, **kwargs):
+            snapshot = _timetable_snapshot()
+            return MISSING if snapshot is None else answer(snapshot, *args, **kwargs)
+
+        wrapper.inline = inline
+        return wrapper
+    return decorator
 
 
 # --- Database Query Functions for each Intent ---
@@ -101,14 +437,12 @@ def get_faculty_info(name, department, info_type):
     Fetches faculty information.
     NOTE: This function now expects a *confirmed, correct* name, 
     as fuzzy matching is handled by get_faculty_location().
+    Faculty and anti_ragging_squad rows come back from one UNION ALL query.
     """
-    faculty_results = []
-    ragging_results = []
-    final_results = []
     is_exclusive_role_search = False # Flag for searching ONLY faculty by role
     role_keywords_to_search = [] # Keywords to use in the faculty search
 
-    print(f"get_faculty_info called with name='{name}', department='{department}', info_type='{info_type}'") # Debug Input
+    logger.debug(f"get_faculty_info called with name='{name}', department='{department}', info_type='{info_type}'")
 
     primary_search_term = name
     if not name or name.lower() in ['principal', 'dean', 'controller', 'coe']:
@@ -129,12 +463,22 @@ def get_faculty_info(name, department, info_type):
         if matched_role_key:
             is_exclusive_role_search = True
             role_keywords_to_search = role_map[matched_role_key]
-            print(f"Detected EXCLUSIVE role search for '{matched_role_key}' using keywords: {role_keywords_to_search}")
+            logger.debug(f"Detected EXCLUSIVE role search for '{matched_role_key}' using keywords: {role_keywords_to_search}")
 
+    # --- NEW: One round trip for both tables ---
+    # Both SELECTs return the same columns. source_table tells the formatter which
+    # table a row came from; source_order keeps faculty rows ahead of squad rows,
+    # so the de-duplication below prefers the faculty record.
     faculty_query = """
-        SELECT f.id, f.name, f.email, f.department, f.office_location, f.image_url, 'faculty' as source_table
+        SELECT f.id, f.name, f.email, f.department, f.office_location, NULL AS role, NULL AS contact_phone,
+               f.image_url, 'faculty' AS source_table, 0 AS source_order
         FROM faculty f
     """
+    ragging_query = """
+        SELECT NULL AS id, a.name, NULL AS email, a.department, NULL AS office_location, a.role, a.contact_phone,
+               NULL AS image_url, 'anti_ragging' AS source_table, 1 AS source_order
+        FROM anti_ragging_squad a WHERE a.name_normalized = %s
+    """
     faculty_params = []
     faculty_conditions = []
 
@@ -142,11 +486,11 @@ def get_faculty_info(name, department, info_type):
         role_clauses = ["f.department LIKE %s" for _ in role_keywords_to_search]
         faculty_conditions.append(f"( {' OR '.join(role_clauses)} )")
         faculty_params.extend(list(set(role_keywords_to_search)))
-        print(f"Searching faculty table EXCLUSIVELY for roles: {list(set(role_keywords_to_search))}")
+        logger.debug(f"Searching faculty table EXCLUSIVELY for roles: {list(set(role_keywords_to_search))}")
     elif name:
         # --- FIX: Use a normalized, STRICT match ---
-        normalized_name = name.replace(' ', '').replace('.', '').lower()
-        faculty_conditions.append("REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s")
+        normalized_name = normalize_name(name)
+        faculty_conditions.append("f.name_normalized = %s")
         faculty_params.append(normalized_name)
         # --- END FIX ---
         
@@ -157,56 +501,47 @@ def get_faculty_info(name, department, info_type):
          faculty_conditions.append("f.department LIKE %s")
          faculty_params.append(f"%{department}%")
 
+    selects = []
+    params = []
     if faculty_conditions:
-        faculty_query += " WHERE " + " AND ".join(faculty_conditions)
-        faculty_results = execute_query(faculty_query, faculty_params) or []
+        selects.append(faculty_query + " WHERE " + " AND ".join(faculty_conditions))
+        params.extend(faculty_params)
+    if name and not is_exclusive_role_search:
+        # The anti-ragging squad is searched by name as a supplement (not for role searches)
+        selects.append(ragging_query)
+        params.append(normalize_name(name))
+    if not selects:
+        return []
 
-    if is_exclusive_role_search:
-        final_results = faculty_results
-        print("Exclusive role search completed. Using only faculty results.")
-    else:
-        final_results.extend(faculty_results)
-        if name:
-            print("Searching anti_ragging_squad table by name as fallback/supplement...")
-            # --- FIX: Use normalized, STRICT match ---
-            ragging_query = """
-                SELECT a.name, NULL as email, a.department, NULL as office_location, a.role, a.contact_phone, NULL as image_url, 'anti_ragging' as source_table
-                FROM anti_ragging_squad a WHERE REPLACE(REPLACE(LOWER(a.name), ' ', ''), '.', '') = %s
-            """
-            normalized_name_ragging = name.replace(' ', '').replace('.', '').lower()
-            ragging_params = [normalized_name_ragging]
-            # --- END FIX ---
-            ragging_results = execute_query(ragging_query, ragging_params) or []
-            final_results.extend(ragging_results) # Add results
+    query = " UNION ALL ".join(f"({select})" for select in selects) + " ORDER BY source_order"
+    final_results = execute_query(query, params) or []
+    # --- END NEW ---
 
     processed_results = []
     seen_names = set()
     for result in final_results:
+        result.pop('source_order', None)
         current_name = result.get('name')
         if current_name and current_name in seen_names:
-            print(f"Skipping duplicate entry for: {current_name}")
+            logger.debug(f"Skipping duplicate entry for: {current_name}")
             continue
         if current_name:
             seen_names.add(current_name)
-
-        result.setdefault('id', None); result.setdefault('email', None)
-        result.setdefault('office_location', None); result.setdefault('role', None)
-        result.setdefault('contact_phone', None); result.setdefault('image_url', None)
-        result.setdefault('source_table', 'faculty')
         processed_results.append(result)
 
-    print(f"get_faculty_info returning {len(processed_results)} unique result(s).")
+    logger.debug(f"get_faculty_info returning {len(processed_results)} unique result(s).")
     return processed_results
 
 
 # --- MODIFIED FUNCTION ---
+@tracing.traced('db.faculty_check')
 def get_faculty_location(name, branch=None): # <-- MODIFIED
     """
     Fetches faculty name and STATIC office location.
     This is the "checker" function for app.py and also serves the `get_faculty_location` intent.
     Can now also search by role (e.g., name='HOD') and branch.
     """
-    print(f"get_faculty_location (checker / static) called for name: '{name}', branch: '{branch}'") # <-- MODIFIED
+    logger.debug(f"get_faculty_location (checker / static) called for name: '{name}', branch: '{branch}'")
     
     # --- NEW: Step 0: Check for Role-Based Search ---
     role_name = name.lower().strip()
@@ -222,7 +557,7 @@ def get_faculty_location(name, branch=None): # <-- MODIFIED
         role_keywords = ['%controller%', '%coe%']
 
     if role_keywords:
-        print(f"Role search detected for: {role_keywords}")
+        logger.debug(f"Role search detected for: {role_keywords}")
         query_role = """
             SELECT id, name, office_location
             FROM faculty
@@ -245,18 +580,30 @@ def get_faculty_location(name, branch=None): # <-- MODIFIED
         role_results = execute_query(query_role, params_role)
         
         if role_results:
-            print(f"Found {len(role_results)} matches by role.")
+            logger.debug(f"Found {len(role_results)} matches by role.")
             for r in role_results: r['match_type'] = 'exact' # Treat role match as exact
             return role_results
     # --- END NEW ---
 
-    # --- Step 1: Try a normalized, exact-ish match first ---
+    # --- Step 1: In-memory name index (see faculty_index.py) ---
+    # Substring, initials ("mnr") and Jaro-Winkler matches without a DB round trip.
+    # This replaces the old SOUNDEX query, which scanned the table and only compared last names.
+    index = get_faculty_name_index()
+    if index is not None:
+        matches = index.search(name)
+        if matches:
+            logger.debug(f"Found {len(matches)} '{matches[0]['match_type']}' match(es) in the faculty name index.")
+        else:
+            logger.debug("No faculty found by any method.")
+        return matches
+
+    # --- Step 2: Index unavailable, fall back to a normalized, exact-ish match ---
     # This finds "Dr. S Kuzhalvaimozhi" if user types "kuzhalvaimozhi"
-    normalized_name = f"%{name.replace(' ', '').replace('.', '').lower()}%"
+    normalized_name = f"%{normalize_name(name)}%"
     query_exact = """
         SELECT id, name, office_location
         FROM faculty
-        WHERE REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '') LIKE %s
+        WHERE name_normalized LIKE %s
         LIMIT 5
     """
     params_exact = (normalized_name,)
@@ -264,43 +611,28 @@ def get_faculty_location(name, branch=None): # <-- MODIFIED
     exact_results = execute_query(query_exact, params_exact)
     
     if exact_results:
-        print(f"Found {len(exact_results)} exact-ish matches.")
+        logger.debug(f"Found {len(exact_results)} exact-ish matches.")
         # Add 'match_type' for app.py
         for r in exact_results: r['match_type'] = 'exact'
         return exact_results
 
-    # --- Step 2: If no exact match, try SOUNDEX on the last name ---
-    print("No exact match found. Trying SOUNDEX search...")
-    
-    # --- THIS IS THE FIX ---
-    # We compare the SOUNDEX of the DB's last name
-    # to the SOUNDEX of the *user's* last word.
-    query_soundex = """
-        SELECT id, name, office_location
-        FROM faculty
-        WHERE SOUNDEX(SUBSTRING_INDEX(name, ' ', -1)) = SOUNDEX(SUBSTRING_INDEX(%s, ' ', -1))
-        LIMIT 5
-    """
-    # --- END OF FIX ---
-    
-    params_soundex = (name,)
-    
-    soundex_results = execute_query(query_soundex, params_soundex)
-    
-    if soundex_results:
-        print(f"Found {len(soundex_results)} SOUNDEX matches.")
-        # Add 'match_type' for app.py
-        for r in soundex_results: r['match_type'] = 'fuzzy' # Mark as fuzzy
-        return soundex_results
-        
     # --- Step 3: Still no match ---
-    print("No faculty found by any method.")
+    logger.debug("No faculty found by any method.")
     return []
 # --- END MODIFIED FUNCTION ---
 
 
+def _snapshot_timetable(snapshot, branch, section, study_year, day, faculty_name, course_name, course_code):
+    return snapshot.get_timetable(
+        canonical_branch(branch), canonical_section(section), study_year, canonical_day(day),
+        normalize_name(faculty_name) if faculty_name else None, course_name, course_code
+    )
+
+@answered_from_snapshot(_snapshot_timetable)
 def get_timetable(branch, section, study_year, day, faculty_name, course_name, course_code):
     """Fetches timetable information. This is a complex join."""
+    branch, section, day = canonical_branch(branch), canonical_section(section), canonical_day(day)
+
     query = """
         SELECT
             t.day_of_week, t.start_time, t.end_time, t.room_no, t.location,
@@ -314,22 +646,22 @@ def get_timetable(branch, section, study_year, day, faculty_name, course_name, c
     """
     params = []
     if branch:
-        query += " AND c.branch LIKE %s"
-        params.append(f"%{branch}%")
+        query += " AND c.branch = %s"
+        params.append(branch)
     if section:
-        query += " AND c.section LIKE %s"
-        params.append(f"%{section}%")
+        query += " AND c.section = %s"
+        params.append(section)
     if study_year:
         query += " AND c.study_year = %s"
         params.append(study_year)
     if day:
-        query += " AND t.day_of_week LIKE %s"
-        params.append(f"%{day}%")
+        query += " AND t.day_of_week = %s"
+        params.append(day)
         
     # --- FIX: Use normalized, STRICT match ---
     if faculty_name:
-        normalized_name = faculty_name.replace(' ', '').replace('.', '').lower()
-        query += " AND REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s"
+        normalized_name = normalize_name(faculty_name)
+        query += " AND f.name_normalized = %s"
         params.append(normalized_name)
     # --- END FIX ---
         
@@ -346,7 +678,7 @@ def get_timetable(branch, section, study_year, day, faculty_name, course_name, c
 # --- MODIFIED FUNCTION ---
 def get_course_instructors(course_name, course_code, branch, section):
     """Fetches all faculty who teach a given course, with optional branch/section filter."""
-    print(f"get_course_instructors called with name='{course_name}', code='{course_code}', branch='{branch}', section='{section}'")
+    logger.debug(f"get_course_instructors called with name='{course_name}', code='{course_code}', branch='{branch}', section='{section}'")
     
     query = """
         SELECT DISTINCT
@@ -372,17 +704,17 @@ def get_course_instructors(course_name, course_code, branch, section):
         params.append(f"%{course_code}%")
         
     if not course_conditions:
-        print("No course name or code provided.")
+        logger.debug("No course name or code provided.")
         return []
         
     conditions.append("(" + " OR ".join(course_conditions) + ")")
     
     if branch:
-        conditions.append("c.branch LIKE %s")
-        params.append(f"%{branch}%")
+        conditions.append("c.branch = %s")
+        params.append(canonical_branch(branch))
     if section:
-        conditions.append("c.section LIKE %s")
-        params.append(f"%{section}%")
+        conditions.append("c.section = %s")
+        params.append(canonical_section(section))
         
     query += " AND " + " AND ".join(conditions)
     query += " ORDER BY co.course_name, f.name, c.branch, c.section"
@@ -391,6 +723,7 @@ def get_course_instructors(course_name, course_code, branch, section):
 # --- END MODIFIED FUNCTION ---
 
 
+@cached_reference('clubs')
 def get_club_info(name):
     query = "SELECT name, description, contact_person, contact_phone FROM clubs WHERE 1=1"
     params = []
@@ -399,6 +732,7 @@ def get_club_info(name):
         params.append(f"%{name}%")
     return execute_query(query, params)
 
+@cached_reference('dress_code')
 def get_dress_code(category):
     query = "SELECT category, type, items FROM dress_code WHERE 1=1"
     params = []
@@ -407,22 +741,27 @@ def get_dress_code(category):
         params.append(f"%{category}%")
     return execute_query(query, params)
 
+@cached_reference('admissions')
 def get_admissions_info():
     query = "SELECT * FROM admissions"
     return execute_query(query)
 
+@cached_reference('placements')
 def get_placements_info():
     query = "SELECT * FROM placements"
     return execute_query(query)
 
+@cached_reference('fees')
 def get_fees_info():
     query = "SELECT * FROM fees"
     return execute_query(query)
 
+@cached_reference('anti_ragging_squad')
 def get_anti_ragging_info():
     query = "SELECT name, role, department, contact_phone FROM anti_ragging_squad"
     return execute_query(query)
 
+@cached_reference('hostels')
 def get_hostel_info(name, gender, campus):
     query = "SELECT name, campus, gender, facilities, warden_name, contact_phone FROM hostels WHERE 1=1"
     params = []
@@ -437,6 +776,7 @@ def get_hostel_info(name, gender, campus):
         params.append(f"%{campus}%")
     return execute_query(query, params)
 
+@cached_reference('transport')
 def get_transport_info(route_name):
     query = "SELECT route_name, description, contact_person, contact_phone FROM transport WHERE 1=1"
     params = []
@@ -445,8 +785,9 @@ def get_transport_info(route_name):
         params.append(f"%{route_name}%")
     return execute_query(query, params)
 
+@cached_reference('scholarship_details')
 def get_scholarship_info(scholarship_name=None, branch=None, year=None):
-    print(f"get_scholarship_info called with name='{scholarship_name}', branch='{branch}', year='{year}'")
+    logger.debug(f"get_scholarship_info called with name='{scholarship_name}', branch='{branch}', year='{year}'")
     sql = "SELECT name, location, mail_id FROM scholarship_details"
     params = []
     if scholarship_name:
@@ -456,24 +797,26 @@ def get_scholarship_info(scholarship_name=None, branch=None, year=None):
 
 
 def get_event_info(title):
-    query = "SELECT title, DATE_FORMAT(event_date, '%W, %M %e, %Y') as event_date, description FROM events WHERE 1=1"
+    query = "SELECT e.title, DATE_FORMAT(e.event_date, '%W, %M %e, %Y') as event_date, e.description FROM events e WHERE 1=1"
     params = []
     if title:
-        query += " AND title LIKE %s"
+        query += " AND e.title LIKE %s"
         params.append(f"%{title}%")
-    query += " ORDER BY event_date DESC"
+    # e.event_date is the DATE column (idx_events_event_date); a bare event_date is the formatted alias
+    query += " ORDER BY e.event_date DESC"
     return execute_query(query, params)
 
 def get_notice_info():
-    query = "SELECT notice_text, DATE_FORMAT(posted_on, '%W, %M %e, %Y') as posted_on FROM notices ORDER BY posted_on DESC LIMIT 5"
+    # Qualified so ORDER BY uses the DATE column (idx_notices_posted_on), not the formatted alias
+    query = "SELECT n.notice_text, DATE_FORMAT(n.posted_on, '%W, %M %e, %Y') as posted_on FROM notices n ORDER BY n.posted_on DESC LIMIT 5"
     return execute_query(query)
 
 def get_campus_map_data(location_name=None):
-    print(f"get_campus_map_data called for location: {location_name}")
+    logger.debug(f"get_campus_map_data called for location: {location_name}")
     map_url = os.getenv("COLLEGE_MAP_URL")
     response_text = ""
     if not map_url:
-        logging.error("CRITICAL: get_campus_map_data failed. COLLEGE_MAP_URL is not set in .env file.")
+        logger.error("CRITICAL: get_campus_map_data failed. COLLEGE_MAP_URL is not set in .env file.")
         response_text = "I'm sorry, I couldn't retrieve the campus map. The feature seems to be misconfigured."
     else:
         if location_name:
@@ -483,22 +826,22 @@ def get_campus_map_data(location_name=None):
     return {'text': response_text, 'media_url': map_url}
 
 def get_placement_stats_data():
-    print("get_placement_stats_data called.")
+    logger.debug("get_placement_stats_data called.")
     pdf_url = os.getenv("PLACEMENT_PDF_URL")
     response_text = ""
     if not pdf_url:
-        logging.error("CRITICAL: get_placement_stats_data failed. PLACEMENT_PDF_URL is not set in .env file.")
+        logger.error("CRITICAL: get_placement_stats_data failed. PLACEMENT_PDF_URL is not set in .env file.")
         response_text = "I'm sorry, I couldn't retrieve the placement statistics document. The feature seems to be misconfigured."
     else:
         response_text = "That's a lot of data! Here is the complete placement report PDF."
     return {'text': response_text, 'media_url': pdf_url}
 
 def get_student_portal_data():
-    print("get_student_portal_data called.")
+    logger.debug("get_student_portal_data called.")
     portal_url = os.getenv("ATTENDANCE_URL")
     response_text = ""
     if not portal_url:
-        logging.error("CRITICAL: get_student_portal_data failed. ATTENDANCE_URL is not set in .env file.")
+        logger.error("CRITICAL: get_student_portal_data failed. ATTENDANCE_URL is not set in .env file.")
         response_text = "I'm sorry, I couldn't retrieve the student portal link. The feature seems to be misconfigured."
     else:
         response_text = (
@@ -508,18 +851,18 @@ def get_student_portal_data():
     return {'text': response_text, 'media_url': None}
 
 def get_placement_summary_data():
-    print("get_placement_summary_data called.")
+    logger.debug("get_placement_summary_data called.")
     query = "SELECT * FROM placement_summary ORDER BY id DESC LIMIT 1"
     return execute_query(query)
 
 def get_company_stats_data(company_name):
-    print(f"get_company_stats_data called for: {company_name}")
+    logger.debug(f"get_company_stats_data called for: {company_name}")
     query = "SELECT company_name, ctc, num_selects, ctc_type FROM placement_companies WHERE company_name LIKE %s"
     params = (f"%{company_name}%",) 
     return execute_query(query, params)
 
 def get_placement_count_by_type_data(ctc_type):
-    print(f"get_placement_count_by_type_data called for: {ctc_type}")
+    logger.debug(f"get_placement_count_by_type_data called for: {ctc_type}")
     query = """
         SELECT ctc_type, COUNT(*) as company_count
         FROM placement_companies
@@ -530,11 +873,11 @@ def get_placement_count_by_type_data(ctc_type):
     return execute_query(query, params)
 
 def get_placement_count_by_ctc_data(operator, amount):
-    print(f"get_placement_count_by_ctc_data called for: {operator} {amount}")
+    logger.debug(f"get_placement_count_by_ctc_data called for: {operator} {amount}")
     if operator == 'gt': sql_operator = '>'
     elif operator == 'lt': sql_operator = '<'
     else:
-        print(f"Invalid operator provided: {operator}")
+        logger.warning(f"Invalid operator provided: {operator}")
         return None
     query = f"""
         SELECT SUM(num_selects) as total_students, COUNT(company_name) as total_companies
@@ -545,16 +888,16 @@ def get_placement_count_by_ctc_data(operator, amount):
         ctc_amount = float(amount)
         params = (ctc_amount,)
     except (ValueError, TypeError):
-        print(f"Invalid CTC amount provided: {amount}")
+        logger.warning(f"Invalid CTC amount provided: {amount}")
         return None
     return execute_query(query, params)
 
 def get_placement_companies_by_ctc_data(operator, amount):
-    print(f"get_placement_companies_by_ctc_data called for: {operator} {amount}")
+    logger.debug(f"get_placement_companies_by_ctc_data called for: {operator} {amount}")
     if operator == 'gt': sql_operator = '>'
     elif operator == 'lt': sql_operator = '<'
     else:
-        print(f"Invalid operator provided: {operator}")
+        logger.warning(f"Invalid operator provided: {operator}")
         return None
     query = f"""
         SELECT company_name, ctc, num_selects, ctc_type
@@ -566,18 +909,20 @@ def get_placement_companies_by_ctc_data(operator, amount):
         ctc_amount = float(amount)
         params = (ctc_amount,)
     except (ValueError, TypeError):
-        print(f"Invalid CTC amount provided: {amount}")
+        logger.warning(f"Invalid CTC amount provided: {amount}")
         return None
     return execute_query(query, params)
 
 
 # --- MODIFIED: Renamed to be more specific ---
+@answered_from_snapshot(lambda snapshot, faculty_name, day: snapshot.get_faculty_busy_slots(normalize_name(faculty_name), canonical_day(day)))
 def get_faculty_busy_slots(faculty_name, day):
     """
     Fetches all busy slots (start and end times) for a specific faculty on a specific day.
     This is used by the `calculate_free_slots` helper.
     """
-    print(f"get_faculty_busy_slots called for: {faculty_name} on {day}")
+    logger.debug(f"get_faculty_busy_slots called for: {faculty_name} on {day}")
+    day = canonical_day(day)
     
     query = """
         SELECT
@@ -587,22 +932,33 @@ def get_faculty_busy_slots(faculty_name, day):
         JOIN classes c ON t.class_id = c.class_id
         JOIN faculty f ON c.faculty_id = f.id
         WHERE 1=1
-        AND REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s
-        AND t.day_of_week LIKE %s
+        AND f.name_normalized = %s
+        AND t.day_of_week = %s
         ORDER BY t.start_time
     """
     # --- FIX: Use normalized, STRICT match ---
-    normalized_name = faculty_name.replace(' ', '').replace('.', '').lower()
-    params = (normalized_name, f"%{day}%")
+    normalized_name = normalize_name(faculty_name)
+    params = (normalized_name, day)
     # --- END FIX ---
     
     return execute_query(query, params)
 
+# --- NEW: Precomputed free/busy bitmap (see timetable_engine.DayAvailability) ---
+@answered_from_snapshot(lambda snapshot, faculty_name, day: snapshot.get_faculty_availability(normalize_name(faculty_name), canonical_day(day)))
+def get_faculty_availability(faculty_name, day):
+    """
+    Returns a DayAvailability (is_free(time), free_slots()) for a faculty on a day,
+    or None when the timetable engine is off or not loaded. Callers then fall
+    back to get_faculty_busy_slots() + calculate_free_slots().
+    """
+    return None # No snapshot, and there is no SQL version of the bitmap
+# --- END NEW ---
+
 def get_courses_for_faculty(faculty_name):
     """
     Fetches a distinct list of all courses taught by a specific faculty member.
     """
-    print(f"get_courses_for_faculty called for: {faculty_name}")
+    logger.debug(f"get_courses_for_faculty called for: {faculty_name}")
     
     query = """
         SELECT DISTINCT
@@ -611,22 +967,24 @@ def get_courses_for_faculty(faculty_name):
         FROM courses co
         JOIN classes c ON co.course_code = c.course_code
         JOIN faculty f ON c.faculty_id = f.id
-        WHERE REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s
+        WHERE f.name_normalized = %s
         ORDER BY co.course_name
     """
     # --- FIX: Use normalized, STRICT match ---
-    normalized_name = faculty_name.replace(' ', '').replace('.', '').lower()
+    normalized_name = normalize_name(faculty_name)
     params = (normalized_name,)
     # --- END FIX ---
     
     return execute_query(query, params)
 
 # --- NEW: Function to get a faculty's class schedule ---
+@answered_from_snapshot(lambda snapshot, faculty_name, day: snapshot.get_faculty_class_schedule(normalize_name(faculty_name), canonical_day(day)))
 def get_faculty_class_schedule(faculty_name, day):
     """
     Fetches the full class schedule (course, location, etc.) for a faculty member on a specific day.
     """
-    print(f"get_faculty_class_schedule called for: {faculty_name} on {day}")
+    logger.debug(f"get_faculty_class_schedule called for: {faculty_name} on {day}")
+    day = canonical_day(day)
     
     query = """
         SELECT
@@ -636,33 +994,34 @@ def get_faculty_class_schedule(faculty_name, day):
         JOIN classes c ON t.class_id = c.class_id
         JOIN courses co ON c.course_code = co.course_code
         JOIN faculty f ON c.faculty_id = f.id
-        WHERE REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s
-        AND t.day_of_week LIKE %s
+        WHERE f.name_normalized = %s
+        AND t.day_of_week = %s
         ORDER BY t.start_time
     """
-    normalized_name = faculty_name.replace(' ', '').replace('.', '').lower()
-    params = (normalized_name, f"%{day}%")
+    normalized_name = normalize_name(faculty_name)
+    params = (normalized_name, day)
     
     return execute_query(query, params)
 # --- END NEW ---
 
 # --- NEW: Function to get the days a faculty is on campus ---
+@answered_from_snapshot(lambda snapshot, faculty_name: snapshot.get_faculty_active_days(normalize_name(faculty_name)))
 def get_faculty_active_days(faculty_name):
     """
     Fetches the distinct weekdays (Mon-Fri) a faculty has classes.
     """
-    print(f"get_faculty_active_days called for: {faculty_name}")
+    logger.debug(f"get_faculty_active_days called for: {faculty_name}")
     
     query = """
         SELECT DISTINCT t.day_of_week
         FROM timetable_slots t
         JOIN classes c ON t.class_id = c.class_id
         JOIN faculty f ON c.faculty_id = f.id
-        WHERE REPLACE(REPLACE(LOWER(f.name), ' ', ''), '.', '') = %s
+        WHERE f.name_normalized = %s
         AND t.day_of_week IN ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
         ORDER BY FIELD(t.day_of_week, 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
     """
-    normalized_name = faculty_name.replace(' ', '').replace('.', '').lower()
+    normalized_name = normalize_name(faculty_name)
     params = (normalized_name,)
     
     return execute_query(query, params)
@@ -672,7 +1031,7 @@ def get_hod_name_by_branch(branch_name):
     """
     Fetches the HOD's name for a specific branch from the 'departments' table.
     """
-    print(f"get_hod_name_by_branch called for: {branch_name}")
+    logger.debug(f"get_hod_name_by_branch called for: {branch_name}")
     
     # --- THIS IS THE FIX ---
     # Create a list of search terms based on the acronym
@@ -0,0 +1,205 @@
+"""
+In-memory fuzzy index over faculty names.
+
+Replaces the SQL SOUNDEX fallback in database.get_faculty_location(). The index is
+built from the faculty rows once (see database.get_faculty_name_index()) and then
+answers spell-check lookups without touching MySQL:
+
+- substring match on the normalized name          -> match_type 'exact'
+- initials ("MNR" -> "Ms. Meghana NR")             -> match_type 'fuzzy'
+- trigram candidates ranked by Jaro-Winkler        -> match_type 'fuzzy'
+"""
+
+# Titles that are never part of the name itself (same idea as rule 4 of the intent prompt)
+HONORIFICS = {
+    'dr', 'mr', 'mrs', 'ms', 'miss', 'prof', 'smt', 'sri', 'shri',
+    'sir', 'mam', 'maam', 'madam',
+}
+
+MIN_FUZZY_SCORE = 0.82 # Below this a candidate is not worth suggesting
+AMBIGUITY_MARGIN = 0.04 # Candidates this close to the best one are all returned
+MAX_RANKED_CANDIDATES = 4 # Only the names sharing the most trigrams get Jaro-Winkler scored
+
+
+def _compact(text):
+    """Same normalization as database.normalize_name() / the name_normalized column."""
+    return text.replace(' ', '').replace('.', '').lower()
+
+
+def _tokens(text):
+    """Lowercase name tokens with dots split out and honorifics dropped."""
+    words = text.lower().replace('.', ' ').replace("'s", ' ').split()
+    return [w for w in words if w not in HONORIFICS]
+
+
+def _initials(tokens):
+    """
+    Initial forms of a name as (expanded, first_letters). Short tokens are kept whole
+    in the expanded form because they usually already are initials:
+    "Meghana NR" -> ("mnr", "mn"), "CN Chinnaswamy" -> ("cnc", "cc").
+    """
+    expanded = ''.join(t if len(t) <= 2 else t[0] for t in tokens)
+    first_letters = ''.join(t[0] for t in tokens)
+    return expanded, first_letters
+
+
+def _trigrams(token):
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaro_winkler(s1, s2, prefix_scale=0.1):
+    """Jaro-Winkler similarity in [0, 1]."""
+    if s1 == s2:
+        return 1.0
+    len1, len2 = len(s1), len(s2)
+    if not len1 or not len2:
+        return 0.0
+
+    match_distance = max(max(len1, len2) // 2 - 1, 0)
+    s2_matched = [False] * len2
+    s1_chars = []
+    for i, ch in enumerate(s1):
+        end = min(i + match_distance + 1, len2)
+        # str.find scans in C; only the rare already-matched hit loops in Python
+        j = s2.find(ch, max(0, i - match_distance), end)
+        while j != -1 and s2_matched[j]:
+            j = s2.find(ch, j + 1, end)
+        if j != -1:
+            s2_matched[j] = True
+            s1_chars.append(ch)
+    matches = len(s1_chars)
+    if not matches:
+        return 0.0
+
+    s2_chars = [ch for ch, matched in zip(s2, s2_matched) if matched]
+    transpositions = sum(a != b for a, b in zip(s1_chars, s2_chars))
+
+    jaro = (matches / len1 + matches / len2 + (matches - transpositions / 2) / matches) / 3
+
+    prefix = 0
+    for a, b in zip(s1[:4], s2[:4]):
+        if a != b:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+class FacultyNameIndex:
+    """Immutable lookup structure over faculty rows ({'id', 'name', 'office_location'})."""
+
+    def __init__(self, rows):
+        self.entries = []
+        self.by_initials = {} # "mnr" -> positions (initial-like tokens kept whole)
+        self.by_first_letters = {} # "mn" -> positions (weaker, used only as a fallback)
+        self.by_trigram = {}
+
+        for row in rows:
+            name = row.get('name')
+            if not name:
+                continue
+            tokens = _tokens(name)
+            entry = {
+                'id': row.get('id'),
+                'name': name,
+                'office_location': row.get('office_location'),
+                'compact': _compact(name),
+                'compact_no_title': ''.join(tokens),
+                'tokens': tokens,
+            }
+            position = len(self.entries)
+            self.entries.append(entry)
+
+            if tokens:
+                expanded, first_letters = _initials(tokens)
+                self.by_initials.setdefault(expanded, []).append(position)
+                self.by_first_letters.setdefault(first_letters, []).append(position)
+            for token in tokens:
+                for gram in _trigrams(token):
+                    self.by_trigram.setdefault(gram, set()).add(position)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _result(entry, match_type, score):
+        return {
+            'id': entry['id'],
+            'name': entry['name'],
+            'office_location': entry['office_location'],
+            'match_type': match_type,
+            'score': round(score, 3),
+        }
+
+    @staticmethod
+    def _best_token_score(query_token, name_tokens):
+        best = 0.0
+        for token in name_tokens:
+            # Jaro can't exceed (2 + shorter/longer) / 3, so skip hopeless length mismatches
+            shorter, longer = sorted((len(query_token), len(token)))
+            if (2 + shorter / longer) / 3 * 1.04 < MIN_FUZZY_SCORE:
+                continue
+            best = max(best, jaro_winkler(query_token, token))
+        return best
+
+    def _score(self, query_tokens, query_compact, entry):
+        """Best of whole-name and per-token similarity."""
+        whole = jaro_winkler(query_compact, entry['compact_no_title'])
+        if not entry['tokens']:
+            return whole
+        per_token = sum(
+            self._best_token_score(qt, entry['tokens']) for qt in query_tokens
+        ) / len(query_tokens)
+        return max(whole, per_token)
+
+    def search(self, name, limit=5):
+        """
+        Returns up to `limit` matches for a user-typed name, best first.
+        Each match is {'id', 'name', 'office_location', 'match_type', 'score'}.
+        """
+        query_tokens = _tokens(name)
+        query_no_title = ''.join(query_tokens)
+        if not query_no_title:
+            return []
+
+        # --- Step 1: initials, e.g. "mnr", "sk", "cnc" ---
+        # Checked first: a 2-4 letter query is far more likely to be initials than a
+        # fragment of a name, and substring matching short strings is mostly noise.
+        if len(query_tokens) == 1 and len(query_no_title) <= 4:
+            positions = self.by_initials.get(query_no_title) or self.by_first_letters.get(query_no_title, [])
+            if positions:
+                return [self._result(self.entries[p], 'fuzzy', 0.9) for p in positions[:limit]]
+
+        # --- Step 2: normalized substring (what the old LIKE query did) ---
+        if len(query_no_title) >= 3:
+            query_compact = _compact(name)
+            exact = [
+                e for e in self.entries
+                if query_no_title in e['compact_no_title'] or query_compact in e['compact']
+            ]
+            if exact:
+                return [self._result(e, 'exact', 1.0) for e in exact[:limit]]
+
+        # --- Step 3: trigram candidates ranked by Jaro-Winkler ---
+        candidate_hits = {}
+        for token in query_tokens:
+            for gram in _trigrams(token):
+                for position in self.by_trigram.get(gram, ()):
+                    candidate_hits[position] = candidate_hits.get(position, 0) + 1
+        candidates = sorted(candidate_hits, key=candidate_hits.get, reverse=True)[:MAX_RANKED_CANDIDATES]
+
+        scored = []
+        for position in candidates:
+            score = self._score(query_tokens, query_no_title, self.entries[position])
+            if score >= MIN_FUZZY_SCORE:
+                scored.append((score, position))
+        if not scored:
+            return []
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        best = scored[0][0]
+        return [
+            self._result(self.entries[position], 'fuzzy', score)
+            for score, position in scored[:limit]
+            if best - score <= AMBIGUITY_MARGIN
+        ]
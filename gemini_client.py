@@ -1,8 +1,21 @@
 import os
 import aiohttp
 import json
+import logging
 import time
 import asyncio # Import asyncio
+import copy
+import re
+import threading
+
+import http_client
+import metrics
+import tracing
+import intent_prompts
+from cache import TTLCache, MISSING
+from faculty_index import HONORIFICS
+
+logger = logging.getLogger(__name__)
 
 # --- FIX 2: Read the Google Form URL from your .env file ---
 # (This file is loaded by app.py *before* this import happens)
@@ -29,7 +42,154 @@ _FALLBACK_SUGGESTION_PROMPT = (
 
 MODEL_NAME = "gemini-2.5-flash-preview-09-2025"
 # --- FIX: Added '//' after 'https:' ---
-GEMINI_API_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/"
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models/")
+
+# Send only the intent-family shard(s) of the prompt the query needs (see intent_prompts.py)
+INTENT_PROMPT_SHARDS_ENABLED = os.getenv("INTENT_PROMPT_SHARDS", "true").lower() != "false"
+
+# --- Shared keep-alive HTTP client (see http_client.py) ---
+# One connection pool for the whole process instead of a new session (and a new
+# TLS handshake) per call. Timeouts are per call, in seconds.
+GEMINI_HTTP_LIMIT = int(os.getenv("GEMINI_HTTP_LIMIT", "50"))
+GEMINI_HTTP_LIMIT_PER_HOST = int(os.getenv("GEMINI_HTTP_LIMIT_PER_HOST", "20"))
+GEMINI_HTTP_KEEPALIVE = float(os.getenv("GEMINI_HTTP_KEEPALIVE", "60"))
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "10"))
+GEMINI_INTENT_TIMEOUT = float(os.getenv("GEMINI_INTENT_TIMEOUT", "20"))
+GEMINI_RESPONSE_TIMEOUT = float(os.getenv("GEMINI_RESPONSE_TIMEOUT", "30"))
+
+gemini_http = http_client.create_client(
+    "gemini",
+    limit=GEMINI_HTTP_LIMIT,
+    limit_per_host=GEMINI_HTTP_LIMIT_PER_HOST,
+    keepalive_timeout=GEMINI_HTTP_KEEPALIVE,
+    timeout=GEMINI_RESPONSE_TIMEOUT,
+    connect_timeout=GEMINI_CONNECT_TIMEOUT,
+)
+
+
+def start_http_client():
+    """Opens the shared Gemini connection pool. Call once at startup (calls also start it lazily)."""
+    gemini_http.start()
+
+
+def close_http_client():
+    """Closes the shared Gemini connection pool. Call at shutdown."""
+    gemini_http.close()
+
+# --- Intent Cache ---
+# Students ask the same things over and over ("cse a monday timetable", "who is
+# the principal"), and every one of them used to cost a ~32 KB intent prompt.
+# get_query_intent() keeps Gemini's answers keyed on a normalized form of the
+# query. Entries are Gemini's raw output, stored and returned as deep copies, so
+# app._normalize_entities() (which resolves "today"/"tomorrow" in place) never
+# writes a resolved weekday back into the cache.
+INTENT_CACHE_ENABLED = os.getenv("INTENT_CACHE_ENABLED", "true").lower() != "false"
+INTENT_CACHE_TTL = int(os.getenv("INTENT_CACHE_TTL", "86400"))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "2048"))
+INTENT_CACHE_FILE = os.getenv("INTENT_CACHE_FILE") # Optional: persist across restarts
+INTENT_CACHE_SAVE_EVERY = 50 # New entries between automatic saves to INTENT_CACHE_FILE
+INTENT_CACHE_VERSION = 3 # Bump whenever the intent prompt or normalize_query() changes, so persisted answers are dropped
+
+intent_cache = TTLCache(maxsize=INTENT_CACHE_MAX_ENTRIES, ttl=INTENT_CACHE_TTL)
+_intent_cache_file_lock = threading.Lock()
+_intent_cache_unsaved = 0
+_intent_cache_saving = threading.Event() # Set while a background save is running
+
+# Only sentence punctuation is dropped; a dot between digits ("7.5 lpa") is kept.
+_QUERY_PUNCTUATION = re.compile(r"[?!,;:\"]|\.(?!\d)")
+# Symbols that change a query's meaning become words, so "ctc > 10" and "ctc < 10"
+# (or "c++" and "c") never share a cache entry.
+_QUERY_SYMBOLS = {'<=': ' lte ', '>=': ' gte ', '<': ' lt ', '>': ' gt ', '+': ' plus ', '#': ' sharp ', '&': ' and ', '%': ' percent '}
+_QUERY_SYMBOL_PATTERN = re.compile('|'.join(re.escape(symbol) for symbol in _QUERY_SYMBOLS))
+
+
+def normalize_query(user_query):
+    """
+    Cache key for a query: lowercase, sentence punctuation and honorifics dropped,
+    meaningful symbols spelled out, whitespace collapsed. "Who is Dr. Anitha?" and
+    "who is  anitha" share one entry; "ctc > 10" and "ctc < 10" don't.
+    """
+    text = _QUERY_SYMBOL_PATTERN.sub(lambda match: _QUERY_SYMBOLS[match.group()], user_query.lower())
+    words = _QUERY_PUNCTUATION.sub(' ', text).split()
+    return ' '.join(w for w in words if w not in HONORIFICS)
+
+
+def _cache_intent(key, intent_data):
+    """Stores a successful classification. Error fallbacks must never reach here."""
+    global _intent_cache_unsaved
+    if not INTENT_CACHE_ENABLED or not key:
+        return
+    if not isinstance(intent_data, dict) or intent_data.get('intent') in (None, 'unknown'):
+        return
+    intent_cache.set(key, {'intent_data': copy.deepcopy(intent_data), 'cached_at': time.time()})
+    if INTENT_CACHE_FILE:
+        _intent_cache_unsaved += 1
+        if _intent_cache_unsaved >= INTENT_CACHE_SAVE_EVERY and not _intent_cache_saving.is_set():
+            # Called from the event loop: write the file on a thread, never inline
+            _intent_cache_saving.set()
+            threading.Thread(target=_save_intent_cache_in_background, name="intent_cache_save", daemon=True).start()
+
+
+def _save_intent_cache_in_background():
+    try:
+        save_intent_cache()
+    finally:
+        _intent_cache_saving.clear()
+
+
+def load_intent_cache(path=None):
+    """Loads persisted intent classifications. Expired or wrong-version files are ignored."""
+    path = path or INTENT_CACHE_FILE
+    if not path or not INTENT_CACHE_ENABLED or not os.path.exists(path):
+        return 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read intent cache file {path}: {e}")
+        return 0
+    if saved.get('version') != INTENT_CACHE_VERSION or saved.get('model') != MODEL_NAME:
+        logger.info("Intent cache file was written for another prompt/model version. Ignoring it.")
+        return 0
+
+    now = time.time()
+    loaded = 0
+    for key, entry in saved.get('entries', {}).items():
+        remaining = INTENT_CACHE_TTL - (now - entry.get('cached_at', 0))
+        if remaining > 0 and isinstance(entry.get('intent_data'), dict):
+            intent_cache.set(key, entry, ttl=remaining)
+            loaded += 1
+    logger.info(f"Loaded {loaded} cached intent classifications from {path}.")
+    return loaded
+
+
+def save_intent_cache(path=None):
+    """Writes the live intent cache entries to disk (atomically, via a temp file)."""
+    global _intent_cache_unsaved
+    path = path or INTENT_CACHE_FILE
+    if not path or not INTENT_CACHE_ENABLED:
+        return False
+    with _intent_cache_file_lock:
+        _intent_cache_unsaved = 0
+        data = {
+            'version': INTENT_CACHE_VERSION,
+            'model': MODEL_NAME,
+            'entries': dict(intent_cache.items()),
+        }
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write intent cache file {path}: {e}")
+            return False
+    return True
+
+
+def get_intent_cache_stats():
+    return intent_cache.stats()
+
 
 def configure_gemini():
     """Checks if the GEMINI_API_KEY is available."""
@@ -39,26 +199,26 @@ def configure_gemini():
     
     # --- NEW: Check for the placement PDF URL ---
     if os.getenv("PLACEMENT_PDF_URL"):
-        print("Placement Stats PDF URL is LOADED.")
+        logger.info("Placement Stats PDF URL is LOADED.")
     else:
-        print("WARNING: PLACEMENT_PDF_URL is NOT SET in .env file. Stats feature will fail.")
+        logger.warning("PLACEMENT_PDF_URL is NOT SET in .env file. Stats feature will fail.")
     # --- END NEW ---
     
     if os.getenv("COLLEGE_MAP_URL"):
-        print("College Map URL is LOADED.")
+        logger.info("College Map URL is LOADED.")
     else:
-        print("WARNING: COLLEGE_MAP_URL is NOT SET in .env file. Map feature will fail.")
+        logger.warning("COLLEGE_MAP_URL is NOT SET in .env file. Map feature will fail.")
 
     if SUGGESTION_FORM_URL:
-        print("Gemini client configured successfully. Suggestion Form URL is LOADED.")
+        logger.info("Gemini client configured successfully. Suggestion Form URL is LOADED.")
     else:
-        print("Gemini client configured successfully. (Suggestion Form URL is NOT SET)")
+        logger.info("Gemini client configured successfully. (Suggestion Form URL is NOT SET)")
 
 def _build_url(intent_or_response):
     """Builds the correct API URL based on the task."""
     api_key = os.environ.get('GEMINI_API_KEY')
     if not api_key:
-        print("CRITICAL: API_KEY is not configured in _build_url. Returning empty URL.")
+        logger.error("CRITICAL: API_KEY is not configured in _build_url. Returning empty URL.")
         return "" 
 
     if intent_or_response == "intent":
@@ -68,714 +228,116 @@ def _build_url(intent_or_response):
         
     return f"{GEMINI_API_BASE_URL}{model}:generateContent?key={api_key}"
 
-async def _call_gemini_with_retry(payload, intent_or_response="response", max_retries=3, delay=2):
+async def _call_gemini_with_retry(payload, intent_or_response="response", max_retries=3, delay=2, timeout=None):
     """Calls the Gemini API with exponential backoff retry logic."""
-    # (This function is unchanged from your file)
-    headers = {'Content-Type': 'application/json'}
-    url = _build_url(intent_or_response)
+    with tracing.span(f"gemini.{intent_or_response}"):
+        headers = {'Content-Type': 'application/json'}
+        url = _build_url(intent_or_response)
+        if timeout is None:
+            timeout = GEMINI_INTENT_TIMEOUT if intent_or_response == "intent" else GEMINI_RESPONSE_TIMEOUT
     
-    if not url:
-         print(f"CRITICAL: API call failed. URL is empty. Check GEMINI_API_KEY.")
-         raise Exception("API_KEY is not configured, cannot make API call.")
+        if not url:
+             logger.error(f"CRITICAL: API call failed. URL is empty. Check GEMINI_API_KEY.")
+             raise Exception("API_KEY is not configured, cannot make API call.")
 
-    async with aiohttp.ClientSession() as session:
         for attempt in range(max_retries):
+            tracing.count(f"gemini.{intent_or_response}.attempts")
+            if attempt:
+                metrics.GEMINI_RETRIES.inc(intent_or_response)
+            attempt_started = time.perf_counter()
             try:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        try:
-                            result = await response.json()
-                            if 'candidates' in result and result['candidates']:
-                                part = result['candidates'][0].get('content', {}).get('parts', [{}])[0]
-                                if 'text' in part:
-                                    return part['text']
-                            
-                            print(f"API Warning: Response 200 but no valid candidate text. Response: {result}")
-                            return None
-
-                        except aiohttp.ContentTypeError:
-                            text_response = await response.text()
-                            print(f"API Error: Response 200 but not valid JSON. Response: {text_response}")
-                            raise Exception(f"API returned non-JSON 200 response: {text_response[:100]}...")
-                    
-                    elif response.status == 500 or response.status == 503:
-                        print(f"API Error {response.status}: Model overloaded or internal error. Retrying in {delay}s...")
-                        await asyncio.sleep(delay) 
-                        delay *= 2
-                    
-                    else:
-                        error_text = await response.text()
-                        print(f"API Error {response.status}: {error_text}")
-                        raise Exception(f"API Client Error {response.status}: {error_text}")
+                try:
+                    response = await gemini_http.post(url, json=payload, headers=headers, timeout=timeout)
+                    metrics.GEMINI_CALLS.inc(intent_or_response, str(response.status))
+                except aiohttp.ClientError:
+                    metrics.GEMINI_CALLS.inc(intent_or_response, 'error')
+                    raise
+                except asyncio.TimeoutError:
+                    metrics.GEMINI_CALLS.inc(intent_or_response, 'timeout')
+                    raise
+                finally:
+                    metrics.GEMINI_SECONDS.observe(time.perf_counter() - attempt_started, intent_or_response)
+                if response.status == 200:
+                    try:
+                        result = json.loads(response.body)
+                    except ValueError:
+                        text_response = response.text()
+                        logger.error(f"API Error: Response 200 but not valid JSON. Response: {text_response}")
+                        raise Exception(f"API returned non-JSON 200 response: {text_response[:100]}...")
+
+                    if 'candidates' in result and result['candidates']:
+                        part = result['candidates'][0].get('content', {}).get('parts', [{}])[0]
+                        if 'text' in part:
+                            return part['text']
+                
+                    logger.warning(f"API Warning: Response 200 but no valid candidate text. Response: {result}")
+                    return None
+            
+                elif response.status == 500 or response.status == 503:
+                    logger.warning(f"API Error {response.status}: Model overloaded or internal error. Retrying in {delay}s...")
+                    await asyncio.sleep(delay) 
+                    delay *= 2
+            
+                else:
+                    error_text = response.text()
+                    logger.error(f"API Error {response.status}: {error_text}")
+                    raise Exception(f"API Client Error {response.status}: {error_text}")
 
             except aiohttp.ClientError as e:
-                print(f"API request failed: {e}. Retrying in {delay}s...")
+                logger.warning(f"API request failed: {e}. Retrying in {delay}s...")
                 await asyncio.sleep(delay) 
                 delay *= 2
+            except asyncio.TimeoutError:
+                logger.warning(f"API request timed out after {timeout}s. Retrying in {delay}s...")
+                await asyncio.sleep(delay)
+                delay *= 2
             except Exception as e:
-                print(f"A non-retryable error occurred: {e}")
+                logger.error(f"A non-retryable error occurred: {e}")
                 raise e 
 
-    print("API call failed after 3 retries.")
-    raise Exception("API call failed after 3 retries.")
+        logger.error("API call failed after 3 retries.")
+        raise Exception("API call failed after 3 retries.")
 
 
 async def get_query_intent(user_query):
     """
     Uses Gemini to classify the user's intent and extract entities.
+    Repeated queries are answered from intent_cache (see normalize_query()), and
+    only the prompt shard(s) picked by intent_prompts.select_families() are sent.
     """
-    system_prompt = f"""
-    You are an intent classification system for a college chatbot. Your goal is to analyze the user's query and categorize it into one of the following intents, extracting relevant entities.
-
-    --- INTENT DEFINITIONS ---
-
-    **General Intents:**
-    - "get_timetable": User is asking for a class schedule for a branch/section.
-    - "get_club_info": User is asking about student clubs.
-    - "get_hostel_info": User is asking about student housing/hostels.
-    - "get_admissions_info": User is asking about college admissions.
-    - "get_fees_info": User is asking about tuition fees or payments.
-    - "get_transport_info": User is asking about college bus routes or transport.
-    - "get_dress_code": User is asking about the college dress code.
-    - "get_anti_ragging_info": User is asking about anti-ragging policies or contacts.
-    - "get_college_info": User is asking for general information about the college
-    - "get_events_info": User is asking about college events or fests.
-    - "get_notices": User is asking for recent notices or announcements.
-    - "get_scholarship_info": User is asking about scholarships.
-    - "get_location": User is asking for the location of a static place (room, lab, office) or the campus map.
-    - "get_student_portal_info": User is asking about attendance, CIE marks, or internal marks.
-    - "get_break_info": User is asking about break or lunch timings.
-    **General Intents:**
-    - "get_timetable": User is asking for a class schedule...
-    - "get_help_escalation": User is frustrated, needs help, or wants to talk to a person.
-    - "get_club_info": User is asking about student clubs.
-
-    **Faculty Intents:**
-    - "get_faculty_info": User is asking *about* a professor (e.g., "who is", "tell me about"). This is for FULL details.
-    - "get_faculty_location": User is asking *only* for the **static office location** of a faculty member (e.g., "where is office", "location of"). This intent *NEVER* has a 'day' entity.
-    - "get_faculty_location_on_day": User is asking *where* a faculty member *is* on a **specific day** (e.g., "where is dr anitha on monday", "where is mnr today"). This intent *MUST* have a 'day' entity.
-    - "get_faculty_schedule": User is asking for a faculty's *list of classes* on a specific day (e.g., "what is dr anitha's schedule", "what classes does mnr have tomorrow").
-    - "get_faculty_availability": User is asking when a faculty member is *free* or *busy* (e.g., "is dr anitha free at 3pm", "when is mnr free").
-    - "get_faculty_campus_availability": User is asking *which days* a faculty is on campus OR *if* they are on campus on a *specific day* (e.Read( "what days is dr anitha in college", "is mnr on north campus today").
-    - "get_faculty_courses": User is asking for a list of all courses taught by a specific faculty member (e.g., "what subjects does dr anitha teach").
-    - "get_course_instructors": User is asking *who* teaches a specific course.
-
-    **Student Info Intents:**
-    - "get_placement_start_info": User is asking when placements begin.
-    - "get_exam_registration_info": User is asking about makeup exams or backlog registration.
-    - "get_lost_item_info": User is asking about losing an ID card or hall ticket.
-    - "get_canteen_info": User is asking for information about the canteen.
-
-    **Placement Intents:**
-    - "get_placement_stats": User is asking for the *full report*, *all companies*, or *complete details*.
-    - "get_placements_info": User is asking about *contact info* for the placement office.
-    - "get_placement_summary": User is asking for *specific high-level stats* (e.g., highest salary, average salary).
-    - "get_company_stats": User is asking for stats related to *one specific company*.
-    - "get_placement_count_by_type": User is asking *how many* companies of a certain type came.
-    - "get_placement_count_by_ctc": User is asking *how many* students or companies got packages *above or below* a certain CTC.
-    - "get_placement_companies_by_ctc": User is asking to *list* the companies *above or below* a certain CTC.
-     
-    **Other Intents:**
-    - "general_chat": User is making small talk, greeting, or asking a question not related to the database. (e.g., "yes", "no", "ok", "thanks").
-    - "unknown": The user's intent is unclear or not covered.
-    - "suggest_data": The user is suggesting new information to be added.
-
-    --- ENTITY DEFINITIONS ---
-    - "faculty_name": The name of the faculty member (e.g., "Dr. Anitha R", "MNR", "SK", "principal").
-    - "course_name": The name of a course (e.g., "Applied Physics", "CN", "TOC").
-    - "course_code": The code for a course (e.g., "18CS45", "PHY101").
-    - "company_name": The name of a company (e.g., "VISA", "JPMC", "Google").
-    - "branch": The student branch (e.g., "CSE", "AI&ML", "ISE").
-    - "year": The year of study (e.g., 1, 2, 3, 4).
-    - "section": The class section (e.g., "A", "B").
-    - "day": The day of the week (e.g., "Monday", "today", "tomorrow").
-    - "club_name": The name of the club (e.g., "NISB", "Robotics").
-    - "hostel_name": The name of the hostel (e.g., "NIE North Men's Hostel").
-    - "scholarship_name": The name of the scholarship (e.g., "Merit Scholarship").
-    - "topic": A general topic (e.g., "ragging", "TechNIEks", "library notice").
-    - "location_name": A generic place (e.g., "canteen", "ground", "library", "north campus").
-    - "room_number": A specific room (e.g., "105", "210", "MB-1").
-    - "lab_name": A specific lab (e.g., "ISE lab", "CSE labs").
-    - "office_name": A specific office (e.g., "principal office", "placement section").
-    - "stat_type": The specific placement stat requested (e.g., "highest_ctc", "average_ctc").
-    - "ctc_type": The type of placement package (e.g., "Dream", "Mass").
-    - "ctc_amount": The CTC value in lakhs (e.g., 12, 8.5).
-    - "ctc_operator": The comparison operator ("gt" for greater than, "lt" for less than).
-    - "lost_item": The item the user lost (e.g., "id card", "hall ticket").
-    - "time_of_day": A specific time mentioned by the user (e.g., "3pm", "10:00").
-
-    --- RULES ---
-    1. You must respond in JSON format only. Do not add any other text.
-    2. Handle spelling mistakes gracefully.
-    3. "hi", "hello", "thanks", "bye", "yes", "no", "yep", "nope", "ok" are "general_chat".
-    4. Ignore all honorifics like 'sir', 'mam', 'madam'. They are not part of the name.
-    5. **CRITICAL:** "today" and "tomorrow" are valid values for the "day" entity.
-    6. **CRITICAL:** If a query asks "where is [faculty]" and includes a day (like "today" or "Monday"), the intent is `get_faculty_location_on_day`.
-    7. **CRITICAL:** If a query asks "is [faculty] available/on campus" and includes a day (like "today" or "Monday"), the intent is `get_faculty_campus_availability` **AND YOU MUST EXTRACT THE "day" ENTITY.**    8. **CRITICAL:** If a query asks "where is [faculty]" and does *NOT* include a day, the intent is `get_faculty_location` (for their static office).
-    8. **CRITICAL:** If a query asks "where is [faculty]" and does *NOT* include a day, the intent is `get_faculty_location` (for their static office).
-    9. **CRITICAL (NEW):** If the user's query contains two different questions (e.g., "where is X and when is Y free"), YOU MUST ONLY classify the **first** question. Ignore the second part.
-    --- EXAMPLES ---
-
-    Example for "can i get timetable for cse a 1st year on monday":
-    {{"intent": "get_timetable", "entities": {{"branch": "CSE", "year": 1, "section": "A", "day": "Monday"}}}}
-    
-    Example for "who is dr anitha r":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Dr. Anitha R"}}}}
-    
-    Example for "who is principal":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-    
-    Example for "tell me about dr vanamala mam":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Dr. CK Vanamala"}}}}
-    
-    Example for "details about principal sir":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-
-    Example for "who is the coe":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Dr. S Kuzhalvaimozhi"}}}}
-
-    Example for "who is the dean":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "C Vidya Raj"}}}}
-
-    Example for "where can i find vanamal":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "vanamal"}}}}
-    
-    Example for "where is dr anitha r's office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "Dr. Anitha R"}}}}
-    
-    Example for "location of principal's office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-
-    Example for "who teaches applied physics":
-    {{"intent": "get_course_instructors", "entities": {{"course_name": "Applied Physics"}}}}
-    
-    Example for "who is the instructor for 18CS45":
-    {{"intent": "get_course_instructors", "entities": {{"course_code": "18CS45"}}}}
-    
-    Example for "show me the schedule for 18CS45":
-    {{"intent": "get_timetable", "entities": {{"course_code": "18CS45"}}}} 
-
-    --- NEW CLUB EXAMPLES ---
-    Example for "what clubs are there":
-    {{"intent": "get_club_info", "entities": {{}}}}
-
-    Example for "tell me about the onyx club":
-    {{"intent": "get_club_info", "entities": {{"club_name": "Onyx"}}}}
-
-    Example for "do you have info on robotics club":
-    {{"intent": "get_club_info", "entities": {{"club_name": "Robotics"}}}}
-    --- END NEW CLUB EXAMPLES ---
-
-    --- NEW LOCATION EXAMPLES ---
-    Example for "show me the college map":
-    {{"intent": "get_location", "entities": {{}}}}
-    
-    Example for "where is the canteen":
-    {{"intent": "get_location", "entities": {{"location_name": "canteen"}}}}
-    
-    Example for "where is room 105":
-    {{"intent": "get_location", "entities": {{"room_number": "105"}}}}
-    
-    Example for "location of classroom 201":
-    {{"intent": "get_location", "entities": {{"room_number": "201"}}}}
-    
-    Example for "where is mb-2":
-    {{"intent": "get_location", "entities": {{"room_number": "MB-2"}}}}
-    
-    Example for "where are the ise labs":
-    {{"intent": "get_location", "entities": {{"lab_name": "ISE"}}}}
-    Example for "where is the physics lab":
-    {{"intent": "get_location", "entities": {{"lab_name": "Physics"}}}}
-
-    Example for "chemistry lab location":
-    {{"intent": "get_location", "entities": {{"lab_name": "Chemistry"}}}}
-    
-    Example for "where are the cs labs":
-    {{"intent": "get_location", "entities": {{"lab_name": "CSE"}}}}
-    
-    Example for "is lab location":
-    {{"intent": "get_location", "entities": {{"lab_name": "ISE"}}}}
-    
-    Example for "cse lab location":
-    {{"intent": "get_location", "entities": {{"lab_name": "CSE"}}}}
-
-    Example for "where is the physics lab":
-    {{"intent": "get_location", "entities": {{"lab_name": "Physics"}}}}
-
-    Example for "physics lab location":
-    {{"intent": "get_location", "entities": {{"lab_name": "Physics"}}}}
-
-    Example for "where can i find the chemistry lab":
-    {{"intent": "get_location", "entities": {{"lab_name": "Chemistry"}}}}
-
-    Example for "chemistry lab location":
-    {{"intent": "get_location", "entities": {{"lab_name": "Chemistry"}}}}
-    
-    Example for "where is the library":
-    {{"intent": "get_location", "entities": {{"location_name": "library"}}}}
-    
-    Example for "where is the placement office":
-    {{"intent": "get_location", "entities": {{"office_name": "placement"}}}}
-    
-    Example for "location of scholarship section":
-    {{"intent": "get_location", "entities": {{"office_name": "scholarship"}}}}
-
-    Example for "where is the stationary shop":
-    {{"intent": "get_location", "entities": {{"office_name": "stationary"}}}}
-
-    Example for "where does the principal usually sit":
-    {{"intent": "get_location", "entities": {{"office_name": "principal"}}}}
-
-    Example for "where is the principal office":
-    {{"intent": "get_location", "entities": {{"office_name": "principal"}}}}
-
-    Example for "where is the cse staff room":
-    {{"intent": "get_location", "entities": {{"office_name": "cse staff room"}}}}
-
-    Example for "cse staff room1":
-    {{"intent": "get_location", "entities": {{"office_name": "cse staff room"}}}}
-
-    Example for "ise staff room 2 location":
-    {{"intent": "get_location", "entities": {{"office_name": "ise staff room"}}}}
-    
-    Example for "where is the auditorium":
-    {{"intent": "get_location", "entities": {{"office_name": "auditorium"}}}}
-    
-    Example for "where are the hods":
-    {{"intent": "get_location", "entities": {{"office_name": "hod"}}}}
-    --- END NEW LOCATION EXAMPLES ---
-    --- NEW LOCATION EXAMPLES ---
-    ...
-    Example for "where is the stationary shop":
-    {{"intent": "get_location", "entities": {{"office_name": "stationary"}}}}
-
-    Example for "where is the 'stationary'?":
-    {{"intent": "get_location", "entities": {{"office_name": "stationary"}}}}
-
-    Example for "whats the lib location":
-    {{"intent": "get_location", "entities": {{"location_name": "library"}}}}
-    ...
-    --- END NEW LOCATION EXAMPLES ---
-    --- FACULTY AVAILABILITY EXAMPLES ---
-    ...
-    Example for "is sk free tomorrow":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "SK", "day": "tomorrow"}}}}
-
-    Example for "where is the principal's office and when is he free":
-    {{"intent": "get_location", "entities": {{"office_name": "principal"}}}}
-    --- END FACULTY AVAILABILITY EXAMPLES ---
-
-    --- PLACEMENT EXAMPLES ---
-    Example for "show me all placement stats":
-    {{"intent": "get_placement_stats", "entities": {{}}}}
-
-    Example for "give me the full placement report":
-    {{"intent": "get_placement_stats", "entities": {{}}}}
-
-    Example for "list of all companies that visited":
-    {{"intent": "get_placement_stats", "entities": {{}}}}
-
-
-
-    Example for "what was the highest salary":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "highest_ctc"}}}}
-    
-    Example for "what is the highest ctc":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "highest_ctc"}}}}
-
-    Example for "how many students were placed in total":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "total_selects"}}}}
-    
-    Example for "total selections":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "total_selects"}}}}
-
-    Example for "average ctc":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "average_ctc"}}}}
-
-    Example for "what is the median salary":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "median_ctc"}}}}
-    
-    Example for "lowest package":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "lowest_ctc"}}}}
-    
-    Example for "how many companies came":
-    {{"intent": "get_placement_summary", "entities": {{"stat_type": "total_companies"}}}}
-    
-    Example for "placement summary":
-    {{"intent": "get_placement_summary", "entities": {{}}}}
-
-    Example for "stats for VISA":
-    {{"intent": "get_company_stats", "entities": {{"company_name": "VISA"}}}}
-
-    Example for "how many people did JPMC hire":
-    {{"intent": "get_company_stats", "entities": {{"company_name": "JPMC"}}}}
-    
-    Example for "what was the ctc for Pure Storage":
-    {{"intent": "get_company_stats", "entities": {{"company_name": "Pure Storage"}}}}
-
-    Example for "who is the placement officer":
-    {{"intent": "get_placements_info", "entities": {{}}}}
-    
-    Example for "how many dream companies offered packages":
-    {{"intent": "get_placement_count_by_type", "entities": {{"ctc_type": "Dream"}}}}
-
-    Example for "how many comapanies offerd dream packages":
-    {{"intent": "get_placement_count_by_type", "entities": {{"ctc_type": "Dream"}}}}
-    
-    Example for "total mass recruiters":
-    {{"intent": "get_placement_count_by_type", "entities": {{"ctc_type": "Mass"}}}}
-    
-    Example for "how many core companies came":
-    {{"intent": "get_placement_count_by_type", "entities": {{"ctc_type": "Core"}}}}
-    
-    Example for "how many students got placed with a ctc of more than 12 lakhs":
-    {{"intent": "get_placement_count_by_ctc", "entities": {{"ctc_operator": "gt", "ctc_amount": 12}}}}
-    
-    Example for "total selections with packages less than 8 lakhs":
-    {{"intent": "get_placement_count_by_ctc", "entities": {{"ctc_operator": "lt", "ctc_amount": 8}}}}
-    
-    Example for "number of students who got over 20 lpa":
-    {{"intent": "get_placement_count_by_ctc", "entities": {{"ctc_operator": "gt", "ctc_amount": 20}}}}
-    
-    Example for "list the companies that offered more than 15 lpa":
-    {{"intent": "get_placement_companies_by_ctc", "entities": {{"ctc_operator": "gt", "ctc_amount": 15}}}}
-    
-    Example for "show me which companies gave packages under 5 lpa":
-    {{"intent": "get_placement_companies_by_ctc", "entities": {{"ctc_operator": "lt", "ctc_amount": 5}}}}
-    
-    Example for "list those companies":
-    {{"intent": "get_placement_companies_by_ctc", "entities": {{}}}}
-    
-    Example for "which ones":
-    {{"intent": "get_placement_companies_by_ctc", "entities": {{}}}}
-    
-    Example for "can you list the companies":
-    {{"intent": "get_placement_companies_by_ctc", "entities": {{}}}}
-    --- END PLACEMENT EXAMPLES ---
-
-    --- NEW HELP/ESCALATION EXAMPLES ---
-    Example for "help me":
-    {{"intent": "get_help_escalation", "entities": {{}}}}
-    
-    Example for "this is not working":
-    {{"intent": "get_help_escalation", "entities": {{}}}}
-    
-    Example for "i need to talk to a person":
-    {{"intent": "get_help_escalation", "entities": {{}}}}
-
-    Example for "you are a stupid bot":
-    {{"intent": "get_help_escalation", "entities": {{}}}}
-
-    Example for "i am lost":
-    {{"intent": "get_help_escalation", "entities": {{}}}}
-    --- END HELP EXAMPLES ---
-
-    Example for "how to check attendance":
-    {{"intent": "get_student_portal_info", "entities": {{}}}}
-    
-    Example for "where can i check my cie marks":
-    {{"intent": "get_student_portal_info", "entities": {{}}}}
-
-    --- STUDENT INFO EXAMPLES ---
-    Example for "when do placements start":
-    {{"intent": "get_placement_start_info", "entities": {{}}}}
-    
-    Example for "when do placement activities begin for 5th sem":
-    {{"intent": "get_placement_start_info", "entities": {{}}}}
+    cache_key = normalize_query(user_query) if INTENT_CACHE_ENABLED else None
+    if cache_key:
+        cached = intent_cache.get(cache_key)
+        if cached is not MISSING:
+            return copy.deepcopy(cached['intent_data'])
 
-    Example for "what to do if I fail a class":
-    {{"intent": "get_exam_registration_info", "entities": {{}}}}
-
-    Example for "how to register for makeup exam":
-    {{"intent": "get_exam_registration_info", "entities": {{}}}}
-
-    Example for "i lost my id card":
-    {{"intent": "get_lost_item_info", "entities": {{"lost_item": "id card"}}}}
-
-    Example for "what to do if i lose my hall ticket":
-    {{"intent": "get_lost_item_info", "entities": {{"lost_item": "hall ticket"}}}}
-
-    Example for "can u tell the nie canteen food menu":
-    {{"intent": "get_canteen_info", "entities": {{}}}}
-    --- END STUDENT INFO EXAMPLES ---
-
-    --- NEW DRESS CODE EXAMPLES ---
-    Example for "what is the dress code":
-    {{"intent": "get_dress_code", "entities": {{}}}}
-
-    Example for "is id card compulsory":
-    {{"intent": "get_dress_code", "entities": {{}}}}
-    
-    Example for "do i have to wear my id card":
-    {{"intent": "get_dress_code", "entities": {{}}}}
-
-    Example for "are jeans allowed":
-    {{"intent": "get_dress_code", "entities": {{"category": "jeans"}}}}
-    --- END NEW DRESS CODE EXAMPLES ---
-    
-    --- FACULTY COURSES EXAMPLES ---
-    Example for "what courses are taught by Dr. Kuzhalvaimozhi":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "Dr. Kuzhalvaimozhi"}}}}
-
-    Example for "what subjects does Dr. Anitha R teach":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "Dr. Anitha R"}}}}
-
-    Example for "list all of principal's courses":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-    --- END FACULTY COURSES EXAMPLES ---
-
-    --- FACULTY AVAILABILITY (FREE/BUSY) EXAMPLES ---
-    Example for "when is Dr Vanamala free on monday":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "Dr Vanamala", "day": "Monday"}}}}
-
-    Example for "is Dr Anitha R free at 3pm on tuesday":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "Dr Anitha R", "day": "Tuesday", "time_of_day": "3pm"}}}}
-    
-    Example for "is principal sir free":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-
-    Example for "is mnr free today":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "MNR", "day": "today"}}}}
-    
-    Example for "when is sk free tomorrow":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "SK", "day": "tomorrow"}}}}
-    --- END FACULTY AVAILABILITY EXAMPLES ---
-
-    --- NEW: FACULTY SCHEDULE (CLASS LIST) EXAMPLES ---
-    Example for "what is dr anitha's schedule on monday":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "Dr Anitha", "day": "Monday"}}}}
-    
-    Example for "show me mnr's schedule for today":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "MNR", "day": "today"}}}}
-    
-    Example for "what classes does sk have tomorrow":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "SK", "day": "tomorrow"}}}}
-    
-    Example for "what is the principal's schedule":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "Dr.Rohini Nagapadma"}}}}
-    
-    Example for "show me all of dr anitha's classes":
-    {{"intent": "get_timetable", "entities": {{"faculty_name": "dr anitha"}}}}
-    --- END FACULTY SCHEDULE EXAMPLES ---
-
-    --- NEW: FACULTY DYNAMIC LOCATION (LOCATION ON DAY) EXAMPLES ---
-    Example for "where can i find dr anitha on monday":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "Dr Anitha", "day": "Monday"}}}}
-    
-    Example for "where is mnr today":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "MNR", "day": "today"}}}}
-    
-    Example for "location of dr vanamala on tuesday":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "Dr Vanamala", "day": "Tuesday"}}}}
-    
-    Example for "where is sk now":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "SK", "day": "today"}}}}
-    
-    Example for "where is sk's office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "SK"}}}}
-    
-    Example for "where is sk":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "SK"}}}}
-    --- END FACULTY DYNAMIC LOCATION EXAMPLES ---
-
-    --- NEW: FACULTY CAMPUS AVAILABILITY (ACTIVE DAYS) EXAMPLES ---
-    Example for "what days is dr anitha on campus":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "Dr Anitha"}}}}
-    
-    Example for "when is mnr in college":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "MNR"}}}}
-    
-    Example for "is sk in north campus this week":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "SK"}}}}
-    
-    Example for "is sk available in campus today":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "SK", "day": "today"}}}}
-
-    Example for "is sk avialable in north campus today":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "SK", "location_name": "north campus", "day": "today"}}}}
-
-    Example for "is sk avialable in north campus on monday":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "SK", "location_name": "north campus", "day": "Monday"}}}}
-
-    Example for "is cnc available in north campus today":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "CN Chinnaswamy", "location_name": "north campus", "day": "today"}}}}
-    
-    Example for "is principal in college tomorrow":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "Dr.Rohini Nagapadma", "day": "tomorrow"}}}}
-    --- END FACULTY CAMPUS AVAILABILITY EXAMPLES ---
-
-    --- NEW: BREAK TIME EXAMPLES ---
-    Example for "what time is break":
-    {{"intent": "get_break_info", "entities": {{}}}}
-    
-    Example for "when is lunch break":
-    {{"intent": "get_break_info", "entities": {{}}}}
-    
-    Example for "what are the break timings":
-    {{"intent": "get_break_info", "entities": {{}}}}
-    --- END BREAK TIME EXAMPLES ---
-    
-    --- FOLLOW-UP EXAMPLES (FOR SLOT-FILLING) ---
-    Example for "what about for A section":
-    {{"intent": "unknown", "entities": {{"section": "A"}}}}
-
-    Example for "and for cse b":
-    {{"intent": "unknown", "entities": {{"branch": "CSE", "section": "B"}}}}
-
-    Example for "what about mnr":
-    {{"intent": "unknown", "entities": {{"faculty_name": "Ms. Meghana NR"}}}}
-    
-    Example for "what about sk":
-    {{"intent": "unknown", "entities": {{"faculty_name": "Dr. S Kuzhalvaimozhi"}}}}
-    
-    Example for "and for cse b":
-    {{"intent": "unknown", "entities": {{"branch": "CSE", "section": "B"}}}}
-    
-    Example for "cse a 1st year":
-    {{"intent": "unknown", "entities": {{"branch": "CSE", "section": "A", "year": 1}}}}
-
-    Example for "monday":
-    {{"intent": "unknown", "entities": {{"day": "Monday"}}}}
-    
-    Example for "today":
-    {{"intent": "unknown", "entities": {{"day": "today"}}}}
-    
-    Example for "and for tomorrow":
-    {{"intent": "unknown", "entities": {{"day": "tomorrow"}}}}
-
-    
-    Example for "what about for the week":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"day": "all"}}}}
-
-    Example for "where can i find her":
-    {{"intent": "get_faculty_location_on_day", "entities": {{}}}}
-    
-    Example for "where can i find him":
-    {{"intent": "get_faculty_location_on_day", "entities": {{}}}}
-
-    Example for "yes":
-    {{"intent": "general_chat", "entities": {{}}}}
-    
-    Example for "no that's wrong":
-    {{"intent": "general_chat", "entities": {{}}}}
-    --- END FOLLOW-UP EXAMPLES ---
-    
-    --- INITIALS EXAMPLES ---
-    Example for "who is mnr":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "Ms. Meghana NR"}}}}
-    
-    Example for "where is mnr's office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "Ms. Meghana NR"}}}}
-    
-    Example for "is mnr available on north campus on monday":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "Ms. Meghana NR", "location_name": "north campus", "day": "Monday"}}}}
-
-    Example for "is sk free on monday":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "Dr S Kuzhalvaimozhi", "day": "Monday"}}}}
-
-    Example for "what does cnc teach":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-
-    Example for "when is hod free":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "HOD"}}}}
-    
-    Example for "what is the hod schedule":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "HOD"}}}}
-
-    Example for "when can i meet ise hod":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "HOD", "branch": "ISE"}}}}
-
-    Example for "where can i find cse hod":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "HOD", "branch": "CSE", "day": "today"}}}}
-
-    Example for "ise hod office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "HOD", "branch": "ISE"}}}}
-    # --- END OF NEW EXAMPLES ---
-
-    --- END INITIALS EXAMPLES ---
-    
-    Example for "what does sk teach":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "Dr S Kuzhalvaimozhi"}}}}
-    
-    Example for "who teaches cn":
-    {{"intent": "get_course_instructors", "entities": {{"course_name": "Computer Networks"}}}}
-    
-    Example for "schedule for ds":
-    {{"intent": "get_timetable", "entities": {{"course_name": "Distributed Systems"}}}}
-    
-    Example for "who teaches toc":
-    {{"intent": "get_course_instructors", "entities": {{"course_name": "Theory of Computation"}}}}
-
-    Example for "what does cnc teach":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-
-    Example for "when is hod free":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "HOD"}}}}
-    
-    Example for "what is the hod schedule":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "HOD"}}}}
-
-    Example for "when can i meet ise hod":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "HOD", "branch": "ISE"}}}}
-
-    Example for "where can i find cse hod":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "HOD", "branch": "CSE", "day": "today"}}}}
-
-    Example for "ise hod office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "HOD", "branch": "ISE"}}}}
-
-
-
-    Example for "TOC prof?":
-    {{"intent": "get_course_instructors", "entities": {{"course_name": "Theory of Computation"}}}}
-
-    Example for "who is cnc":
-    {{"intent": "get_faculty_info", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-
-    Example for "where is cnc":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-
-    Example for "is cnc available on monday":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "CN Chinnaswamy", "day": "Monday"}}}}
-
-    Example for "what is cnc's schedule for today":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "CN Chinnaswamy", "day": "today"}}}}
-    
-    Example for "where is cnc tomorrow":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "CN Chinnaswamy", "day": "tomorrow"}}}}
-    
-    Example for "what days is cnc on campus":
-    {{"intent": "get_faculty_campus_availability", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-
-    Example for "what does cnc teach":
-    {{"intent": "get_faculty_courses", "entities": {{"faculty_name": "CN Chinnaswamy"}}}}
-    Example for "when is hod free":
-    {{"intent": "get_faculty_availability", "entities": {{"faculty_name": "HOD"}}}}
-    
-    Example for "what is the hod schedule":
-    {{"intent": "get_faculty_schedule", "entities": {{"faculty_name": "HOD"}}}}
-    
-    Example for "where is the cse hod":
-    {{"intent": "get_faculty_location_on_day", "entities": {{"faculty_name": "HOD", "branch": "CSE", "day": "today"}}}}
-
-    Example for "ise hod office":
-    {{"intent": "get_faculty_location", "entities": {{"faculty_name": "HOD", "branch": "ISE"}}}}
-    --- END INITIALS EXAMPLES ---
-    --- NEW: COLLEGE INFO EXAMPLES ---
-    Example for "tell me about the college":
-    {{"intent": "get_college_info", "entities": {{}}}}
-    
-    Example for "info about nie":
-    {{"intent": "get_college_info", "entities": {{}}}}
+    families = intent_prompts.select_families(user_query) if INTENT_PROMPT_SHARDS_ENABLED else None
+    try:
+        intent_data = await _request_intent(user_query, intent_prompts.prompt_for(families))
+        # A shard only knows its own intents. A bare "unknown" means the pre-router
+        # picked the wrong family, so ask again with every intent in the prompt.
+        if families and isinstance(intent_data, dict) and intent_data.get('intent') == 'unknown' and not intent_data.get('entities'):
+            logger.info(f"Intent shard {families} returned 'unknown'. Retrying with the full prompt.")
+            intent_data = await _request_intent(user_query, intent_prompts.FULL_PROMPT)
+
+        if intent_data is not None:
+            _cache_intent(cache_key, intent_data)
+            return intent_data
+        else:
+            logger.error("Error: get_query_intent received None from API.")
+            return {"intent": "unknown", "entities": {}}
+            
+    except Exception as e:
+        logger.error(f"Error getting intent from Gemini: {e}")
+        try:
+            return json.loads(str(e))
+        except json.JSONDecodeError:
+            logger.error(f"Error: Could not parse Gemini response as JSON. Error: {e}")
+            return {"intent": "unknown", "entities": {}}
 
-    Example for "what is this college":
-    {{"intent": "get_college_info", "entities": {{}}}}
-    --- END COLLEGE INFO EXAMPLES ---
 
-    Example for "thanks":
-    {{"intent": "general_chat", "entities": {{}}}}
-    """
-    
+async def _request_intent(user_query, system_prompt):
+    """One intent classification call. Returns the parsed JSON, or None if Gemini sent no text."""
     payload = {
         "contents": [
             {
@@ -789,24 +351,11 @@ async def get_query_intent(user_query):
             "responseMimeType": "application/json",
         }
     }
-    
-    try:
-        # --- FIX: Corrected function call typo ---
-        response_text = await _call_gemini_with_retry(payload, "intent")
-        if response_text:
-            json_text = response_text.strip().replace("```json\n", "").replace("\n```", "")
-            return json.loads(json_text)
-        else:
-            print("Error: get_query_intent received None from API.")
-            return {"intent": "unknown", "entities": {}}
-            
-    except Exception as e:
-        print(f"Error getting intent from Gemini: {e}")
-        try:
-            return json.loads(str(e))
-        except json.JSONDecodeError:
-            print(f"Error: Could not parse Gemini response as JSON. Error: {e}")
-            return {"intent": "unknown", "entities": {}}
+    response_text = await _call_gemini_with_retry(payload, "intent")
+    if not response_text:
+        return None
+    json_text = response_text.strip().replace("```json\n", "").replace("\n```", "")
+    return json.loads(json_text)
 
 
 async def generate_final_response(user_query, db_results):
@@ -893,7 +442,7 @@ async def generate_final_response(user_query, db_results):
         response_text = await _call_gemini_with_retry(payload, "response")
         return response_text
     except Exception as e:
-        print(f"Error generating final response from Gemini: {e}")
+        logger.error(f"Error generating final response from Gemini: {e}")
         return f"I'm sorry, I encountered an error trying to generate a response. (Error: {e})"
 
 
@@ -905,10 +454,10 @@ async def generate_suggestion_response(user_query):
     # (This function is unchanged from your file)
     if SUGGESTION_FORM_URL:
         prompt = _FORM_SUGGESTION_PROMPT.format(user_query=user_query, form_url=SUGGESTION_FORM_URL)
-        print("Using Form Suggestion URL.")
+        logger.debug("Using Form Suggestion URL.")
     else:
         prompt = _FALLBACK_SUGGESTION_PROMPT.format(user_query=user_query)
-        print("Using Fallback Suggestion Prompt.")
+        logger.debug("Using Fallback Suggestion Prompt.")
 
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
@@ -922,5 +471,5 @@ async def generate_suggestion_response(user_query):
         response_text = await _call_gemini_with_retry(payload, "response")
         return response_text
     except Exception as e:
-        print(f"Error generating suggestion response from Gemini: {e}")
+        logger.error(f"Error generating suggestion response from Gemini: {e}")
         return f"I'm sorry, I couldn't find information about that. (Error: {e})"
@@ -0,0 +1,153 @@
+"""
+Process-wide keep-alive HTTP client for outbound API calls.
+
+Flask[async] runs every request in its own short-lived event loop, and an
+aiohttp.ClientSession is tied to the loop that created it. Opening a session per
+call (what gemini_client used to do) means every Gemini request paid a fresh DNS
+lookup, TCP connect and TLS handshake.
+
+SharedHttpClient owns one long-lived event loop on a daemon thread and one
+ClientSession on that loop. Coroutines running on any other loop hand their
+request over with run_coroutine_threadsafe and await the result, so all of them
+share the same pooled, kept-alive connections.
+"""
+import asyncio
+import atexit
+import logging
+import threading
+
+import aiohttp
+
+
+class HttpResponse:
+    """Status, headers and body of a finished request (aiohttp responses can't leave their loop)."""
+
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return self.body.decode('utf-8', errors='replace')
+
+
+class SharedHttpClient:
+    """
+    One aiohttp session shared by every caller in the process.
+
+    limit / limit_per_host: connection pool size (aiohttp.TCPConnector)
+    keepalive_timeout: seconds an idle connection is kept open for reuse
+    timeout / connect_timeout: default per-call budget, overridable per request
+    """
+
+    def __init__(self, name, limit=100, limit_per_host=20, keepalive_timeout=60,
+                 timeout=30, connect_timeout=10):
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        """Starts the loop thread and opens the session. Safe to call more than once."""
+        with self._lock:
+            if self.started:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name=f"{self.name}_http", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._open_session(), loop).result()
+            logging.info(
+                f"HTTP client '{self.name}' started (limit={self.limit}, "
+                f"limit_per_host={self.limit_per_host}, keepalive={self.keepalive_timeout}s)."
+            )
+
+    async def _open_session(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout),
+        )
+
+    def close(self):
+        """Closes the session and stops the loop thread."""
+        with self._lock:
+            if not self.started:
+                return
+            loop = self._loop
+            try:
+                asyncio.run_coroutine_threadsafe(self._session.close(), loop).result(timeout=5)
+            except Exception as e:
+                logging.warning(f"HTTP client '{self.name}' did not close cleanly: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+            self._session = None
+            logging.info(f"HTTP client '{self.name}' closed.")
+
+    async def _request(self, method, url, timeout, kwargs):
+        if timeout is not None:
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout, connect=min(timeout, self.connect_timeout))
+        async with self._session.request(method, url, **kwargs) as response:
+            body = await response.read()
+            return HttpResponse(response.status, dict(response.headers), body)
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        """
+        Sends a request on the shared session and returns an HttpResponse.
+        `timeout` (seconds) overrides the client default for this call only.
+        Raises aiohttp.ClientError / asyncio.TimeoutError like aiohttp itself.
+        """
+        if not self.started:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(self._request(method, url, timeout, kwargs), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def post(self, url, timeout=None, **kwargs):
+        return await self.request('POST', url, timeout=timeout, **kwargs)
+
+    async def get(self, url, timeout=None, **kwargs):
+        return await self.request('GET', url, timeout=timeout, **kwargs)
+
+
+_clients = []
+
+
+def create_client(name, **options):
+    """Creates a SharedHttpClient that is closed automatically at interpreter exit."""
+    client = SharedHttpClient(name, **options)
+    _clients.append(client)
+    return client
+
+
+@atexit.register
+def close_all():
+    for client in _clients:
+        client.close()
@@ -0,0 +1,425 @@
+"""
+Intent classification prompt, split into per-family shards.
+
+The intent prompt used to be one ~32 KB f-string (173 examples, many of them
+duplicates) rebuilt and sent in full with every message. The same content now
+lives here as data: intent and entity definitions, rules and deduplicated
+examples, each tagged with the intent family it belongs to. Every prompt is
+assembled once at import time:
+
+- FULL_PROMPT: all families, used when the query can't be pinned down
+- SHARD_PROMPTS: one prompt per family and per pair of families, each carrying
+  only that family's definitions and examples (plus the conversation family)
+
+select_families() is the cheap keyword pre-router that decides which shard a
+query gets. gemini_client.get_query_intent() falls back to FULL_PROMPT when no
+shard fits or the shard answers "unknown".
+"""
+import itertools
+import json
+import re
+
+INTRO = (
+    "You are an intent classification system for a college chatbot. Your goal is to analyze the user's "
+    "query and categorize it into one of the following intents, extracting relevant entities."
+)
+
+# --- Intent definitions, by family ---
+INTENT_DEFINITIONS = {
+    'timetable': [
+        ("get_timetable", "User is asking for a class schedule for a branch/section, a course, or all of a faculty member's classes."),
+    ],
+    'faculty': [
+        ("get_faculty_info", "User is asking *about* a professor (e.g., \"who is\", \"tell me about\"). This is for FULL details."),
+        ("get_faculty_location", "User is asking *only* for the **static office location** of a faculty member (e.g., \"where is office\", \"location of\"). This intent *NEVER* has a 'day' entity."),
+        ("get_faculty_location_on_day", "User is asking *where* a faculty member *is* on a **specific day** (e.g., \"where is dr anitha on monday\", \"where is mnr today\"). This intent *MUST* have a 'day' entity."),
+        ("get_faculty_schedule", "User is asking for a faculty's *list of classes* on a specific day (e.g., \"what is dr anitha's schedule\", \"what classes does mnr have tomorrow\")."),
+        ("get_faculty_availability", "User is asking when a faculty member is *free* or *busy* (e.g., \"is dr anitha free at 3pm\", \"when is mnr free\")."),
+        ("get_faculty_campus_availability", "User is asking *which days* a faculty is on campus OR *if* they are on campus on a *specific day* (e.g., \"what days is dr anitha in college\", \"is mnr on north campus today\")."),
+        ("get_faculty_courses", "User is asking for a list of all courses taught by a specific faculty member (e.g., \"what subjects does dr anitha teach\")."),
+        ("get_course_instructors", "User is asking *who* teaches a specific course."),
+    ],
+    'placement': [
+        ("get_placement_stats", "User is asking for the *full report*, *all companies*, or *complete details*."),
+        ("get_placements_info", "User is asking about *contact info* for the placement office."),
+        ("get_placement_summary", "User is asking for *specific high-level stats* (e.g., highest salary, average salary)."),
+        ("get_company_stats", "User is asking for stats related to *one specific company*."),
+        ("get_placement_count_by_type", "User is asking *how many* companies of a certain type came."),
+        ("get_placement_count_by_ctc", "User is asking *how many* students or companies got packages *above or below* a certain CTC."),
+        ("get_placement_companies_by_ctc", "User is asking to *list* the companies *above or below* a certain CTC."),
+        ("get_placement_start_info", "User is asking when placements begin."),
+    ],
+    'location': [
+        ("get_location", "User is asking for the location of a static place (room, lab, office) or the campus map."),
+    ],
+    'static_info': [
+        ("get_club_info", "User is asking about student clubs."),
+        ("get_hostel_info", "User is asking about student housing/hostels."),
+        ("get_admissions_info", "User is asking about college admissions."),
+        ("get_fees_info", "User is asking about tuition fees or payments."),
+        ("get_transport_info", "User is asking about college bus routes or transport."),
+        ("get_dress_code", "User is asking about the college dress code."),
+        ("get_anti_ragging_info", "User is asking about anti-ragging policies or contacts."),
+        ("get_college_info", "User is asking for general information about the college."),
+        ("get_events_info", "User is asking about college events or fests."),
+        ("get_notices", "User is asking for recent notices or announcements."),
+        ("get_scholarship_info", "User is asking about scholarships."),
+        ("get_student_portal_info", "User is asking about attendance, CIE marks, or internal marks."),
+        ("get_break_info", "User is asking about break or lunch timings."),
+        ("get_help_escalation", "User is frustrated, needs help, or wants to talk to a person."),
+        ("get_exam_registration_info", "User is asking about makeup exams or backlog registration."),
+        ("get_lost_item_info", "User is asking about losing an ID card or hall ticket."),
+        ("get_canteen_info", "User is asking for information about the canteen."),
+    ],
+    'conversation': [
+        ("general_chat", "User is making small talk, greeting, or asking a question not related to the database. (e.g., \"yes\", \"no\", \"ok\", \"thanks\")."),
+        ("unknown", "The user's intent is unclear or not covered."),
+        ("suggest_data", "The user is suggesting new information to be added."),
+    ],
+}
+
+FAMILY_TITLES = {
+    'timetable': "Timetable Intents",
+    'faculty': "Faculty Intents",
+    'placement': "Placement Intents",
+    'location': "Location Intents",
+    'static_info': "Student Info Intents",
+    'conversation': "Other Intents",
+}
+
+ENTITY_DEFINITIONS = {
+    'faculty_name': "The name of the faculty member (e.g., \"Dr. Anitha R\", \"MNR\", \"SK\", \"principal\").",
+    'course_name': "The name of a course (e.g., \"Applied Physics\", \"CN\", \"TOC\").",
+    'course_code': "The code for a course (e.g., \"18CS45\", \"PHY101\").",
+    'company_name': "The name of a company (e.g., \"VISA\", \"JPMC\", \"Google\").",
+    'branch': "The student branch (e.g., \"CSE\", \"AI&ML\", \"ISE\").",
+    'year': "The year of study (e.g., 1, 2, 3, 4).",
+    'section': "The class section (e.g., \"A\", \"B\").",
+    'day': "The day of the week (e.g., \"Monday\", \"today\", \"tomorrow\").",
+    'club_name': "The name of the club (e.g., \"NISB\", \"Robotics\").",
+    'hostel_name': "The name of the hostel (e.g., \"NIE North Men's Hostel\").",
+    'scholarship_name': "The name of the scholarship (e.g., \"Merit Scholarship\").",
+    'topic': "A general topic (e.g., \"ragging\", \"TechNIEks\", \"library notice\").",
+    'location_name': "A generic place (e.g., \"canteen\", \"ground\", \"library\", \"north campus\").",
+    'room_number': "A specific room (e.g., \"105\", \"210\", \"MB-1\").",
+    'lab_name': "A specific lab (e.g., \"ISE lab\", \"CSE labs\").",
+    'office_name': "A specific office (e.g., \"principal office\", \"placement section\").",
+    'stat_type': "The specific placement stat requested (e.g., \"highest_ctc\", \"average_ctc\").",
+    'ctc_type': "The type of placement package (e.g., \"Dream\", \"Mass\").",
+    'ctc_amount': "The CTC value in lakhs (e.g., 12, 8.5).",
+    'ctc_operator': "The comparison operator (\"gt\" for greater than, \"lt\" for less than).",
+    'lost_item': "The item the user lost (e.g., \"id card\", \"hall ticket\").",
+    'time_of_day': "A specific time mentioned by the user (e.g., \"3pm\", \"10:00\").",
+}
+
+# Entities each family extracts (follow-up slot values are always included)
+FAMILY_ENTITIES = {
+    'timetable': ['branch', 'year', 'section', 'day', 'course_name', 'course_code', 'faculty_name'],
+    'faculty': ['faculty_name', 'day', 'time_of_day', 'location_name', 'branch', 'course_name', 'course_code'],
+    'placement': ['company_name', 'stat_type', 'ctc_type', 'ctc_amount', 'ctc_operator'],
+    'location': ['room_number', 'lab_name', 'office_name', 'location_name'],
+    'static_info': ['club_name', 'hostel_name', 'scholarship_name', 'topic', 'lost_item', 'branch', 'year'],
+    'conversation': ['faculty_name', 'branch', 'section', 'year', 'day'],
+}
+
+# (rule, families it applies to; None = every prompt)
+RULES = [
+    ("You must respond in JSON format only. Do not add any other text.", None),
+    ("Handle spelling mistakes gracefully.", None),
+    ("\"hi\", \"hello\", \"thanks\", \"bye\", \"yes\", \"no\", \"yep\", \"nope\", \"ok\" are \"general_chat\".", None),
+    ("Ignore all honorifics like 'sir', 'mam', 'madam'. They are not part of the name.", None),
+    ("**CRITICAL:** \"today\" and \"tomorrow\" are valid values for the \"day\" entity.", None),
+    ("**CRITICAL:** If a query asks \"where is [faculty]\" and includes a day (like \"today\" or \"Monday\"), the intent is `get_faculty_location_on_day`.", {'faculty'}),
+    ("**CRITICAL:** If a query asks \"is [faculty] available/on campus\" and includes a day (like \"today\" or \"Monday\"), the intent is `get_faculty_campus_availability` **AND YOU MUST EXTRACT THE \"day\" ENTITY.**", {'faculty'}),
+    ("**CRITICAL:** If a query asks \"where is [faculty]\" and does *NOT* include a day, the intent is `get_faculty_location` (for their static office).", {'faculty'}),
+    ("**CRITICAL:** If the user's query contains two different questions (e.g., \"where is X and when is Y free\"), YOU MUST ONLY classify the **first** question. Ignore the second part.", None),
+]
+SHARD_RULE = "If the query does not fit any intent listed above, respond with {\"intent\": \"unknown\", \"entities\": {}}."
+
+# --- Examples, by family (deduplicated; the response is the exact JSON Gemini should return) ---
+EXAMPLES = {
+    'timetable': [
+        ('can i get timetable for cse a 1st year on monday', '{"intent": "get_timetable", "entities": {"branch": "CSE", "year": 1, "section": "A", "day": "Monday"}}'),
+        ('show me the schedule for 18CS45', '{"intent": "get_timetable", "entities": {"course_code": "18CS45"}}'),
+        ("show me all of dr anitha's classes", '{"intent": "get_timetable", "entities": {"faculty_name": "dr anitha"}}'),
+        ('schedule for ds', '{"intent": "get_timetable", "entities": {"course_name": "Distributed Systems"}}'),
+    ],
+    'faculty': [
+        ('who is dr anitha r', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Dr. Anitha R"}}'),
+        ('who is principal', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('tell me about dr vanamala mam', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Dr. CK Vanamala"}}'),
+        ('details about principal sir', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('who is the coe', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Dr. S Kuzhalvaimozhi"}}'),
+        ('who is the dean', '{"intent": "get_faculty_info", "entities": {"faculty_name": "C Vidya Raj"}}'),
+        ('where can i find vanamal', '{"intent": "get_faculty_location", "entities": {"faculty_name": "vanamal"}}'),
+        ("where is dr anitha r's office", '{"intent": "get_faculty_location", "entities": {"faculty_name": "Dr. Anitha R"}}'),
+        ("location of principal's office", '{"intent": "get_faculty_location", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('who teaches applied physics', '{"intent": "get_course_instructors", "entities": {"course_name": "Applied Physics"}}'),
+        ('who is the instructor for 18CS45', '{"intent": "get_course_instructors", "entities": {"course_code": "18CS45"}}'),
+        ('is sk free tomorrow', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "SK", "day": "tomorrow"}}'),
+        ('what courses are taught by Dr. Kuzhalvaimozhi', '{"intent": "get_faculty_courses", "entities": {"faculty_name": "Dr. Kuzhalvaimozhi"}}'),
+        ('what subjects does Dr. Anitha R teach', '{"intent": "get_faculty_courses", "entities": {"faculty_name": "Dr. Anitha R"}}'),
+        ("list all of principal's courses", '{"intent": "get_faculty_courses", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('when is Dr Vanamala free on monday', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "Dr Vanamala", "day": "Monday"}}'),
+        ('is Dr Anitha R free at 3pm on tuesday', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "Dr Anitha R", "day": "Tuesday", "time_of_day": "3pm"}}'),
+        ('is principal sir free', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('is mnr free today', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "MNR", "day": "today"}}'),
+        ('when is sk free tomorrow', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "SK", "day": "tomorrow"}}'),
+        ("what is dr anitha's schedule on monday", '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "Dr Anitha", "day": "Monday"}}'),
+        ("show me mnr's schedule for today", '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "MNR", "day": "today"}}'),
+        ('what classes does sk have tomorrow', '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "SK", "day": "tomorrow"}}'),
+        ("what is the principal's schedule", '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "Dr.Rohini Nagapadma"}}'),
+        ('where can i find dr anitha on monday', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "Dr Anitha", "day": "Monday"}}'),
+        ('where is mnr today', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "MNR", "day": "today"}}'),
+        ('location of dr vanamala on tuesday', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "Dr Vanamala", "day": "Tuesday"}}'),
+        ('where is sk now', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "SK", "day": "today"}}'),
+        ("where is sk's office", '{"intent": "get_faculty_location", "entities": {"faculty_name": "SK"}}'),
+        ('where is sk', '{"intent": "get_faculty_location", "entities": {"faculty_name": "SK"}}'),
+        ('what days is dr anitha on campus', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "Dr Anitha"}}'),
+        ('when is mnr in college', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "MNR"}}'),
+        ('is sk in north campus this week', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "SK"}}'),
+        ('is sk available in campus today', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "SK", "day": "today"}}'),
+        ('is sk avialable in north campus today', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "SK", "location_name": "north campus", "day": "today"}}'),
+        ('is sk avialable in north campus on monday', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "SK", "location_name": "north campus", "day": "Monday"}}'),
+        ('is cnc available in north campus today', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "CN Chinnaswamy", "location_name": "north campus", "day": "today"}}'),
+        ('is principal in college tomorrow', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "Dr.Rohini Nagapadma", "day": "tomorrow"}}'),
+        ('who is mnr', '{"intent": "get_faculty_info", "entities": {"faculty_name": "Ms. Meghana NR"}}'),
+        ("where is mnr's office", '{"intent": "get_faculty_location", "entities": {"faculty_name": "Ms. Meghana NR"}}'),
+        ('is mnr available on north campus on monday', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "Ms. Meghana NR", "location_name": "north campus", "day": "Monday"}}'),
+        ('is sk free on monday', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "Dr S Kuzhalvaimozhi", "day": "Monday"}}'),
+        ('what does cnc teach', '{"intent": "get_faculty_courses", "entities": {"faculty_name": "CN Chinnaswamy"}}'),
+        ('when is hod free', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "HOD"}}'),
+        ('what is the hod schedule', '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "HOD"}}'),
+        ('when can i meet ise hod', '{"intent": "get_faculty_availability", "entities": {"faculty_name": "HOD", "branch": "ISE"}}'),
+        ('where can i find cse hod', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "HOD", "branch": "CSE", "day": "today"}}'),
+        ('ise hod office', '{"intent": "get_faculty_location", "entities": {"faculty_name": "HOD", "branch": "ISE"}}'),
+        ('what does sk teach', '{"intent": "get_faculty_courses", "entities": {"faculty_name": "Dr S Kuzhalvaimozhi"}}'),
+        ('who teaches cn', '{"intent": "get_course_instructors", "entities": {"course_name": "Computer Networks"}}'),
+        ('who teaches toc', '{"intent": "get_course_instructors", "entities": {"course_name": "Theory of Computation"}}'),
+        ('TOC prof?', '{"intent": "get_course_instructors", "entities": {"course_name": "Theory of Computation"}}'),
+        ('who is cnc', '{"intent": "get_faculty_info", "entities": {"faculty_name": "CN Chinnaswamy"}}'),
+        ('where is cnc', '{"intent": "get_faculty_location", "entities": {"faculty_name": "CN Chinnaswamy"}}'),
+        ('is cnc available on monday', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "CN Chinnaswamy", "day": "Monday"}}'),
+        ("what is cnc's schedule for today", '{"intent": "get_faculty_schedule", "entities": {"faculty_name": "CN Chinnaswamy", "day": "today"}}'),
+        ('where is cnc tomorrow', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "CN Chinnaswamy", "day": "tomorrow"}}'),
+        ('what days is cnc on campus', '{"intent": "get_faculty_campus_availability", "entities": {"faculty_name": "CN Chinnaswamy"}}'),
+        ('where is the cse hod', '{"intent": "get_faculty_location_on_day", "entities": {"faculty_name": "HOD", "branch": "CSE", "day": "today"}}'),
+        ('what about for the week', '{"intent": "get_faculty_campus_availability", "entities": {"day": "all"}}'),
+        ('where can i find her', '{"intent": "get_faculty_location_on_day", "entities": {}}'),
+        ('where can i find him', '{"intent": "get_faculty_location_on_day", "entities": {}}'),
+    ],
+    'placement': [
+        ('show me all placement stats', '{"intent": "get_placement_stats", "entities": {}}'),
+        ('give me the full placement report', '{"intent": "get_placement_stats", "entities": {}}'),
+        ('list of all companies that visited', '{"intent": "get_placement_stats", "entities": {}}'),
+        ('what was the highest salary', '{"intent": "get_placement_summary", "entities": {"stat_type": "highest_ctc"}}'),
+        ('what is the highest ctc', '{"intent": "get_placement_summary", "entities": {"stat_type": "highest_ctc"}}'),
+        ('how many students were placed in total', '{"intent": "get_placement_summary", "entities": {"stat_type": "total_selects"}}'),
+        ('total selections', '{"intent": "get_placement_summary", "entities": {"stat_type": "total_selects"}}'),
+        ('average ctc', '{"intent": "get_placement_summary", "entities": {"stat_type": "average_ctc"}}'),
+        ('what is the median salary', '{"intent": "get_placement_summary", "entities": {"stat_type": "median_ctc"}}'),
+        ('lowest package', '{"intent": "get_placement_summary", "entities": {"stat_type": "lowest_ctc"}}'),
+        ('how many companies came', '{"intent": "get_placement_summary", "entities": {"stat_type": "total_companies"}}'),
+        ('placement summary', '{"intent": "get_placement_summary", "entities": {}}'),
+        ('stats for VISA', '{"intent": "get_company_stats", "entities": {"company_name": "VISA"}}'),
+        ('how many people did JPMC hire', '{"intent": "get_company_stats", "entities": {"company_name": "JPMC"}}'),
+        ('what was the ctc for Pure Storage', '{"intent": "get_company_stats", "entities": {"company_name": "Pure Storage"}}'),
+        ('who is the placement officer', '{"intent": "get_placements_info", "entities": {}}'),
+        ('how many dream companies offered packages', '{"intent": "get_placement_count_by_type", "entities": {"ctc_type": "Dream"}}'),
+        ('how many comapanies offerd dream packages', '{"intent": "get_placement_count_by_type", "entities": {"ctc_type": "Dream"}}'),
+        ('total mass recruiters', '{"intent": "get_placement_count_by_type", "entities": {"ctc_type": "Mass"}}'),
+        ('how many core companies came', '{"intent": "get_placement_count_by_type", "entities": {"ctc_type": "Core"}}'),
+        ('how many students got placed with a ctc of more than 12 lakhs', '{"intent": "get_placement_count_by_ctc", "entities": {"ctc_operator": "gt", "ctc_amount": 12}}'),
+        ('total selections with packages less than 8 lakhs', '{"intent": "get_placement_count_by_ctc", "entities": {"ctc_operator": "lt", "ctc_amount": 8}}'),
+        ('number of students who got over 20 lpa', '{"intent": "get_placement_count_by_ctc", "entities": {"ctc_operator": "gt", "ctc_amount": 20}}'),
+        ('list the companies that offered more than 15 lpa', '{"intent": "get_placement_companies_by_ctc", "entities": {"ctc_operator": "gt", "ctc_amount": 15}}'),
+        ('show me which companies gave packages under 5 lpa', '{"intent": "get_placement_companies_by_ctc", "entities": {"ctc_operator": "lt", "ctc_amount": 5}}'),
+        ('list those companies', '{"intent": "get_placement_companies_by_ctc", "entities": {}}'),
+        ('which ones', '{"intent": "get_placement_companies_by_ctc", "entities": {}}'),
+        ('can you list the companies', '{"intent": "get_placement_companies_by_ctc", "entities": {}}'),
+        ('when do placements start', '{"intent": "get_placement_start_info", "entities": {}}'),
+        ('when do placement activities begin for 5th sem', '{"intent": "get_placement_start_info", "entities": {}}'),
+    ],
+    'location': [
+        ('show me the college map', '{"intent": "get_location", "entities": {}}'),
+        ('where is the canteen', '{"intent": "get_location", "entities": {"location_name": "canteen"}}'),
+        ('where is room 105', '{"intent": "get_location", "entities": {"room_number": "105"}}'),
+        ('location of classroom 201', '{"intent": "get_location", "entities": {"room_number": "201"}}'),
+        ('where is mb-2', '{"intent": "get_location", "entities": {"room_number": "MB-2"}}'),
+        ('where are the ise labs', '{"intent": "get_location", "entities": {"lab_name": "ISE"}}'),
+        ('where is the physics lab', '{"intent": "get_location", "entities": {"lab_name": "Physics"}}'),
+        ('chemistry lab location', '{"intent": "get_location", "entities": {"lab_name": "Chemistry"}}'),
+        ('where are the cs labs', '{"intent": "get_location", "entities": {"lab_name": "CSE"}}'),
+        ('is lab location', '{"intent": "get_location", "entities": {"lab_name": "ISE"}}'),
+        ('cse lab location', '{"intent": "get_location", "entities": {"lab_name": "CSE"}}'),
+        ('physics lab location', '{"intent": "get_location", "entities": {"lab_name": "Physics"}}'),
+        ('where can i find the chemistry lab', '{"intent": "get_location", "entities": {"lab_name": "Chemistry"}}'),
+        ('where is the library', '{"intent": "get_location", "entities": {"location_name": "library"}}'),
+        ('where is the placement office', '{"intent": "get_location", "entities": {"office_name": "placement"}}'),
+        ('location of scholarship section', '{"intent": "get_location", "entities": {"office_name": "scholarship"}}'),
+        ('where is the stationary shop', '{"intent": "get_location", "entities": {"office_name": "stationary"}}'),
+        ('where does the principal usually sit', '{"intent": "get_location", "entities": {"office_name": "principal"}}'),
+        ('where is the principal office', '{"intent": "get_location", "entities": {"office_name": "principal"}}'),
+        ('where is the cse staff room', '{"intent": "get_location", "entities": {"office_name": "cse staff room"}}'),
+        ('cse staff room1', '{"intent": "get_location", "entities": {"office_name": "cse staff room"}}'),
+        ('ise staff room 2 location', '{"intent": "get_location", "entities": {"office_name": "ise staff room"}}'),
+        ('where is the auditorium', '{"intent": "get_location", "entities": {"office_name": "auditorium"}}'),
+        ('where are the hods', '{"intent": "get_location", "entities": {"office_name": "hod"}}'),
+        ("where is the 'stationary'?", '{"intent": "get_location", "entities": {"office_name": "stationary"}}'),
+        ('whats the lib location', '{"intent": "get_location", "entities": {"location_name": "library"}}'),
+        ("where is the principal's office and when is he free", '{"intent": "get_location", "entities": {"office_name": "principal"}}'),
+    ],
+    'static_info': [
+        ('what clubs are there', '{"intent": "get_club_info", "entities": {}}'),
+        ('tell me about the onyx club', '{"intent": "get_club_info", "entities": {"club_name": "Onyx"}}'),
+        ('do you have info on robotics club', '{"intent": "get_club_info", "entities": {"club_name": "Robotics"}}'),
+        ('help me', '{"intent": "get_help_escalation", "entities": {}}'),
+        ('this is not working', '{"intent": "get_help_escalation", "entities": {}}'),
+        ('i need to talk to a person', '{"intent": "get_help_escalation", "entities": {}}'),
+        ('you are a stupid bot', '{"intent": "get_help_escalation", "entities": {}}'),
+        ('i am lost', '{"intent": "get_help_escalation", "entities": {}}'),
+        ('how to check attendance', '{"intent": "get_student_portal_info", "entities": {}}'),
+        ('where can i check my cie marks', '{"intent": "get_student_portal_info", "entities": {}}'),
+        ('what to do if I fail a class', '{"intent": "get_exam_registration_info", "entities": {}}'),
+        ('how to register for makeup exam', '{"intent": "get_exam_registration_info", "entities": {}}'),
+        ('i lost my id card', '{"intent": "get_lost_item_info", "entities": {"lost_item": "id card"}}'),
+        ('what to do if i lose my hall ticket', '{"intent": "get_lost_item_info", "entities": {"lost_item": "hall ticket"}}'),
+        ('can u tell the nie canteen food menu', '{"intent": "get_canteen_info", "entities": {}}'),
+        ('what is the dress code', '{"intent": "get_dress_code", "entities": {}}'),
+        ('is id card compulsory', '{"intent": "get_dress_code", "entities": {}}'),
+        ('do i have to wear my id card', '{"intent": "get_dress_code", "entities": {}}'),
+        ('are jeans allowed', '{"intent": "get_dress_code", "entities": {"category": "jeans"}}'),
+        ('what time is break', '{"intent": "get_break_info", "entities": {}}'),
+        ('when is lunch break', '{"intent": "get_break_info", "entities": {}}'),
+        ('what are the break timings', '{"intent": "get_break_info", "entities": {}}'),
+        ('tell me about the college', '{"intent": "get_college_info", "entities": {}}'),
+        ('info about nie', '{"intent": "get_college_info", "entities": {}}'),
+        ('what is this college', '{"intent": "get_college_info", "entities": {}}'),
+    ],
+    'conversation': [
+        ('what about for A section', '{"intent": "unknown", "entities": {"section": "A"}}'),
+        ('and for cse b', '{"intent": "unknown", "entities": {"branch": "CSE", "section": "B"}}'),
+        ('what about mnr', '{"intent": "unknown", "entities": {"faculty_name": "Ms. Meghana NR"}}'),
+        ('what about sk', '{"intent": "unknown", "entities": {"faculty_name": "Dr. S Kuzhalvaimozhi"}}'),
+        ('cse a 1st year', '{"intent": "unknown", "entities": {"branch": "CSE", "section": "A", "year": 1}}'),
+        ('monday', '{"intent": "unknown", "entities": {"day": "Monday"}}'),
+        ('today', '{"intent": "unknown", "entities": {"day": "today"}}'),
+        ('and for tomorrow', '{"intent": "unknown", "entities": {"day": "tomorrow"}}'),
+        ('yes', '{"intent": "general_chat", "entities": {}}'),
+        ("no that's wrong", '{"intent": "general_chat", "entities": {}}'),
+        ('thanks', '{"intent": "general_chat", "entities": {}}'),
+    ],
+}
+
+FAMILIES = list(INTENT_DEFINITIONS)
+ROUTABLE_FAMILIES = [f for f in FAMILIES if f != 'conversation'] # 'conversation' rides along with every shard
+MAX_SHARD_FAMILIES = 2 # More matches than this -> the query is ambiguous, send the full prompt
+
+# --- Keyword pre-router ---
+FAMILY_KEYWORDS = {
+    'timetable': {
+        'timetable', 'tt', 'classes', 'class', 'schedule', 'section', 'sec', 'sem', 'semester',
+        'lecture', 'lectures', 'period', 'periods', 'cse', 'ise', 'aiml', 'year', 'yr',
+    },
+    'faculty': {
+        'dr', 'prof', 'professor', 'sir', 'mam', 'maam', 'madam', 'mr', 'mrs', 'ms', 'hod', 'principal',
+        'dean', 'coe', 'faculty', 'teacher', 'lecturer', 'teach', 'teaches', 'taught', 'teaching', 'free',
+        'busy', 'available', 'availability', 'meet', 'who', 'where', 'schedule', 'subjects', 'courses',
+        'instructor', 'office', 'days', 'campus',
+    },
+    'placement': {
+        'placement', 'placements', 'placed', 'ctc', 'lpa', 'lakh', 'lakhs', 'package', 'packages', 'salary',
+        'company', 'companies', 'comapanies', 'recruiters', 'hire', 'hired', 'dream', 'mass', 'core',
+        'selects', 'selections', 'stats', 'offer', 'offered', 'offers',
+    },
+    'location': {
+        'where', 'location', 'located', 'map', 'room', 'classroom', 'lab', 'labs', 'floor', 'block',
+        'library', 'lib', 'office', 'auditorium', 'stationary', 'staff', 'mb', 'find', 'sit',
+    },
+    'static_info': {
+        'club', 'clubs', 'hostel', 'hostels', 'admission', 'admissions', 'fee', 'fees', 'bus', 'buses',
+        'transport', 'route', 'routes', 'dress', 'wear', 'jeans', 'uniform', 'ragging', 'event', 'events',
+        'fest', 'fests', 'notice', 'notices', 'announcement', 'announcements', 'scholarship', 'scholarships',
+        'attendance', 'cie', 'marks', 'portal', 'break', 'lunch', 'makeup', 'backlog', 'exam', 'fail',
+        'lost', 'lose', 'id', 'card', 'hall', 'ticket', 'canteen', 'menu', 'food', 'college', 'nie',
+        'help', 'person', 'human', 'stupid', 'working',
+    },
+}
+_WORD = re.compile(r"[a-z0-9&]+")
+
+
+def select_families(user_query):
+    """
+    Intent families a query probably belongs to, best first, or None when the
+    full prompt should be used (no keyword matched, or too many families did).
+    """
+    words = _WORD.findall(user_query.lower().replace("'s", ' ').replace('.', ' '))
+    scores = {}
+    for family, keywords in FAMILY_KEYWORDS.items():
+        score = sum(1 for w in words if w in keywords)
+        if score:
+            scores[family] = score
+    if not scores or len(scores) > MAX_SHARD_FAMILIES:
+        return None
+    return tuple(sorted(scores, key=lambda f: (-scores[f], ROUTABLE_FAMILIES.index(f))))
+
+
+# --- Prompt assembly (runs once at import) ---
+
+def _render(families, shard):
+    families = [f for f in FAMILIES if f in families or f == 'conversation']
+    lines = [INTRO, "", "--- INTENT DEFINITIONS ---"]
+    for family in families:
+        lines.append(f"**{FAMILY_TITLES[family]}:**")
+        lines.extend(f"- \"{intent}\": {description}" for intent, description in INTENT_DEFINITIONS[family])
+        lines.append("")
+
+    entities = []
+    for family in families:
+        entities.extend(e for e in FAMILY_ENTITIES[family] if e not in entities)
+    lines.append("--- ENTITY DEFINITIONS ---")
+    lines.extend(f"- \"{e}\": {ENTITY_DEFINITIONS[e]}" for e in ENTITY_DEFINITIONS if e in entities)
+    lines.append("")
+
+    rules = [rule for rule, applies_to in RULES if applies_to is None or applies_to & set(families)]
+    if shard:
+        rules.append(SHARD_RULE)
+    lines.append("--- RULES ---")
+    lines.extend(f"{number}. {rule}" for number, rule in enumerate(rules, 1))
+    lines.append("")
+
+    lines.append("--- EXAMPLES ---")
+    for family in families:
+        for query, response in EXAMPLES[family]:
+            lines.append(f"Example for \"{query}\":")
+            lines.append(response)
+            lines.append("")
+    return "\n".join(lines)
+
+
+FULL_PROMPT = _render(FAMILIES, shard=False)
+SHARD_PROMPTS = {
+    combo: _render(combo, shard=True)
+    for size in range(1, MAX_SHARD_FAMILIES + 1)
+    for combo in itertools.combinations(ROUTABLE_FAMILIES, size)
+}
+
+
+def prompt_for(families):
+    """The pre-built prompt for a family tuple from select_families(), or FULL_PROMPT."""
+    if not families:
+        return FULL_PROMPT
+    key = tuple(f for f in ROUTABLE_FAMILIES if f in families) # Canonical order
+    return SHARD_PROMPTS.get(key, FULL_PROMPT)
+
+
+def _check_examples():
+    """Every example must be valid JSON for an intent defined in its own family or 'conversation'."""
+    defined = {intent: family for family, items in INTENT_DEFINITIONS.items() for intent, _ in items}
+    for family, examples in EXAMPLES.items():
+        for query, response in examples:
+            intent = json.loads(response)['intent']
+            assert defined.get(intent) in (family, 'conversation'), (query, intent)
+
+
+_check_examples()
@@ -0,0 +1,525 @@
+"""
+Local fast-path intent classifier.
+
+Runs before gemini_client.get_query_intent(). Returns the same
+{'intent', 'entities'} shape plus 'confidence' and 'source', and app.py only
+calls Gemini when nothing here is at least INTENT_ROUTER_THRESHOLD confident.
+
+Two layers:
+- Rules: keyword/regex patterns for the high-volume, unambiguous questions
+  (timetables with explicit branch + section, "where is room 105", break
+  timings, exam registration, lost ID card, college info, ...). A rule is only
+  confident when every word of the query is explained by it, so anything extra
+  (a faculty name, a course) still goes to Gemini.
+- Model: multinomial naive Bayes over words and word pairs, trained offline on
+  the labels Gemini produced in production (see record_label() and the CLI at
+  the bottom). It can't extract entities, so it may only answer MODEL_INTENTS,
+  the intents whose reply doesn't depend on any.
+
+Train a model from logged labels:
+    python intent_router.py train intent_labels.jsonl --out intent_model.json
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() != "false"
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.85"))
+INTENT_ROUTER_MODEL = os.getenv("INTENT_ROUTER_MODEL") # JSON file written by `train`
+INTENT_LABEL_LOG = os.getenv("INTENT_LABEL_LOG") # JSONL file Gemini's labels are appended to
+
+MODEL_VERSION = 1
+MIN_CLASS_EXAMPLES = 5 # The model never predicts an intent it has seen fewer times than this
+MIN_KNOWN_TOKEN_RATIO = 0.6 # Share of the query's words the model must have seen in training
+
+# Intents whose answer needs no entities, so a bare classification is enough
+MODEL_INTENTS = {
+    'get_break_info', 'get_exam_registration_info', 'get_college_info',
+    'get_placement_start_info', 'get_canteen_info', 'get_help_escalation',
+    'get_student_portal_info', 'get_dress_code', 'get_admissions_info',
+    'get_fees_info', 'get_anti_ragging_info', 'get_placements_info',
+    'get_placement_stats', 'get_placement_summary', 'get_notices',
+}
+
+# Words that never change the meaning of a query
+FILLER = {
+    'a', 'an', 'the', 'is', 'are', 'am', 'was', 'what', 'whats', 'wat', 'which', 'when', 'where',
+    'how', 'can', 'could', 'would', 'will', 'do', 'does', 'i', 'me', 'my', 'we', 'our', 'you', 'u',
+    'please', 'pls', 'plz', 'kindly', 'tell', 'show', 'give', 'get', 'send', 'need', 'want', 'know',
+    'to', 'for', 'of', 'on', 'in', 'at', 'about', 'and', 'it', 'this', 'that', 'there', 'be',
+    'hi', 'hello', 'hey', 'bro', 'sir', 'mam', 'maam', 'madam', 'ok', 'okay', 'find', 'check',
+    'info', 'information', 'details', 'detail', 'let', 'us', 'any', 'some', 'now', 'here',
+}
+
+_WORD = re.compile(r"[a-z0-9&]+")
+
+DAY_WORDS = {
+    'monday': 'Monday', 'mon': 'Monday',
+    'tuesday': 'Tuesday', 'tue': 'Tuesday', 'tues': 'Tuesday',
+    'wednesday': 'Wednesday', 'wed': 'Wednesday',
+    'thursday': 'Thursday', 'thu': 'Thursday', 'thur': 'Thursday', 'thurs': 'Thursday',
+    'friday': 'Friday', 'fri': 'Friday',
+    'saturday': 'Saturday', 'sat': 'Saturday',
+    'today': 'today', 'tomorrow': 'tomorrow', 'tmrw': 'tomorrow', 'tmr': 'tomorrow',
+}
+# 'is'/'cs' alone are too ambiguous in English to read as a branch, except next to a section
+BRANCH_WORDS = {'cse': 'CSE', 'ise': 'ISE', 'aiml': 'AI&ML', 'ai&ml': 'AI&ML'}
+SHORT_BRANCH_WORDS = {'cs': 'CSE', 'is': 'ISE'}
+SECTIONS = set('abcdefgh')
+
+
+def _words(text):
+    text = text.lower().replace('.', ' ')
+    text = re.sub(r"\bai\s*(?:&|and|-)?\s*ml\b", "aiml", text)
+    text = re.sub(r"\btime\s+table\b", "timetable", text)
+    return _WORD.findall(text)
+
+
+# --- Entity extractors (each returns entities and the word positions it used) ---
+
+def _extract_day(words):
+    for i, word in enumerate(words):
+        if word in DAY_WORDS:
+            return {'day': DAY_WORDS[word]}, {i}
+    return {}, set()
+
+
+_ORDINAL = re.compile(r"^([1-8])(?:st|nd|rd|th)?$")
+
+
+def _extract_year(words):
+    for i, word in enumerate(words):
+        match = _ORDINAL.match(word)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if i + 1 < len(words) and words[i + 1] in ('year', 'yr'):
+            if number <= 4:
+                return {'year': number}, {i, i + 1}
+        if i + 1 < len(words) and words[i + 1] in ('sem', 'semester'):
+            return {'year': (number + 1) // 2}, {i, i + 1}
+        if i > 0 and words[i - 1] in ('year', 'yr') and number <= 4:
+            return {'year': number}, {i - 1, i}
+    return {}, set()
+
+
+def _extract_branch_section(words):
+    """Branch plus the section letter written next to it ("cse a", "a section", "sec b")."""
+    for i, word in enumerate(words):
+        branch = BRANCH_WORDS.get(word) or SHORT_BRANCH_WORDS.get(word)
+        if not branch:
+            continue
+        nxt = words[i + 1] if i + 1 < len(words) else None
+        if nxt in SECTIONS:
+            return {'branch': branch, 'section': nxt.upper()}, {i, i + 1}
+        if word in SHORT_BRANCH_WORDS:
+            continue
+        # "cse section a" / "cse sec a"
+        if nxt in ('section', 'sec') and i + 2 < len(words) and words[i + 2] in SECTIONS:
+            return {'branch': branch, 'section': words[i + 2].upper()}, {i, i + 1, i + 2}
+        # "a section cse" / "cse ... a sec" -> look for "<letter> section" anywhere
+        for j in range(len(words) - 1):
+            if words[j] in SECTIONS and words[j + 1] in ('section', 'sec'):
+                return {'branch': branch, 'section': words[j].upper()}, {i, j, j + 1}
+        return {'branch': branch}, {i}
+    return {}, set()
+
+
+# --- Rules ---
+
+class Rule:
+    """
+    One fast-path rule. `triggers` are regexes over the lowercased query; `vocabulary`
+    is the set of extra words the rule explains. `extract` fills entities.
+    """
+
+    def __init__(self, intent, triggers, vocabulary=(), extract=None, confidence=0.97):
+        self.intent = intent
+        self.triggers = [re.compile(t) for t in triggers]
+        self.vocabulary = set(vocabulary)
+        self.extract = extract
+        self.confidence = confidence
+
+    def match(self, text, words):
+        if not any(t.search(text) for t in self.triggers):
+            return None
+        entities, used = self.extract(text, words) if self.extract else ({}, set())
+        if entities is None:
+            return None
+        unexplained = [
+            w for i, w in enumerate(words)
+            if i not in used and w not in FILLER and w not in self.vocabulary
+        ]
+        # Every unexplained word could be a name/course/topic the rule would drop
+        confidence = self.confidence * (0.85 ** len(unexplained))
+        return {'intent': self.intent, 'entities': entities, 'confidence': round(confidence, 3), 'source': 'rule'}
+
+
+def _timetable_entities(text, words):
+    entities, used = _extract_branch_section(words)
+    if 'section' not in entities:
+        return None, set() # Without branch + section it's Gemini's call
+    for extract in (_extract_year, _extract_day):
+        found, positions = extract(words)
+        entities.update(found)
+        used |= positions
+    return entities, used
+
+
+_ROOM = re.compile(r"\b(?:room|classroom|class room)\s*(?:no|number|num|#)?\s*(mb\s*-?\s*\d+|\d{1,4})\b")
+
+
+def _room_entities(text, words):
+    match = _ROOM.search(text)
+    if not match:
+        return None, set()
+    room = match.group(1).upper().replace(' ', '')
+    if room.startswith('MB') and '-' not in room:
+        room = f"MB-{room[2:]}"
+    room_words = set(_words(match.group(0)))
+    return {'room_number': room}, {i for i, w in enumerate(words) if w in room_words}
+
+
+_LABS = {'physics': 'Physics', 'phy': 'Physics', 'chemistry': 'Chemistry', 'chem': 'Chemistry', 'cse': 'CSE', 'cs': 'CSE', 'ise': 'ISE'}
+_LAB = re.compile(r"\b(physics|phy|chemistry|chem|cse|cs|ise)\s+labs?\b")
+
+
+def _lab_entities(text, words):
+    match = _LAB.search(text)
+    if not match:
+        return None, set()
+    return {'lab_name': _LABS[match.group(1)]}, {words.index(match.group(1))}
+
+
+def _lost_item_entities(text, words):
+    if 'hall ticket' in text or 'admit card' in text:
+        return {'lost_item': 'hall ticket'}, set()
+    return {'lost_item': 'id card'}, set()
+
+
+_LOCATION_WORDS = ('where', 'location', 'located', 'floor', 'which', 'block', 'way', 'directions', 'reach', 'go')
+
+RULES = [
+    Rule('get_timetable', [r"\b(timetable|tt|schedule|classes)\b"],
+         vocabulary={'timetable', 'tt', 'schedule', 'classes', 'class', 'section', 'sec', 'year', 'yr',
+                     'sem', 'semester', 'day', 'full', 'week', 'whole', 'weekly'},
+         extract=_timetable_entities),
+    Rule('get_location', [r"\b(room|classroom)\b.*\d"],
+         vocabulary=set(_LOCATION_WORDS) | {'room', 'classroom', 'class', 'no', 'number', 'num', 'mb'},
+         extract=_room_entities),
+    Rule('get_location', [r"\b(physics|phy|chemistry|chem|cse|cs|ise)\s+labs?\b"],
+         vocabulary=set(_LOCATION_WORDS) | {'lab', 'labs'},
+         extract=_lab_entities),
+    Rule('get_location', [r"\b(college|campus)\s+map\b"],
+         vocabulary={'college', 'campus', 'map', 'nie'}),
+    Rule('get_break_info', [r"\b(break|lunch)\b"],
+         vocabulary={'break', 'breaks', 'lunch', 'time', 'timing', 'timings', 'times', 'short', 'tea', 'start', 'starts', 'end', 'ends', 'college'}),
+    Rule('get_exam_registration_info', [r"\b(make\s*-?\s*up|backlog|supplementary|re\s*-?\s*exam)\b", r"\bfail(ed)?\b.*\b(class|subject|exam|course)\b"],
+         vocabulary={'make', 'makeup', 'up', 'exam', 'exams', 'backlog', 'backlogs', 'supplementary', 're', 'reexam',
+                     'register', 'registration', 'apply', 'fail', 'failed', 'class', 'subject', 'course', 'if', 'should', 'process'}),
+    Rule('get_lost_item_info', [r"\b(lost|lose|misplaced|missing)\b.*\b(id|hall ticket|admit card)\b"],
+         vocabulary={'lost', 'lose', 'misplaced', 'missing', 'id', 'card', 'hall', 'ticket', 'admit', 'if', 'should', 'have', 'new', 'duplicate'},
+         extract=_lost_item_entities),
+    Rule('get_college_info', [r"\babout\s+(the\s+)?(college|nie)\b", r"\bwhat\s+is\s+(this|the)\s+college\b", r"^(college|nie)\s+info"],
+         vocabulary={'college', 'nie', 'national', 'institute', 'engineering'}),
+    Rule('get_placement_start_info', [r"\bplacements?\b.*\b(start|starts|begin|begins|commence)\b"],
+         vocabulary={'placement', 'placements', 'start', 'starts', 'begin', 'begins', 'commence', 'activities', 'drive', 'drives', 'sem', 'semester', 'year'}),
+    Rule('get_canteen_info', [r"\bcanteen\b.*\b(menu|food)\b", r"\b(menu|food)\b.*\bcanteen\b"],
+         vocabulary={'canteen', 'menu', 'food', 'nie', 'today', 'college'}),
+    Rule('get_help_escalation', [r"\b(talk|speak)\s+to\s+(a\s+)?(person|human|someone|staff|admin)\b"],
+         vocabulary={'talk', 'speak', 'person', 'human', 'someone', 'staff', 'admin', 'real'}),
+    Rule('get_student_portal_info', [r"\battendance\b", r"\b(cie|internal)\s+marks?\b"],
+         vocabulary={'attendance', 'cie', 'internal', 'marks', 'mark', 'see', 'view', 'portal', 'percentage'}),
+]
+
+
+# --- Naive Bayes model ---
+
+def _features(words):
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    """Multinomial naive Bayes with Laplace smoothing, stored as plain counts."""
+
+    def __init__(self, class_counts=None, token_counts=None):
+        self.class_counts = class_counts or {}
+        self.token_counts = token_counts or {}
+        self._prepare()
+
+    def _prepare(self):
+        self.total_examples = sum(self.class_counts.values())
+        self.vocabulary = set()
+        self.class_totals = {}
+        for intent, counts in self.token_counts.items():
+            self.vocabulary.update(counts)
+            self.class_totals[intent] = sum(counts.values())
+
+    @classmethod
+    def train(cls, examples):
+        """examples: iterable of (query, intent)."""
+        class_counts, token_counts = {}, {}
+        for query, intent in examples:
+            class_counts[intent] = class_counts.get(intent, 0) + 1
+            counts = token_counts.setdefault(intent, {})
+            for feature in _features(_words(query)):
+                counts[feature] = counts.get(feature, 0) + 1
+        return cls(class_counts, token_counts)
+
+    def predict(self, query):
+        """Returns (intent, posterior probability), or (None, 0.0) if the query is mostly unseen words."""
+        if not self.total_examples:
+            return None, 0.0
+        words = _words(query)
+        if not words:
+            return None, 0.0
+        known = sum(1 for w in words if w in self.vocabulary)
+        if known / len(words) < MIN_KNOWN_TOKEN_RATIO:
+            return None, 0.0
+
+        features = _features(words)
+        vocabulary_size = len(self.vocabulary) + 1
+        log_scores = {}
+        for intent, examples in self.class_counts.items():
+            counts = self.token_counts.get(intent, {})
+            denominator = self.class_totals.get(intent, 0) + vocabulary_size
+            score = math.log(examples / self.total_examples)
+            for feature in features:
+                score += math.log((counts.get(feature, 0) + 1) / denominator)
+            log_scores[intent] = score
+
+        best = max(log_scores, key=log_scores.get)
+        top = log_scores[best]
+        normalizer = sum(math.exp(score - top) for score in log_scores.values())
+        return best, 1.0 / normalizer
+
+    def to_dict(self):
+        return {'version': MODEL_VERSION, 'class_counts': self.class_counts, 'token_counts': self.token_counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != MODEL_VERSION:
+            raise ValueError(f"Unsupported intent model version: {data.get('version')}")
+        return cls(data['class_counts'], data['token_counts'])
+
+
+model = None
+
+
+def load_model(path=None):
+    """Loads a trained model (INTENT_ROUTER_MODEL by default). Returns True on success."""
+    global model
+    path = path or INTENT_ROUTER_MODEL
+    if not path:
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            model = IntentModel.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Could not load intent router model from {path}: {e}")
+        return False
+    logging.info(f"Intent router model loaded from {path} ({model.total_examples} examples, {len(model.class_counts)} intents).")
+    return True
+
+
+# --- Public API ---
+
+def classify(user_query):
+    """Best local guess for a query, whatever its confidence, or None."""
+    text = ' '.join(_words(user_query))
+    words = text.split()
+    if not words:
+        return None
+
+    best = None
+    for rule in RULES:
+        result = rule.match(text, words)
+        if result and (best is None or result['confidence'] > best['confidence']):
+            best = result
+
+    if model is not None and (best is None or best['confidence'] < INTENT_ROUTER_THRESHOLD):
+        intent, probability = model.predict(user_query)
+        if intent in MODEL_INTENTS and model.class_counts.get(intent, 0) >= MIN_CLASS_EXAMPLES:
+            if best is None or probability > best['confidence']:
+                best = {'intent': intent, 'entities': {}, 'confidence': round(probability, 3), 'source': 'model'}
+    return best
+
+
+def route(user_query):
+    """The local classification if it clears INTENT_ROUTER_THRESHOLD, else None (ask Gemini)."""
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    result = classify(user_query)
+    if result and result['confidence'] >= INTENT_ROUTER_THRESHOLD:
+        return result
+    return None
+
+
+# --- Follow-up replies (see app.resolve_dialogue_reply) ---
+
+# Extra words that may surround a bare slot value: "what about monday", "and for cse b"
+FOLLOW_UP_FILLER = FILLER | {
+    'about', 'also', 'then', 'instead', 'same', 'one', 'day', 'branch', 'section', 'sec', 'year', 'yr',
+    'lpa', 'lakh', 'lakhs', 'lac', 'lacs', 'l', 'rs', 'ctc', 'package', 'packages', 'salary', 'than',
+}
+DEPARTMENT_WORDS = {
+    'cse': 'CSE', 'cs': 'CSE', 'computer': 'CSE', 'ise': 'ISE', 'is': 'ISE', 'information': 'ISE',
+    'ece': 'ECE', 'ec': 'ECE', 'electronics': 'ECE', 'eee': 'EEE', 'ee': 'EEE', 'electrical': 'EEE',
+    'me': 'ME', 'mech': 'ME', 'mechanical': 'ME', 'ipe': 'IPE', 'aiml': 'AIML',
+}
+_CTC_OPERATORS = {
+    'more': 'gt', 'above': 'gt', 'over': 'gt', 'greater': 'gt', 'gt': 'gt', 'higher': 'gt', 'atleast': 'gt',
+    'less': 'lt', 'below': 'lt', 'under': 'lt', 'lt': 'lt', 'lower': 'lt', 'fewer': 'lt',
+}
+_NUMBER = re.compile(r"^(\d+(?:\.\d+)?)(?:lpa|l)?$")
+
+
+def _extract_slot(slot, words):
+    """One slot value from a short reply, as (entities, used positions)."""
+    if slot == 'day':
+        return _extract_day(words)
+    if slot == 'year':
+        found, used = _extract_year(words)
+        if found:
+            return found, used
+        # A bare "3" or "3rd" when the bot just asked "Which year?"
+        for i, word in enumerate(words):
+            match = _ORDINAL.match(word)
+            if match and int(match.group(1)) <= 4:
+                return {'year': int(match.group(1))}, {i}
+        return {}, set()
+    if slot in ('branch', 'section'):
+        found, used = _extract_branch_section(words)
+        if found:
+            return found, used
+        if slot == 'section':
+            for i, word in enumerate(words):
+                near_keyword = (i > 0 and words[i - 1] in ('section', 'sec')) or \
+                               (i + 1 < len(words) and words[i + 1] in ('section', 'sec'))
+                if word in SECTIONS and (near_keyword or len(words) == 1):
+                    return {'section': word.upper()}, {i}
+        return {}, set()
+    if slot == 'ctc_operator':
+        for i, word in enumerate(words):
+            if word in _CTC_OPERATORS:
+                return {'ctc_operator': _CTC_OPERATORS[word]}, {i}
+        return {}, set()
+    if slot == 'ctc_amount':
+        for i, word in enumerate(words):
+            match = _NUMBER.match(word)
+            if match:
+                amount = float(match.group(1))
+                return {'ctc_amount': int(amount) if amount.is_integer() else amount}, {i}
+        return {}, set()
+    return {}, set()
+
+
+def parse_slot_reply(user_query, expected_slots, accepted_slots=()):
+    """
+    Entities for a reply to a slot question ("monday", "cse b", "3rd year",
+    "more than 10 lpa"), or None when the reply says anything else and needs Gemini.
+
+    expected_slots: the slots the bot is waiting for; at least one must be found.
+    accepted_slots: other slots of the same form that may be filled on the way.
+    """
+    words = _words(user_query)
+    if not words or len(words) > 8:
+        return None
+    entities, used = {}, set()
+    for slot in list(expected_slots) + [s for s in accepted_slots if s not in expected_slots]:
+        if slot in entities:
+            continue
+        found, positions = _extract_slot(slot, words)
+        if positions & used:
+            continue
+        entities.update({k: v for k, v in found.items() if k in expected_slots or k in accepted_slots})
+        used |= positions
+    if not any(slot in entities for slot in expected_slots):
+        return None
+    if any(i not in used and w not in FOLLOW_UP_FILLER for i, w in enumerate(words)):
+        return None
+    return entities
+
+
+def parse_department(user_query):
+    """Department code for a reply to "which department's HOD?", or None."""
+    words = _words(user_query)
+    if len(words) == 1: # A bare "is" / "me" is a department here, not filler
+        return DEPARTMENT_WORDS.get(words[0])
+    words = [w for w in words if w not in FOLLOW_UP_FILLER and w not in ('hod', 'dept', 'department')]
+    departments = {DEPARTMENT_WORDS[w] for w in words if w in DEPARTMENT_WORDS}
+    if len(departments) == 1 and all(w in DEPARTMENT_WORDS or w in ('science', 'engineering', 'and', '&') for w in words):
+        return departments.pop()
+    return None
+
+
+_label_lock = threading.Lock()
+
+
+def record_label(user_query, intent_data):
+    """Appends a Gemini classification to INTENT_LABEL_LOG as training data for the model."""
+    if not INTENT_LABEL_LOG or not isinstance(intent_data, dict):
+        return
+    intent = intent_data.get('intent')
+    if not intent or intent == 'unknown':
+        return
+    line = json.dumps({'query': user_query, 'intent': intent, 'entities': intent_data.get('entities', {})})
+    try:
+        with _label_lock, open(INTENT_LABEL_LOG, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logging.warning(f"Could not append to intent label log {INTENT_LABEL_LOG}: {e}")
+
+
+def _read_labels(paths):
+    examples = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get('query') and record.get('intent'):
+                    examples.append((record['query'], record['intent']))
+    return examples
+
+
+load_model()
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser(description="Train or evaluate the local intent model.")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    train_parser = subcommands.add_parser('train', help="Train on JSONL label logs")
+    train_parser.add_argument('labels', nargs='+')
+    train_parser.add_argument('--out', default='intent_model.json')
+    train_parser.add_argument('--holdout', type=float, default=0.2, help="Share of examples kept back to report accuracy")
+    args = parser.parse_args()
+
+    examples = _read_labels(args.labels)
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    train_set, test_set = examples[:split], examples[split:]
+
+    if test_set:
+        model = IntentModel.train(train_set)
+        routed = correct = 0
+        for query, intent in test_set:
+            result = classify(query)
+            if result and result['confidence'] >= INTENT_ROUTER_THRESHOLD:
+                routed += 1
+                correct += result['intent'] == intent
+        print(f"Held-out: {len(test_set)} queries, {routed} routed locally "
+              f"({routed / len(test_set):.0%}), accuracy on routed {correct / max(routed, 1):.1%}")
+
+    final = IntentModel.train(examples)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(final.to_dict(), f)
+    print(f"Trained on {len(examples)} examples ({len(final.class_counts)} intents) -> {args.out}")
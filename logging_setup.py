@@ -0,0 +1,107 @@
+"""
+Process-wide logging: leveled, structured and off the hot path.
+
+configure_logging() puts a single QueueHandler on the root logger. Callers only
+format the record and push it onto an in-memory queue; a QueueListener thread
+does the actual write to stderr (and LOG_FILE, if set). A slow terminal or disk
+therefore never blocks a webhook the way the old print() calls did.
+
+Settings:
+    LOG_LEVEL      root level (INFO)
+    LOG_LEVELS     per-logger overrides, e.g. "database=DEBUG,gemini_client=WARNING"
+    LOG_FORMAT     text (default) or json (one object per line)
+    LOG_FILE       optional extra destination
+
+Records carry the trace id from tracing.py. Fields passed with
+extra={'fields': {...}} are rendered as key=value pairs (text) or merged into
+the JSON object.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+import tracing
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_FILE = os.getenv("LOG_FILE")
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(trace_id)s] %(name)s: %(message)s'
+
+_listener = None
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'trace_id': getattr(record, 'trace_id', '-'),
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        if level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT, log_file=LOG_FILE):
+    """Installs the queue handler and starts the writer thread. Safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return
+    tracing.install_log_record_factory()
+
+    formatter = JsonFormatter() if fmt == 'json' else TextFormatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    # QueueHandler.prepare() merges args and traceback into the message on the
+    # calling thread; `fields` and `trace_id` stay on the record for the listener.
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    for name, logger_level in _parse_levels(levels).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flushes queued records and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,233 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters and histograms are sharded per thread: each thread only ever writes
+its own dict (found through a threading.local), so recording a value takes no
+lock and never contends with the DB worker threads or the Flask request
+threads. A scrape walks every shard and adds them up. Shards of finished
+threads are folded into a retained total when the thread exits (a weakref
+finalizer on a thread-local sentinel), so counts never go backwards and the
+shard list stays as long as the number of live threads.
+
+Gauges are read at scrape time from callbacks (conversation-store size, cache
+hit ratios), so they cost nothing between scrapes.
+
+Usage:
+    metrics.GEMINI_CALLS.inc('intent', '200')
+    metrics.DB_QUERY_SECONDS.observe(0.012)
+    metrics.register_gauge('chatbot_conversations', 'Stored conversations', lambda: len(store))
+"""
+import bisect
+import threading
+import weakref
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _ShardOwner:
+    """Kept in the thread-local next to the shard; freed when its thread exits."""
+    __slots__ = ('__weakref__',)
+
+
+class _Sharded:
+    """Per-thread dicts, registered once per thread; only the owning thread writes."""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = {} # id(shard) -> shard, live threads only
+        self._retired = {} # Totals of threads that have exited
+        self._shards_lock = threading.Lock() # Taken once per thread, not per update
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """Runs when the owning thread's locals are torn down: no more writes can come."""
+        with self._shards_lock:
+            if self._shards.pop(id(shard), None) is not None:
+                self._merge(self._retired, shard)
+
+    def collect(self):
+        totals = {}
+        with self._shards_lock:
+            self._merge(totals, self._retired)
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._merge(totals, shard.copy())
+        return totals
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + amount
+
+    @staticmethod
+    def _merge(totals, shard):
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0) + value
+
+    def render(self):
+        return [
+            f"{self.name}{_label_text(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        state = shard.get(labelvalues)
+        if state is None:
+            # [count per bucket (+Inf last), sum, count]
+            state = shard[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    @staticmethod
+    def _merge(totals, shard):
+        for labels, (counts, total, count) in shard.items():
+            merged = totals.get(labels)
+            if merged is None:
+                totals[labels] = [list(counts), total, count]
+            else:
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+
+    def render(self):
+        lines = []
+        for labels, (counts, total, count) in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time. The callback returns a number, or
+    a dict of label-value tuples to numbers for labelled gauges.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception as e:
+            return [f"# {self.name} unavailable: {_escape(e)}"]
+        if value is None:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_format_number(float(value))}"]
+        return [
+            f"{self.name}{_label_text(self.labelnames, labels)} {_format_number(float(number))}"
+            for labels, number in sorted(value.items())
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help_text, labelnames=()):
+    return REGISTRY.register(Counter(name, help_text, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, help_text, labelnames, buckets))
+
+
+def register_gauge(name, help_text, callback, labelnames=()):
+    return REGISTRY.register(Gauge(name, help_text, callback, labelnames))
+
+
+def render():
+    """The /metrics response body."""
+    return REGISTRY.render()
+
+
+# --- Metrics recorded across the app ---
+REQUESTS = counter("chatbot_requests_total", "Handled requests", ("route", "intent"))
+REQUEST_SECONDS = histogram("chatbot_request_seconds", "Request handling time", ("route", "intent"))
+
+GEMINI_CALLS = counter("chatbot_gemini_calls_total", "Gemini HTTP attempts by call kind and status", ("kind", "status"))
+GEMINI_RETRIES = counter("chatbot_gemini_retries_total", "Gemini attempts that were retried", ("kind",))
+GEMINI_SECONDS = histogram("chatbot_gemini_seconds", "Gemini HTTP attempt latency", ("kind",))
+
+DB_QUERIES = counter("chatbot_db_queries_total", "SQL queries by outcome", ("outcome",))
+DB_QUERY_SECONDS = histogram("chatbot_db_query_seconds", "execute_query time, pool wait included")
+DB_ROWS = histogram("chatbot_db_rows", "Rows returned per query", buckets=ROW_BUCKETS)
+DB_POOL_WAIT_SECONDS = histogram("chatbot_db_pool_wait_seconds", "Time to get a connection from the MySQL pool")
+DB_EXECUTOR_WAIT_SECONDS = histogram("chatbot_db_executor_wait_seconds", "Time a DB call queued for a worker thread")
+DB_QUERIES_PER_MESSAGE = histogram("chatbot_db_queries_per_message", "SQL queries sent while handling one message", buckets=COUNT_BUCKETS)
+DB_FANOUT_FAILURES = counter("chatbot_db_fanout_failures_total", "Fanned-out DB lookups that timed out or failed", ("function", "reason"))
+DB_MEMO_HITS = counter("chatbot_db_memo_hits_total", "database.get_* calls served from the per-message memo", ("function",))
@@ -0,0 +1,28 @@
+-- 001: Indexed normalized-name column for faculty lookups
+--
+-- Every faculty query used to filter on
+--     REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '') = %s
+-- which MySQL cannot serve from an index, so each lookup scanned the table.
+-- The same expression is now a STORED generated column with a B-tree index,
+-- and database.py compares against it with plain equality.
+--
+-- Run once against an existing database created from an older schema4.sql:
+--     mysql -u <user> -p campus_bot4 < migrations/001_add_name_normalized.sql
+
+USE campus_bot4;
+
+-- Backfill: adding a STORED generated column computes it for every existing
+-- row as part of the ALTER. New and updated rows are kept in sync by MySQL,
+-- so no triggers or application-side writes are needed.
+ALTER TABLE faculty
+    ADD COLUMN name_normalized VARCHAR(100)
+        AS (REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '')) STORED AFTER name,
+    ADD INDEX idx_faculty_name_normalized (name_normalized);
+
+ALTER TABLE anti_ragging_squad
+    ADD COLUMN name_normalized VARCHAR(100)
+        AS (REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '')) STORED AFTER name,
+    ADD INDEX idx_anti_ragging_name_normalized (name_normalized);
+
+-- Verify (optional): the index should show up as the chosen key
+EXPLAIN SELECT id, name FROM faculty WHERE name_normalized = 'dranithar';
@@ -0,0 +1,37 @@
+-- 002: Secondary indexes for the timetable, placement, event and notice queries
+--
+-- schema4.sql used to define only primary and foreign keys, so every filter
+-- and sort below read the whole table:
+--     get_timetable / get_course_instructors  classes.branch/section/study_year
+--     timetable joins + day filter + ORDER BY  timetable_slots.class_id/day_of_week/start_time
+--     get_placement_*_by_ctc                   placement_companies.ctc
+--     get_event_info                           ORDER BY events.event_date
+--     get_notice_info                          ORDER BY notices.posted_on LIMIT 5
+-- database.py now passes canonical values ("CSE", "A", "Monday") and compares
+-- them with equality instead of LIKE '%x%', so these indexes can be used.
+--
+-- Run once against an existing database created from an older schema4.sql:
+--     mysql -u <user> -p campus_bot4 < migrations/002_add_filter_indexes.sql
+-- Then check the plans with: python query_audit.py
+
+USE campus_bot4;
+
+ALTER TABLE classes
+    ADD INDEX idx_classes_branch_section_year (branch, section, study_year);
+
+-- Leads with class_id, so it also serves the foreign key; InnoDB drops the
+-- index it created implicitly for the FK.
+ALTER TABLE timetable_slots
+    ADD INDEX idx_slots_class_day_start (class_id, day_of_week, start_time);
+
+ALTER TABLE placement_companies
+    ADD INDEX idx_placement_companies_ctc (ctc);
+
+ALTER TABLE events
+    ADD INDEX idx_events_event_date (event_date);
+
+ALTER TABLE notices
+    ADD INDEX idx_notices_posted_on (posted_on);
+
+-- Verify (optional): key should be idx_classes_branch_section_year
+EXPLAIN SELECT class_id FROM classes WHERE branch = 'CSE' AND section = 'A' AND study_year = 1;
@@ -0,0 +1,189 @@
+"""
+EXPLAIN audit of the SQL in database.py.
+
+Calls every database.get_* query path with representative arguments taken from
+the live data, captures the SQL each one sends through execute_query() (see
+database.query_capture) and runs EXPLAIN on every distinct query shape. A plan
+is flagged when it reads a whole table or index (type ALL / index) or sorts
+with a filesort or temporary table, over at least QUERY_AUDIT_MIN_ROWS rows,
+so tiny reference tables don't raise noise.
+
+The timetable engine and the reference cache are bypassed while the audit runs,
+so the SQL fallbacks are what gets explained.
+
+Usage (from the repo root, same DB_* settings as the app):
+    python query_audit.py            # Report every query shape and its plan
+    python query_audit.py --strict   # Exit 1 if anything is flagged (for CI)
+At startup: QUERY_AUDIT_ON_STARTUP=1 logs the flagged plans at WARNING.
+"""
+from dotenv import load_dotenv
+load_dotenv() # Before database is imported, as in app.py
+
+import argparse
+import logging
+import os
+import sys
+from contextlib import contextmanager
+
+import database
+import logging_setup
+
+logger = logging.getLogger(__name__)
+
+QUERY_AUDIT_ON_STARTUP = os.getenv("QUERY_AUDIT_ON_STARTUP", "0") == "1"
+QUERY_AUDIT_MIN_ROWS = int(os.getenv("QUERY_AUDIT_MIN_ROWS", "100")) # Estimated rows before a scan/sort counts
+
+
+def _sample_values():
+    """A real faculty name and class group, so EXPLAIN sees values that exist."""
+    faculty = database.execute_query("SELECT name FROM faculty WHERE name IS NOT NULL ORDER BY id LIMIT 1") or []
+    group = database.execute_query("SELECT branch, section, study_year FROM classes ORDER BY class_id LIMIT 1") or []
+    sample = {'faculty_name': 'Sandhya M K', 'branch': 'CSE', 'section': 'A', 'study_year': 1}
+    if faculty:
+        sample['faculty_name'] = faculty[0]['name']
+    if group:
+        sample.update(group[0])
+    return sample
+
+
+def audit_cases(sample):
+    """(label, database function name, args) for every SQL path in database.py."""
+    name, branch, section, year = sample['faculty_name'], sample['branch'], sample['section'], sample['study_year']
+    return [
+        ("timetable load", "_load_timetable_rows", ()),
+        ("get_timetable by class and day", "get_timetable", (branch, section, year, "Monday", None, None, None)),
+        ("get_timetable by class", "get_timetable", (branch, section, year, None, None, None, None)),
+        ("get_timetable by faculty", "get_timetable", (None, None, None, None, name, None, None)),
+        ("get_timetable by course name", "get_timetable", (None, None, None, None, None, "Mathematics", None)),
+        ("get_timetable by course code", "get_timetable", (None, None, None, None, None, None, "107")),
+        ("get_course_instructors", "get_course_instructors", ("Mathematics", None, branch, section)),
+        ("get_faculty_info by name", "get_faculty_info", (name, None, None)),
+        ("get_faculty_info by role", "get_faculty_info", ("principal", None, None)),
+        ("get_faculty_location by role", "get_faculty_location", ("hod", branch)),
+        ("get_faculty_busy_slots", "get_faculty_busy_slots", (name, "Monday")),
+        ("get_faculty_class_schedule", "get_faculty_class_schedule", (name, "Monday")),
+        ("get_faculty_active_days", "get_faculty_active_days", (name,)),
+        ("get_courses_for_faculty", "get_courses_for_faculty", (name,)),
+        ("get_hod_name_by_branch", "get_hod_name_by_branch", (branch,)),
+        ("get_club_info", "get_club_info", ("Robotics",)),
+        ("get_dress_code", "get_dress_code", ("Boys",)),
+        ("get_hostel_info", "get_hostel_info", (None, "Boys", None)),
+        ("get_transport_info", "get_transport_info", ("Route",)),
+        ("get_scholarship_info", "get_scholarship_info", ("Merit",)),
+        ("get_event_info", "get_event_info", (None,)),
+        ("get_event_info by title", "get_event_info", ("Hackathon",)),
+        ("get_notice_info", "get_notice_info", ()),
+        ("get_placement_summary_data", "get_placement_summary_data", ()),
+        ("get_company_stats_data", "get_company_stats_data", ("VISA",)),
+        ("get_placement_count_by_type_data", "get_placement_count_by_type_data", ("Dream",)),
+        ("get_placement_count_by_ctc_data", "get_placement_count_by_ctc_data", ("gt", 10)),
+        ("get_placement_companies_by_ctc_data", "get_placement_companies_by_ctc_data", ("gt", 10)),
+    ]
+
+
+@contextmanager
+def _capturing():
+    """Routes every database.get_* call to SQL and records what execute_query() runs."""
+    engine_enabled, cache_enabled = database.TIMETABLE_ENGINE_ENABLED, database.REFERENCE_CACHE_ENABLED
+    database.TIMETABLE_ENGINE_ENABLED = False
+    database.REFERENCE_CACHE_ENABLED = False
+    database.query_capture = captured = []
+    try:
+        yield captured
+    finally:
+        database.query_capture = None
+        database.TIMETABLE_ENGINE_ENABLED, database.REFERENCE_CACHE_ENABLED = engine_enabled, cache_enabled
+
+
+def plan_findings(plan, min_rows=QUERY_AUDIT_MIN_ROWS):
+    """Problems in one EXPLAIN result (list of row dicts), as short strings."""
+    findings = []
+    for row in plan:
+        table, access, rows = row.get('table'), row.get('type'), row.get('rows') or 0
+        extra = row.get('Extra') or ''
+        if rows < min_rows:
+            continue
+        if access == 'ALL':
+            findings.append(f"full table scan on {table} (~{rows} rows)")
+        elif access == 'index':
+            findings.append(f"full index scan on {table} (~{rows} rows)")
+        if 'Using filesort' in extra:
+            findings.append(f"filesort on {table} (~{rows} rows)")
+        if 'Using temporary' in extra:
+            findings.append(f"temporary table for {table} (~{rows} rows)")
+    return findings
+
+
+def run_audit(min_rows=QUERY_AUDIT_MIN_ROWS):
+    """
+    Explains every distinct query shape. Returns a list of dicts with the
+    fingerprint, shape, the labels of the cases that issued it, the EXPLAIN
+    rows and the findings. Needs database.connect() to have run.
+    """
+    sample = _sample_values()
+    shapes = {} # fingerprint -> report entry
+    for label, function_name, args in audit_cases(sample):
+        with _capturing() as captured:
+            getattr(database, function_name)(*args)
+        for query, params in captured:
+            fingerprint, shape = database.query_fingerprint(query)
+            entry = shapes.get(fingerprint)
+            if entry is None:
+                entry = shapes[fingerprint] = {'fingerprint': fingerprint, 'shape': shape, 'cases': [], 'query': query, 'params': params}
+            if label not in entry['cases']:
+                entry['cases'].append(label)
+
+    report = []
+    for entry in shapes.values():
+        plan = database.execute_query("EXPLAIN " + entry.pop('query'), entry.pop('params'))
+        entry['plan'] = plan or []
+        entry['findings'] = plan_findings(entry['plan'], min_rows) if plan is not None else ["EXPLAIN failed"]
+        report.append(entry)
+    return report
+
+
+def log_findings(report):
+    """Startup hook: one WARNING per flagged query shape, a summary at INFO."""
+    flagged = [entry for entry in report if entry['findings']]
+    for entry in flagged:
+        logger.warning(
+            f"Query plan {entry['fingerprint']} ({', '.join(entry['cases'])}): {'; '.join(entry['findings'])}",
+            extra={'fields': {'fingerprint': entry['fingerprint'], 'sql_shape': entry['shape'][:160]}},
+        )
+    logger.info(f"Query audit: {len(report)} query shapes explained, {len(flagged)} flagged.")
+    return flagged
+
+
+def print_report(report, min_rows=QUERY_AUDIT_MIN_ROWS):
+    for entry in report:
+        status = "FLAG" if entry['findings'] else "ok  "
+        print(f"{status} {entry['fingerprint']}  {', '.join(entry['cases'])}")
+        for finding in entry['findings']:
+            print(f"       ! {finding}")
+        for row in entry['plan']:
+            print(f"       {str(row.get('table')):<6} type={str(row.get('type')):<7} key={str(row.get('key')):<34} "
+                  f"rows={str(row.get('rows')):<7} {row.get('Extra') or ''}")
+    flagged = sum(1 for entry in report if entry['findings'])
+    print(f"\n{len(report)} query shapes, {flagged} flagged (min rows {min_rows}).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any plan is flagged")
+    parser.add_argument("--min-rows", type=int, default=QUERY_AUDIT_MIN_ROWS, help="Ignore scans/sorts estimated below this")
+    args = parser.parse_args()
+
+    logging_setup.configure_logging(level="WARNING")
+    database.TIMETABLE_ENGINE_ENABLED = False # No need to load the snapshot just to audit SQL
+    database.connect()
+    try:
+        report = run_audit(args.min_rows)
+    finally:
+        database.disconnect()
+    print_report(report, args.min_rows)
+    if args.strict and any(entry['findings'] for entry in report):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Per-message unit of work for database reads.
+
+process_message() opens a RequestScope for every message. Like the trace in
+tracing.py it lives in a contextvar, so the async_database wrappers (and,
+through the copied context, execute_query on the DB worker threads) find it
+without it being passed around:
+
+- memoized() serves repeated identical database.get_* calls within the
+  message from the first call's result. Concurrent identical calls share one
+  in-flight call. Failed (None) results are not kept, so a retry goes to the DB,
+  and if the in-flight call is cancelled its waiters make the call themselves.
+- remember() seeds the memo with rows the handler already has for an
+  equivalent call under other arguments.
+- count_query() counts the SQL queries the message actually issued. When the
+  scope closes the count goes to the chatbot_db_queries_per_message histogram
+  and the trace summary, for regression tracking.
+
+Callers get their own copy of list-of-dict results, so a handler adding keys
+to a row can't change what a later call in the same message sees.
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import threading
+
+import metrics
+import tracing
+
+REQUEST_MEMO_ENABLED = os.getenv("REQUEST_MEMO_ENABLED", "true").lower() != "false"
+
+current_scope = contextvars.ContextVar('current_request_scope', default=None)
+
+_ABANDONED = object() # Shared result when the first caller was cancelled: waiters call again
+
+
+class RequestScope:
+    __slots__ = ('results', 'queries', 'memo_hits', 'lock')
+
+    def __init__(self):
+        self.results = {} # (func_name, args, kwargs) -> asyncio.Future of the result
+        self.queries = 0 # SQL queries sent while handling the message
+        self.memo_hits = 0
+        self.lock = threading.Lock() # count_query() runs on several DB worker threads at once
+
+
+def _copy(result):
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    return result
+
+
+@contextlib.contextmanager
+def scope():
+    """Runs the block as one unit of work. Records its query count at the end."""
+    active = RequestScope()
+    token = current_scope.set(active)
+    try:
+        yield active
+    finally:
+        current_scope.reset(token)
+        metrics.DB_QUERIES_PER_MESSAGE.observe(active.queries)
+        tracing.count('db.queries', active.queries)
+        if active.memo_hits:
+            tracing.count('db.memo_hits', active.memo_hits)
+
+
+def count_query():
+    """Called by database.execute_query() for every SQL query it sends."""
+    active = current_scope.get()
+    if active is not None:
+        with active.lock:
+            active.queries += 1
+
+
+def _key(func_name, args, kwargs):
+    return (func_name, args, tuple(sorted(kwargs.items())))
+
+
+def remember(func_name, args, kwargs, result):
+    """
+    Seeds the memo with a result already in hand, for a call the handler knows
+    would return the same rows under different arguments (e.g. the confirmed
+    faculty name after an exact spell-check match). Existing entries win.
+    """
+    active = current_scope.get()
+    if active is None or not REQUEST_MEMO_ENABLED or result is None:
+        return
+    try:
+        key = _key(func_name, args, kwargs)
+        if key in active.results:
+            return
+    except TypeError:
+        return
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(_copy(result))
+    active.results[key] = future
+
+
+async def memoized(func_name, args, kwargs, call):
+    """
+    Awaits call() once per distinct (func_name, args, kwargs) in the current
+    scope and hands every caller a copy of the result. Outside a scope, or with
+    unhashable arguments, it just awaits call().
+    """
+    active = current_scope.get()
+    if active is None or not REQUEST_MEMO_ENABLED:
+        return await call()
+    try:
+        key = _key(func_name, args, kwargs)
+        future = active.results.get(key)
+    except TypeError: # Unhashable argument (list, dict): not memoizable
+        return await call()
+
+    if future is not None:
+        result = await asyncio.shield(future)
+        if result is _ABANDONED:
+            # The call we were waiting on was cancelled (e.g. its fan-out timed out);
+            # that must not cancel us, so make the call ourselves
+            return await memoized(func_name, args, kwargs, call)
+        active.memo_hits += 1
+        metrics.DB_MEMO_HITS.inc(func_name)
+        return _copy(result)
+
+    future = asyncio.get_running_loop().create_future()
+    active.results[key] = future
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        del active.results[key]
+        future.set_result(_ABANDONED)
+        raise
+    except Exception as exc:
+        del active.results[key]
+        future.set_exception(exc)
+        future.exception() # Mark it retrieved; concurrent waiters (if any) still get it
+        raise
+    if result is None:
+        del active.results[key] # SQL error: let a repeat try again
+    future.set_result(result)
+    return _copy(result)
@@ -8,9 +8,12 @@ USE campus_bot4;
 CREATE TABLE faculty (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
+    -- Lowercase name with spaces/dots removed; see database.normalize_name()
+    name_normalized VARCHAR(100) AS (REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '')) STORED,
     email VARCHAR(100) UNIQUE,
     department VARCHAR(100) DEFAULT NULL,
-    office_location VARCHAR(255) DEFAULT NULL
+    office_location VARCHAR(255) DEFAULT NULL,
+    INDEX idx_faculty_name_normalized (name_normalized)
 );
 
 CREATE TABLE departments (
@@ -36,7 +39,9 @@ CREATE TABLE classes (
     class_type VARCHAR(10) NOT NULL DEFAULT 'Lecture',
     lab_batch VARCHAR(10) DEFAULT NULL,
     FOREIGN KEY (course_code) REFERENCES courses(course_code),
-    FOREIGN KEY (faculty_id) REFERENCES faculty(id)
+    FOREIGN KEY (faculty_id) REFERENCES faculty(id),
+    -- get_timetable / get_course_instructors filter on these with equality (see migrations/002)
+    INDEX idx_classes_branch_section_year (branch, section, study_year)
 );
 
 CREATE TABLE timetable_slots (
@@ -47,7 +52,8 @@ CREATE TABLE timetable_slots (
     end_time TIME NOT NULL,
     room_no VARCHAR(50),
     location VARCHAR(100),
-    FOREIGN KEY (class_id) REFERENCES classes(class_id)
+    FOREIGN KEY (class_id) REFERENCES classes(class_id),
+    INDEX idx_slots_class_day_start (class_id, day_of_week, start_time)
 );
 
 CREATE TABLE dress_code (
@@ -68,22 +74,26 @@ CREATE TABLE clubs (
 CREATE TABLE anti_ragging_squad (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
+    name_normalized VARCHAR(100) AS (REPLACE(REPLACE(LOWER(name), ' ', ''), '.', '')) STORED,
     role VARCHAR(100),
     department VARCHAR(100),
-    contact_phone VARCHAR(20)
+    contact_phone VARCHAR(20),
+    INDEX idx_anti_ragging_name_normalized (name_normalized)
 );
 
 CREATE TABLE events (
     id INT AUTO_INCREMENT PRIMARY KEY,
     title VARCHAR(200) NOT NULL,
     event_date DATE,
-    description TEXT
+    description TEXT,
+    INDEX idx_events_event_date (event_date)
 );
 
 CREATE TABLE notices (
     id INT AUTO_INCREMENT PRIMARY KEY,
     notice_text TEXT NOT NULL,
-    posted_on DATE
+    posted_on DATE,
+    INDEX idx_notices_posted_on (posted_on)
 );
 
 CREATE TABLE hostels (
@@ -1561,7 +1571,8 @@ CREATE TABLE placement_companies (
     company_name VARCHAR(255) NOT NULL,
     ctc DECIMAL(5, 2), -- The offered CTC in LPA
     num_selects INT,
-    ctc_type VARCHAR(100) -- e.g., "Dream", "Open Dream", "Mass"
+    ctc_type VARCHAR(100), -- e.g., "Dream", "Open Dream", "Mass"
+    INDEX idx_placement_companies_ctc (ctc)
 );
 
 -- --- DATA INSERTION ---
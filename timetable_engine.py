@@ -0,0 +1,381 @@
+"""
+In-memory read model of the timetable.
+
+Loads timetable_slots/classes/courses/faculty once (one join, see
+database._load_timetable_rows) into compact tuples, keeps indexes over them and
+answers the timetable-style queries without SQL. Slots are stored pre-sorted by
+weekday and start time, so results come out in the same order the SQL versions
+produced with ORDER BY FIELD(day_of_week, ...), start_time.
+
+Filters keep the SQL semantics: branch, section and day are compared for
+equality (database.py passes canonical values), the remaining LIKE '%x%'
+filters are case-insensitive substring matches, and faculty names are compared
+on name_normalized.
+
+Free/busy questions are answered from availability bitmaps built with the
+snapshot (see DayAvailability): one int per faculty and weekday, one bit per
+BUCKET_MINUTES of the college day, with the breaks from app.calculate_free_slots
+baked in. A refresh is still a full reload (one join, every index rebuilt);
+the only thing it carries over is the bitmap of each faculty and weekday whose
+slot times did not change, which skips recomputing that mask.
+"""
+import datetime
+import logging
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# Same ordering as ORDER BY FIELD(day_of_week, 'Monday', ...): unknown days sort first
+DAY_ORDER = {day: position + 1 for position, day in enumerate(WEEKDAYS)}
+CAMPUS_WEEKDAYS = WEEKDAYS[:5] # get_faculty_active_days only reports Mon-Fri
+
+# --- Availability bitmaps ---
+# Same college day and breaks as app.calculate_free_slots
+DAY_START = datetime.time(9, 0)
+DAY_END = datetime.time(16, 30)
+BREAKS = ((datetime.time(11, 0), datetime.time(11, 30)), (datetime.time(13, 30), datetime.time(14, 30)))
+BUCKET_MINUTES = 5
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute + value.second / 60
+
+_DAY_START_MINUTES = _minutes(DAY_START)
+BUCKETS = int(_minutes(DAY_END) - _DAY_START_MINUTES) // BUCKET_MINUTES # 90 for 09:00-16:30
+
+
+def interval_mask(start, end):
+    """Bits of every bucket that [start, end) overlaps, clipped to the college day."""
+    first = max(0, int((_minutes(start) - _DAY_START_MINUTES) // BUCKET_MINUTES))
+    last = min(BUCKETS, -int(-(_minutes(end) - _DAY_START_MINUTES) // BUCKET_MINUTES)) # Round up
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def _bucket_time(bucket):
+    minutes = int(_DAY_START_MINUTES) + bucket * BUCKET_MINUTES
+    return datetime.time(minutes // 60, minutes % 60)
+
+BUCKET_TIMES = tuple(_bucket_time(bucket) for bucket in range(BUCKETS + 1)) # Bucket start times, then DAY_END
+FULL_MASK = (1 << BUCKETS) - 1
+BREAK_MASK = 0
+for _start, _end in BREAKS:
+    BREAK_MASK |= interval_mask(_start, _end)
+
+
+class DayAvailability:
+    """
+    One faculty member's day as a bitmap: bit i is set when the bucket starting
+    BUCKET_MINUTES * i after DAY_START is taken by a class or a break.
+    """
+    __slots__ = ('mask', 'has_classes')
+
+    def __init__(self, busy_mask, has_classes):
+        self.mask = busy_mask | BREAK_MASK
+        self.has_classes = has_classes # Any class that day, also outside the college day
+
+    def is_free(self, at):
+        """Whether `at` (a datetime.time) falls in a free slot. O(1)."""
+        if not DAY_START <= at < DAY_END:
+            return False
+        return not (self.mask >> int((_minutes(at) - _DAY_START_MINUTES) // BUCKET_MINUTES)) & 1
+
+    def free_slots(self):
+        """[(start, end)] of free time in order, like app.calculate_free_slots."""
+        slots = []
+        free = ~self.mask & FULL_MASK
+        while free: # One pass per free run, not per bucket
+            start = (free & -free).bit_length() - 1 # Lowest free bucket
+            run = free >> start
+            length = ((run + 1) & ~run).bit_length() - 1 # Trailing 1 bits = free buckets in a row
+            slots.append((BUCKET_TIMES[start], BUCKET_TIMES[start + length]))
+            free &= ~(((1 << length) - 1) << start)
+        return slots
+
+TimetableSlot = namedtuple('TimetableSlot', [
+    'slot_id', 'day_of_week', 'start_time', 'end_time', 'room_no', 'location',
+    'class_id', 'branch', 'section', 'study_year', 'class_type', 'lab_batch',
+    'course_code', 'course_name', 'has_course',
+    'faculty_id', 'faculty_name', 'faculty_name_normalized',
+])
+
+
+def _like(value, pattern):
+    """SQL `value LIKE '%pattern%'` under a case-insensitive collation."""
+    return value is not None and pattern.lower() in str(value).lower()
+
+
+def _matching_keys(index, pattern):
+    """Keys of a string-keyed index that would satisfy LIKE '%pattern%'."""
+    pattern = pattern.lower()
+    return [key for key in index if key is not None and pattern in key.lower()]
+
+
+class TimetableSnapshot:
+    """
+    Immutable, indexed copy of the timetable. Build a new one from the full row
+    set to refresh; pass the old one as `previous` to copy its availability
+    bitmaps for faculty-days whose slot times are unchanged.
+    """
+
+    def __init__(self, rows, previous=None):
+        slots = [
+            TimetableSlot(
+                slot_id=row.get('slot_id'),
+                day_of_week=row.get('day_of_week'),
+                start_time=row.get('start_time'),
+                end_time=row.get('end_time'),
+                room_no=row.get('room_no'),
+                location=row.get('location'),
+                class_id=row.get('class_id'),
+                branch=row.get('branch'),
+                section=row.get('section'),
+                study_year=row.get('study_year'),
+                class_type=row.get('class_type'),
+                lab_batch=row.get('lab_batch'),
+                course_code=row.get('course_code'),
+                course_name=row.get('course_name'),
+                has_course=row.get('joined_course_code') is not None,
+                faculty_id=row.get('faculty_id'),
+                faculty_name=row.get('faculty_name'),
+                faculty_name_normalized=row.get('faculty_name_normalized'),
+            )
+            for row in rows
+        ]
+        slots.sort(key=lambda s: (DAY_ORDER.get(s.day_of_week, 0), str(s.start_time), s.slot_id or 0))
+        self.slots = tuple(slots)
+
+        # Every index maps to positions in self.slots, kept in ascending (= sorted) order
+        self.by_class_day = {} # (branch, section, study_year, day_of_week) -> positions
+        self.by_faculty = {} # faculty_id -> positions
+        self.by_course = {} # course_code -> positions
+        self.by_room = {} # room_no -> positions
+        self.faculty_ids_by_name = {} # name_normalized -> {faculty_id}
+
+        for position, slot in enumerate(self.slots):
+            class_day = (slot.branch, slot.section, slot.study_year, slot.day_of_week)
+            self.by_class_day.setdefault(class_day, []).append(position)
+            if slot.faculty_id is not None:
+                self.by_faculty.setdefault(slot.faculty_id, []).append(position)
+                if slot.faculty_name_normalized:
+                    self.faculty_ids_by_name.setdefault(slot.faculty_name_normalized, set()).add(slot.faculty_id)
+            if slot.course_code is not None:
+                self.by_course.setdefault(slot.course_code, []).append(position)
+            if slot.room_no is not None:
+                self.by_room.setdefault(slot.room_no, []).append(position)
+
+        self._build_availability(previous)
+
+    def _build_availability(self, previous):
+        """Busy bitmap per (faculty_id, day_of_week), reusing `previous`'s where the slot times match."""
+        busy_times = {} # (faculty_id, day_of_week) -> [(start_time, end_time)]
+        for slot in self.slots:
+            if slot.faculty_id is not None:
+                busy_times.setdefault((slot.faculty_id, slot.day_of_week), []).append((slot.start_time, slot.end_time))
+
+        self.busy_times = {} # (faculty_id, day_of_week) -> sorted ((start, end), ...)
+        self.busy_masks = {} # (faculty_id, day_of_week) -> int, breaks not included
+        self.bitmaps_reused = 0
+        for key, times in busy_times.items():
+            times = tuple(sorted(
+                (start, end) for start, end in times
+                if isinstance(start, datetime.time) and isinstance(end, datetime.time)
+            ))
+            self.busy_times[key] = times
+            if previous is not None and previous.busy_times.get(key) == times:
+                self.busy_masks[key] = previous.busy_masks[key]
+                self.bitmaps_reused += 1
+                continue
+            mask = 0
+            for start, end in times:
+                mask |= interval_mask(start, end)
+            self.busy_masks[key] = mask
+
+    def __len__(self):
+        return len(self.slots)
+
+    # --- Index helpers ---
+
+    def _faculty_positions(self, normalized_name):
+        positions = []
+        for faculty_id in self.faculty_ids_by_name.get(normalized_name, ()):
+            positions.extend(self.by_faculty[faculty_id])
+        return sorted(positions)
+
+    def _class_day_positions(self, branch, section, study_year, day):
+        """Positions whose (branch, section, year, day) key passes the given filters."""
+        positions = []
+        for (k_branch, k_section, k_year, k_day), key_positions in self.by_class_day.items():
+            if branch and k_branch != branch:
+                continue
+            if section and k_section != section:
+                continue
+            if study_year is not None and k_year != study_year:
+                continue
+            if day and k_day != day:
+                continue
+            positions.extend(key_positions)
+        return sorted(positions)
+
+    def _course_positions(self, course_code):
+        positions = []
+        for key in _matching_keys(self.by_course, course_code):
+            positions.extend(self.by_course[key])
+        return sorted(positions)
+
+    # --- Queries (same columns as the SQL versions in database.py) ---
+
+    def get_timetable(self, branch, section, study_year, day, faculty_name_normalized, course_name, course_code):
+        if study_year:
+            try:
+                study_year = int(study_year)
+            except (TypeError, ValueError):
+                return []
+        else:
+            study_year = None
+
+        # Narrow with the most selective index available, then apply every filter
+        if faculty_name_normalized:
+            candidates = self._faculty_positions(faculty_name_normalized)
+        elif course_code:
+            candidates = self._course_positions(course_code)
+        elif branch or section or study_year is not None or day:
+            candidates = self._class_day_positions(branch, section, study_year, day)
+        else:
+            candidates = range(len(self.slots))
+
+        results = []
+        for position in candidates:
+            slot = self.slots[position]
+            if not slot.has_course: # JOIN courses
+                continue
+            if branch and slot.branch != branch:
+                continue
+            if section and slot.section != section:
+                continue
+            if study_year is not None and slot.study_year != study_year:
+                continue
+            if day and slot.day_of_week != day:
+                continue
+            if faculty_name_normalized and slot.faculty_name_normalized != faculty_name_normalized:
+                continue
+            if course_name and not _like(slot.course_name, course_name):
+                continue
+            if course_code and not _like(slot.course_code, course_code):
+                continue
+            results.append({
+                'day_of_week': slot.day_of_week, 'start_time': slot.start_time, 'end_time': slot.end_time,
+                'room_no': slot.room_no, 'location': slot.location,
+                'course_name': slot.course_name, 'faculty_name': slot.faculty_name,
+                'class_type': slot.class_type, 'lab_batch': slot.lab_batch,
+                'branch': slot.branch, 'section': slot.section, 'study_year': slot.study_year,
+            })
+        return results
+
+    def _faculty_day_slots(self, faculty_name_normalized, day, require_course=False):
+        slots = [
+            self.slots[p] for p in self._faculty_positions(faculty_name_normalized)
+            if self.slots[p].day_of_week == day and (self.slots[p].has_course or not require_course)
+        ]
+        # ORDER BY t.start_time (stable, so equal times keep weekday order)
+        slots.sort(key=lambda s: str(s.start_time))
+        return slots
+
+    def get_faculty_busy_slots(self, faculty_name_normalized, day):
+        return [
+            {'start_time': s.start_time, 'end_time': s.end_time}
+            for s in self._faculty_day_slots(faculty_name_normalized, day)
+        ]
+
+    def get_faculty_class_schedule(self, faculty_name_normalized, day):
+        return [
+            {
+                'start_time': s.start_time, 'end_time': s.end_time, 'course_name': s.course_name,
+                'room_no': s.room_no, 'location': s.location, 'branch': s.branch, 'section': s.section,
+            }
+            for s in self._faculty_day_slots(faculty_name_normalized, day, require_course=True)
+        ]
+
+    def get_faculty_availability(self, faculty_name_normalized, day):
+        """DayAvailability for a faculty on a weekday (the same slots get_faculty_busy_slots returns)."""
+        busy_mask, has_classes = 0, False
+        for faculty_id in self.faculty_ids_by_name.get(faculty_name_normalized, ()):
+            mask = self.busy_masks.get((faculty_id, day))
+            if mask is not None:
+                has_classes = True
+                busy_mask |= mask
+        return DayAvailability(busy_mask, has_classes)
+
+    def get_faculty_active_days(self, faculty_name_normalized):
+        days = {self.slots[p].day_of_week for p in self._faculty_positions(faculty_name_normalized)}
+        return [{'day_of_week': day} for day in CAMPUS_WEEKDAYS if day in days]
+
+    def get_room_slots(self, room_no, day=None):
+        """Everything scheduled in a room (optionally on one day), sorted by weekday and time."""
+        positions = []
+        for key in _matching_keys(self.by_room, room_no):
+            positions.extend(self.by_room[key])
+        return [
+            self.slots[p]._asdict() for p in sorted(positions)
+            if not day or _like(self.slots[p].day_of_week, day)
+        ]
+
+
+class TimetableEngine:
+    """
+    Holds the current TimetableSnapshot and refreshes it from the database on a
+    background thread. Readers just grab `engine.snapshot`; a refresh swaps in a
+    whole new snapshot, so they never see a half-built one.
+    """
+
+    def __init__(self, loader, refresh_interval=300):
+        self._loader = loader # Callable returning joined rows, or None on error
+        self.refresh_interval = refresh_interval
+        self.snapshot = None
+        self.loaded_at = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.snapshot is not None
+
+    def refresh(self):
+        """Reloads the whole snapshot. Keeps the previous one if the load fails."""
+        start = time.perf_counter()
+        rows = self._loader()
+        if rows is None:
+            logger.warning("Timetable engine refresh failed. Keeping the previous snapshot.")
+            return False
+        self.snapshot = TimetableSnapshot(rows, previous=self.snapshot)
+        self.loaded_at = time.time()
+        logger.info(
+            f"Timetable engine loaded {len(self.snapshot)} slots in {(time.perf_counter() - start) * 1000:.1f} ms "
+            f"({self.snapshot.bitmaps_reused}/{len(self.snapshot.busy_masks)} availability bitmaps unchanged)."
+        )
+        return True
+
+    def start(self):
+        """Loads once synchronously, then keeps refreshing in the background."""
+        self.refresh()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="timetable_refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Timetable engine refresh crashed.")
@@ -0,0 +1,167 @@
+"""
+Lightweight per-message latency tracing.
+
+process_message() opens a Trace for every message. The trace lives in a
+contextvar, so everything awaited under it (and, through async_database,
+the DB worker threads) adds to the same trace without passing it around:
+
+- stage(name) starts the next stage of the pipeline; the previous one ends
+  there, so an early return is charged to the stage that returned.
+- span(name) / @traced(name) time a call (execute_query, Gemini requests);
+  repeated spans are summed with a count.
+- count(key, n) adds to a counter (Gemini attempts, rows returned).
+
+When the trace ends one summary line is logged:
+    Trace 5c0f1e2a9b7d: 812.4 ms | stages pre_filter=0.1 intent=640.2 ... |
+    spans gemini.intent=1x/639.8 db.query=3x/52.1 | gemini.intent.attempts=1 db.rows=14 | intent=get_timetable
+
+Every log record gets a `trace_id` attribute ("-" outside a trace), see
+install_log_record_factory().
+"""
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import time
+import uuid
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() != "false"
+
+current_trace = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+    __slots__ = ('trace_id', 'name', 'started', 'stage_name', 'stage_started', 'stages', 'spans', 'counters', 'tags')
+
+    def __init__(self, name, trace_id=None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:12]
+        self.name = name
+        self.started = time.perf_counter()
+        self.stage_name = None
+        self.stage_started = self.started
+        self.stages = [] # [(name, ms)] in pipeline order
+        self.spans = {} # name -> [count, total ms]
+        self.counters = {}
+        self.tags = {}
+
+    def begin_stage(self, name, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.stage_name is not None:
+            self.stages.append((self.stage_name, (now - self.stage_started) * 1000))
+        self.stage_name = name
+        self.stage_started = now
+
+    def add_span(self, name, ms):
+        totals = self.spans.get(name)
+        if totals is None:
+            self.spans[name] = [1, ms]
+        else:
+            totals[0] += 1
+            totals[1] += ms
+
+    def finish(self):
+        """Closes the open stage and returns the total duration in ms."""
+        now = time.perf_counter()
+        self.begin_stage(None, now)
+        return (now - self.started) * 1000
+
+    def summary(self, total_ms):
+        parts = [f"Trace {self.trace_id}: {self.name} {total_ms:.1f} ms"]
+        if self.stages:
+            parts.append("stages " + " ".join(f"{name}={ms:.1f}" for name, ms in self.stages))
+        if self.spans:
+            parts.append("spans " + " ".join(f"{name}={count}x/{ms:.1f}" for name, (count, ms) in self.spans.items()))
+        if self.counters:
+            parts.append(" ".join(f"{key}={value}" for key, value in self.counters.items()))
+        if self.tags:
+            parts.append(" ".join(f"{key}={value}" for key, value in self.tags.items()))
+        return " | ".join(parts)
+
+
+@contextlib.contextmanager
+def trace(name, trace_id=None):
+    """Runs the block as one trace and logs its summary line at the end."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    active = Trace(name, trace_id)
+    token = current_trace.set(active)
+    try:
+        yield active
+    finally:
+        logging.info(active.summary(active.finish()))
+        current_trace.reset(token)
+
+
+def current_trace_id():
+    active = current_trace.get()
+    return active.trace_id if active is not None else None
+
+
+def stage(name):
+    """Marks the start of the next pipeline stage of the current trace."""
+    active = current_trace.get()
+    if active is not None:
+        active.begin_stage(name)
+
+
+def count(key, n=1):
+    active = current_trace.get()
+    if active is not None:
+        active.counters[key] = active.counters.get(key, 0) + n
+
+
+def tag(**tags):
+    active = current_trace.get()
+    if active is not None:
+        active.tags.update(tags)
+
+
+@contextlib.contextmanager
+def span(name):
+    """Times the block into the current trace (no-op outside one)."""
+    active = current_trace.get()
+    if active is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        active.add_span(name, (time.perf_counter() - start) * 1000)
+
+
+def traced(name):
+    """Decorator version of span() for plain and async functions."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install_log_record_factory():
+    """Adds `trace_id` to every LogRecord so formats can use %(trace_id)s."""
+    base_factory = logging.getLogRecordFactory()
+    if getattr(base_factory, 'adds_trace_id', False):
+        return
+
+    def factory(*args, **kwargs):
+        record = base_factory(*args, **kwargs)
+        active = current_trace.get()
+        record.trace_id = active.trace_id if active is not None else '-'
+        return record
+
+    factory.adds_trace_id = True
+    logging.setLogRecordFactory(factory)
@@ -0,0 +1,215 @@
+"""
+Asynchronous WhatsApp replies through the Twilio REST API.
+
+With TWILIO_ASYNC_REPLIES=true, /twilio no longer holds Twilio's webhook open
+while process_message() runs (spell-check SQL, one or two Gemini calls, retries
+with backoff). The webhook answers with empty TwiML at once and submits the
+message to a ReplyWorkerPool; a worker runs the bot and sends the answer with
+send_message() (POST /2010-04-01/Accounts/{sid}/Messages.json).
+
+Messages from one sender are still answered one at a time and in order, while
+different senders are spread over all the workers. If the pool is full (or not running)
+submit() returns False and the webhook falls back to the synchronous TwiML reply.
+
+TWILIO_API_BASE_URL points the sender at benchmarks/fake_twilio.py for offline
+runs. Sends go through the shared keep-alive client (http_client.py) rather
+than twilio.rest.Client, whose blocking requests session would stall the loop.
+"""
+import asyncio
+import collections
+import logging
+import os
+import threading
+
+import aiohttp
+
+import http_client
+
+logger = logging.getLogger(__name__)
+
+TWILIO_ASYNC_REPLIES = os.getenv("TWILIO_ASYNC_REPLIES", "false").lower() == "true"
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER") # e.g. whatsapp:+14155238886; defaults to the webhook's 'To'
+TWILIO_REPLY_WORKERS = int(os.getenv("TWILIO_REPLY_WORKERS", "32"))
+TWILIO_REPLY_QUEUE_SIZE = int(os.getenv("TWILIO_REPLY_QUEUE_SIZE", "1000")) # Messages waiting, across all users
+TWILIO_SEND_TIMEOUT = float(os.getenv("TWILIO_SEND_TIMEOUT", "15"))
+TWILIO_SEND_RETRIES = 3
+
+MAX_BODY_CHARS = 1600 # Twilio rejects longer message bodies (error 21617)
+
+twilio_http = http_client.create_client(
+    "twilio", limit=TWILIO_REPLY_WORKERS * 2, limit_per_host=TWILIO_REPLY_WORKERS * 2, timeout=TWILIO_SEND_TIMEOUT,
+)
+
+
+def is_configured():
+    return bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN)
+
+
+def split_body(text, limit=MAX_BODY_CHARS):
+    """Splits a reply into Twilio-sized chunks, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    chunks.append(text)
+    return chunks
+
+
+async def _post_message(data):
+    url = f"{TWILIO_API_BASE_URL.rstrip('/')}/2010-04-01/Accounts/{TWILIO_ACCOUNT_SID}/Messages.json"
+    auth = aiohttp.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+    delay = 1
+    for attempt in range(TWILIO_SEND_RETRIES):
+        try:
+            response = await twilio_http.post(url, data=data, auth=auth)
+            if 200 <= response.status < 300:
+                return True
+            if response.status != 429 and response.status < 500:
+                logger.error(f"Twilio rejected message to {data['To']}: {response.status} {response.text()[:300]}")
+                return False
+            logger.warning(f"Twilio send got {response.status} (attempt {attempt + 1}/{TWILIO_SEND_RETRIES}).")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Twilio send failed: {e} (attempt {attempt + 1}/{TWILIO_SEND_RETRIES}).")
+        if attempt < TWILIO_SEND_RETRIES - 1:
+            await asyncio.sleep(delay)
+            delay *= 2
+    logger.error(f"Giving up on message to {data['To']} after {TWILIO_SEND_RETRIES} attempts.")
+    return False
+
+
+async def send_message(to_number, from_number, text, media_url=None):
+    """
+    Sends a WhatsApp message (split into several if it is too long; media goes
+    with the first). Returns True when every part was accepted.
+    """
+    for i, chunk in enumerate(split_body(text)):
+        data = {'To': to_number, 'From': from_number, 'Body': chunk}
+        if media_url and i == 0:
+            data['MediaUrl'] = media_url
+        if not await _post_message(data):
+            return False
+    return True
+
+
+class ReplyWorkerPool:
+    """
+    Worker coroutines on their own long-lived event loop (a daemon thread), so
+    jobs outlive the request that submitted them under both Flask[async] and ASGI.
+
+    Jobs wait in a FIFO per key (the sender); a key is on the ready queue only
+    while it has jobs and no worker is busy with it, so any idle worker can take
+    any user, but never two messages of the same user at once.
+
+    handler: async callable taking one job; its exceptions are logged and counted.
+    """
+
+    def __init__(self, handler, workers=TWILIO_REPLY_WORKERS, queue_size=TWILIO_REPLY_QUEUE_SIZE):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._loop = None
+        self._thread = None
+        self._pending = {} # key -> deque of jobs; present while the key has queued or running jobs
+        self._queued = 0
+        self._ready = None
+        self._idle = None
+        self._tasks = []
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name="twilio_reply_loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._spawn_workers(), loop).result()
+            logger.info(f"Twilio reply pool started ({self.workers} workers, queue {self.queue_size}).")
+
+    async def _spawn_workers(self):
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            key = await self._ready.get()
+            jobs = self._pending[key]
+            job = jobs.popleft()
+            self._queued -= 1
+            try:
+                await self.handler(job)
+                self.stats['completed'] += 1
+            except Exception:
+                self.stats['failed'] += 1
+                logger.exception("Twilio reply job failed.")
+            if jobs:
+                self._ready.put_nowait(key) # Next message of the same user, after this one
+            else:
+                del self._pending[key]
+                if not self._pending:
+                    self._idle.set()
+
+    async def _submit(self, key, job):
+        if self._queued >= self.queue_size:
+            self.stats['rejected'] += 1
+            return False
+        jobs = self._pending.get(key)
+        if jobs is None:
+            jobs = self._pending[key] = collections.deque()
+            self._ready.put_nowait(key)
+        jobs.append(job)
+        self._queued += 1
+        self._idle.clear()
+        self.stats['submitted'] += 1
+        return True
+
+    async def submit(self, key, job):
+        """Queues a job (from any event loop). Jobs with the same key run in order. False if full."""
+        if not self.started:
+            return False
+        future = asyncio.run_coroutine_threadsafe(self._submit(key, job), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def _drain(self, timeout):
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Twilio reply pool stopped with {self._queued} replies still queued.")
+        for task in self._tasks:
+            task.cancel()
+
+    def stop(self, drain_timeout=10):
+        """Waits up to drain_timeout seconds for queued replies, then stops the loop."""
+        with self._lock:
+            if not self.started:
+                return
+            loop = self._loop
+            asyncio.run_coroutine_threadsafe(self._drain(drain_timeout), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+            logger.info(f"Twilio reply pool stopped. Stats: {self.stats}")